@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
-"""Benchmark head-pose accuracy: InsightFace 1k3d68 pose vs our old 5-landmark hack.
+"""Benchmark head-pose accuracy: InsightFace 1k3d68 pose vs 5-landmark estimators.
 
 Runs the real buffalo_l pipeline over a head-pose dataset with ground-truth
 yaw/pitch/roll (AFLW2000-3D) and reports per-axis MAE for:
-  - InsightFace pose (face.pose, populated by the 1k3d68 model)
+  - InsightFace pose (face.pose, populated by the 1k3d68 model) — pose_mode=model
+  - the service's pose_mode=fast solve from the 5 SCRFD keypoints (no extra model)
   - the legacy 5-landmark geometric estimator we used in liveness (yaw from the
     nose-vs-eye-midpoint offset, pitch from the nose's vertical fraction)
 
+It also times both service modes per face: the 1k3d68 forward + fit
+(Landmark.get, one face per run) against the fast solve, single-face and
+vectorized over every face of the run.
+
 For the legacy estimator (which outputs normalized units, not degrees) we fit the
 best linear map to ground-truth degrees and report the residual MAE — i.e. its
 best-case accuracy. For InsightFace we also report the sign per axis that best
@@ -26,6 +31,7 @@ import argparse
 import math
 import os
 import sys
+import time
 from glob import glob
 
 import cv2
@@ -35,6 +41,9 @@ import numpy as np
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from benchmark import load_model  # noqa: E402
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.services.face_provider.insightface import _poses_from_keypoints  # noqa: E402
+
 
 def _gt_pose_degrees(mat_path: str) -> tuple[float, float, float] | None:
     """AFLW2000-3D Pose_Para = [pitch, yaw, roll, ...] in radians."""
@@ -83,7 +92,7 @@ def _linear_fit_mae(pred: list[float], gt: list[float]) -> float:
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Head-pose accuracy benchmark (InsightFace vs legacy hack)")
+    parser = argparse.ArgumentParser(description="Head-pose accuracy benchmark (1k3d68 vs 5-keypoint estimators)")
     parser.add_argument("--root", required=True, help="AFLW2000-3D dir with imageNNNNN.jpg + .mat")
     parser.add_argument("--limit", type=int, default=0, help="Max images (0 = all)")
     parser.add_argument("--cpu", action="store_true")
@@ -110,6 +119,11 @@ def main() -> None:
 
     axes = ("pitch", "yaw", "roll")
     if_pred: dict[str, list[float]] = {ax: [] for ax in axes}
+    fast_pred: dict[str, list[float]] = {ax: [] for ax in axes}
+    all_kps: list[np.ndarray] = []
+    model_s: list[float] = []
+    fast_s: list[float] = []
+    pose_model = app.models["landmark_3d_68"]
     gt_vals: dict[str, list[float]] = {ax: [] for ax in axes}
     legacy_pred = {"yaw": [], "pitch": []}  # type: dict[str, list[float]]
     legacy_gt = {"yaw": [], "pitch": []}  # type: dict[str, list[float]]
@@ -136,8 +150,17 @@ def main() -> None:
         if pose is None:
             no_face += 1
             continue
+        kps = np.asarray(face.kps, dtype=np.float32)
+        t0 = time.perf_counter()
+        pose_model.get(img, face)
+        model_s.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        fast = _poses_from_keypoints(kps[None])[0]
+        fast_s.append(time.perf_counter() - t0)
+        all_kps.append(kps)
         for i, ax in enumerate(axes):
             if_pred[ax].append(float(pose[i]))
+            fast_pred[ax].append(float(fast[i]))
             gt_vals[ax].append(gt[i])
         ly, lp = _legacy_estimator(np.asarray(face.kps))
         legacy_pred["yaw"].append(ly)
@@ -152,20 +175,31 @@ def main() -> None:
     if used == 0:
         sys.exit(1)
 
-    print(f"{'axis':<7}{'GT std':>9}{'InsightFace MAE':>18}{'sign':>6}{'legacy MAE (fit)':>20}")
-    print("-" * 60)
+    print(f"{'axis':<7}{'GT std':>9}{'InsightFace MAE':>18}{'sign':>6}{'fast MAE':>11}{'legacy MAE (fit)':>20}")
+    print("-" * 71)
     for ax in axes:
         gt_std = float(np.std(gt_vals[ax]))
         if_mae, sign = _best_sign_mae(if_pred[ax], gt_vals[ax])
+        # Same axes as the model pose by construction — apply its sign.
+        fast_mae = _mae([sign * p - g for p, g in zip(fast_pred[ax], gt_vals[ax], strict=True)])
         legacy = ""
         if ax in legacy_pred:
             legacy = f"{_linear_fit_mae(legacy_pred[ax], legacy_gt[ax]):>18.2f}°"
-        print(f"{ax:<7}{gt_std:>8.1f}°{if_mae:>16.2f}°{sign:>6}{legacy:>20}")
+        print(f"{ax:<7}{gt_std:>8.1f}°{if_mae:>16.2f}°{sign:>6}{fast_mae:>10.2f}°{legacy:>20}")
     print(
         "\nLower MAE = better. The 'sign' column is the multiplier that aligns InsightFace's "
         "axis to the dataset — use it to set the liveness yaw/pitch signs."
     )
 
+    stacked = np.stack(all_kps)
+    t0 = time.perf_counter()
+    _poses_from_keypoints(stacked)
+    vectorized_s = time.perf_counter() - t0
+    print(f"\nPer-face pose cost over {used} faces (p50):")
+    print(f"  pose_mode=model (1k3d68 Landmark.get): {np.median(model_s) * 1e3:8.3f} ms")
+    print(f"  pose_mode=fast, one face per solve:    {np.median(fast_s) * 1e3:8.3f} ms")
+    print(f"  pose_mode=fast, all {used} faces at once:  {vectorized_s / used * 1e3:8.4f} ms/face")
+
 
 if __name__ == "__main__":
     main()
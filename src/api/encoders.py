@@ -0,0 +1,253 @@
+"""Alternative response encodings for the faces router.
+
+JSON stays the default (pydantic schemas in ``endpoints/faces.py``). Clients
+sending ``Accept: application/msgpack`` or
+``Accept: application/vnd.apache.arrow.stream`` get the same results encoded
+straight from the provider's ``DetectedFace`` lists — no per-face pydantic
+objects, and packed embeddings travel as raw bytes instead of float text.
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib.util
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple
+
+import numpy as np
+from fastapi.responses import Response
+
+from src.core.exceptions import AppError
+from src.services.face_provider.base import wants
+
+if TYPE_CHECKING:
+    from src.services.face_provider.base import DetectedFace, EmbeddingFormat, FaceFields
+
+ResponseFormat = Literal["json", "msgpack", "arrow"]
+FaceResultKind = Literal["detect", "embed", "analyze"]
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+_MEDIA_TYPES: dict[str, ResponseFormat] = {
+    "application/json": "json",
+    "application/*": "json",
+    "*/*": "json",
+    MSGPACK_MEDIA_TYPE: "msgpack",
+    "application/x-msgpack": "msgpack",
+    ARROW_MEDIA_TYPE: "arrow",
+}
+_ARROW_DTYPES: dict[str, str] = {"f32_b64": "<f4", "f16_b64": "<f2", "int8_b64": "i1"}
+_DEFAULT_EMBEDDING_DIM = 512
+
+
+class ImageResult(NamedTuple):
+    faces: list[DetectedFace]
+    error: str | None = None
+
+
+def negotiate(accept: str | None) -> ResponseFormat:
+    """Pick the response format from an Accept header: highest q-value among
+    the supported media types, earliest listed on ties; ``q=0`` marks a type
+    not acceptable (RFC 9110), so it is never picked. Anything else (missing
+    header, only unsupported or refused types) falls back to JSON.
+
+    Arrow picked on a server without pyarrow is a 406 here, before the
+    request costs a provider pass, rather than at encode time."""
+    best: ResponseFormat = "json"
+    best_q = -1.0
+    for entry in (accept or "").split(","):
+        media_type, *params = (part.strip() for part in entry.split(";"))
+        fmt = _MEDIA_TYPES.get(media_type.lower())
+        if fmt is None:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q and q > 0:
+            best, best_q = fmt, q
+    if best == "arrow" and not _arrow_available():
+        raise AppError(406, "Arrow responses require the optional 'arrow' extra (pyarrow)")
+    return best
+
+
+@functools.cache
+def _arrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def provider_embedding_format(response_format: ResponseFormat, requested: EmbeddingFormat) -> EmbeddingFormat:
+    """Arrow carries embeddings as a contiguous numeric column, so a
+    float_list request is served from packed float32 rows (never tolist)."""
+    if response_format == "arrow" and requested == "float_list":
+        return "f32_b64"
+    return requested
+
+
+def encode_results(
+    response_format: ResponseFormat,
+    kind: FaceResultKind,
+    results: list[ImageResult],
+    *,
+    batch: bool,
+    embedding_format: EmbeddingFormat = "float_list",
+    fields: FaceFields | None = None,
+) -> Response:
+    """Encode provider results for a non-JSON response format.
+
+    ``embedding_format`` is the format the provider was asked for (see
+    ``provider_embedding_format``); Arrow uses it to pick the column dtype.
+    Per-face keys (msgpack) and columns (Arrow) outside ``fields`` are left out.
+    """
+    if response_format == "msgpack":
+        return Response(
+            content=_encode_msgpack(kind, results, batch=batch, fields=fields), media_type=MSGPACK_MEDIA_TYPE
+        )
+    if response_format == "arrow":
+        return Response(content=_encode_arrow(kind, results, embedding_format, fields), media_type=ARROW_MEDIA_TYPE)
+    msg = f"No encoder for response format {response_format!r}"
+    raise ValueError(msg)
+
+
+def _face_map(kind: FaceResultKind, face: DetectedFace, fields: FaceFields | None) -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    if wants(fields, "bbox"):
+        out["bbox"] = {"x": face.bbox.x, "y": face.bbox.y, "width": face.bbox.width, "height": face.bbox.height}
+    if wants(fields, "det_score"):
+        out["det_score"] = face.det_score
+    if wants(fields, "landmarks"):
+        out["landmarks"] = [{"x": x, "y": y} for x, y in face.landmarks] if face.landmarks is not None else None
+    if wants(fields, "pose"):
+        out["pose"] = (
+            {"pitch": face.pose.pitch, "yaw": face.pose.yaw, "roll": face.pose.roll} if face.pose is not None else None
+        )
+    if kind == "detect":
+        return out
+    if wants(fields, "embedding"):
+        # msgpack has a native binary type: packed embeddings go out as raw bytes.
+        out["embedding"] = face.embedding_packed if face.embedding_packed is not None else (face.embedding or [])
+        if face.embedding_scale is not None:
+            out["embedding_scale"] = face.embedding_scale
+    if kind == "analyze":
+        demographics = {"age": face.age, "gender": face.gender, "race": face.race, "race_probs": face.race_probs}
+        out.update((k, v) for k, v in demographics.items() if wants(fields, k))  # type: ignore[arg-type]
+    return out
+
+
+def _encode_msgpack(
+    kind: FaceResultKind, results: list[ImageResult], *, batch: bool, fields: FaceFields | None
+) -> bytes:
+    import msgpack  # type: ignore[import-untyped]  # noqa: PLC0415
+
+    # Every float here originates from a float32 tensor, so single-precision
+    # floats are lossless and half the size of msgpack's default float64.
+    packer = msgpack.Packer(use_single_float=True)
+    if not batch:
+        faces = results[0].faces
+        return packer.pack({"faces": [_face_map(kind, f, fields) for f in faces], "face_count": len(faces)})  # type: ignore[no-any-return]
+    items = [
+        {
+            "index": idx,
+            "faces": [_face_map(kind, f, fields) for f in result.faces],
+            "face_count": len(result.faces),
+            "error": result.error,
+        }
+        for idx, result in enumerate(results)
+    ]
+    total = sum(len(result.faces) for result in results)
+    return packer.pack({"results": items, "total_faces": total})  # type: ignore[no-any-return]
+
+
+def _embedding_matrix(
+    faces: list[DetectedFace], embedding_format: EmbeddingFormat
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """(F, D) embeddings plus (F,) scales for int8. Packed rows are joined and
+    reinterpreted with one frombuffer — no per-float Python objects."""
+    dtype = _ARROW_DTYPES.get(embedding_format)
+    if dtype is None:
+        rows = [f.embedding or [] for f in faces]
+        dim = len(rows[0]) if rows else _DEFAULT_EMBEDDING_DIM
+        return np.asarray(rows, dtype=np.float32).reshape(len(faces), dim), None
+    packed = b"".join(f.embedding_packed or b"" for f in faces)
+    matrix = (
+        np.frombuffer(packed, dtype=dtype).reshape(len(faces), -1)
+        if faces
+        else np.empty((0, _DEFAULT_EMBEDDING_DIM), dtype=dtype)
+    )
+    if embedding_format == "int8_b64":
+        return matrix, np.array([f.embedding_scale or 0.0 for f in faces], dtype=np.float32)
+    return matrix, None
+
+
+def _encode_arrow(
+    kind: FaceResultKind, results: list[ImageResult], embedding_format: EmbeddingFormat, fields: FaceFields | None
+) -> bytes:
+    """One IPC stream, one record batch, one row per image. Per-face columns
+    are ``list<...>`` arrays — a single contiguous values buffer plus per-image
+    offsets — so a reader maps e.g. every embedding of the batch as one
+    (total_faces, D) matrix with zero copies."""
+    # Only reached after negotiate() found pyarrow installed.
+    import pyarrow as pa  # type: ignore[import-untyped]  # noqa: PLC0415
+
+    faces = [face for result in results for face in result.faces]
+    offsets = pa.array(np.concatenate([[0], np.cumsum([len(r.faces) for r in results])]).astype(np.int32))
+
+    def _per_image(values: Any) -> Any:
+        return pa.ListArray.from_arrays(offsets, values)
+
+    def _fixed(matrix: np.ndarray, width: int, mask: np.ndarray | None = None) -> Any:
+        values = pa.array(np.ascontiguousarray(matrix).reshape(-1))
+        if mask is None:
+            return pa.FixedSizeListArray.from_arrays(values, width)
+        return pa.FixedSizeListArray.from_arrays(values, width, mask=pa.array(mask))
+
+    columns: dict[str, Any] = {
+        "index": pa.array(np.arange(len(results), dtype=np.int32)),
+        "face_count": pa.array(np.diff(offsets.to_numpy())),
+        "error": pa.array([r.error for r in results], type=pa.string()),
+    }
+    if wants(fields, "bbox"):
+        bboxes = np.array([(f.bbox.x, f.bbox.y, f.bbox.width, f.bbox.height) for f in faces], dtype=np.float32)
+        columns["bbox"] = _per_image(_fixed(bboxes, 4))
+    if wants(fields, "det_score"):
+        columns["det_score"] = _per_image(pa.array(np.array([f.det_score for f in faces], dtype=np.float32)))
+    if wants(fields, "landmarks"):
+        landmarks_missing = np.array([f.landmarks is None for f in faces], dtype=bool)
+        landmarks = np.zeros((len(faces), 10), dtype=np.float32)
+        for i, f in enumerate(faces):
+            if f.landmarks is not None:
+                landmarks[i] = np.asarray(f.landmarks, dtype=np.float32).reshape(-1)[:10]
+        columns["landmarks"] = _per_image(_fixed(landmarks, 10, landmarks_missing))
+    if kind == "detect" and wants(fields, "pose"):
+        pose_missing = np.array([f.pose is None for f in faces], dtype=bool)
+        poses = np.array(
+            [(f.pose.pitch, f.pose.yaw, f.pose.roll) if f.pose is not None else (0.0, 0.0, 0.0) for f in faces],
+            dtype=np.float32,
+        ).reshape(len(faces), 3)
+        columns["pose"] = _per_image(_fixed(poses, 3, pose_missing))
+    elif kind != "detect" and wants(fields, "embedding"):
+        matrix, scales = _embedding_matrix(faces, embedding_format)
+        columns["embedding"] = _per_image(_fixed(matrix, matrix.shape[1]))
+        if scales is not None:
+            columns["embedding_scale"] = _per_image(pa.array(scales))
+    if kind == "analyze":
+        if wants(fields, "age"):
+            columns["age"] = _per_image(pa.array([f.age for f in faces], type=pa.float32()))
+        if wants(fields, "gender"):
+            columns["gender"] = _per_image(pa.array([f.gender for f in faces], type=pa.string()))
+        if wants(fields, "race"):
+            columns["race"] = _per_image(pa.array([f.race for f in faces], type=pa.string()))
+        if wants(fields, "race_probs"):
+            columns["race_probs"] = _per_image(
+                pa.array([f.race_probs for f in faces], type=pa.map_(pa.string(), pa.float32()))
+            )
+
+    batch = pa.RecordBatch.from_pydict(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()  # type: ignore[no-any-return]
@@ -1,71 +1,295 @@
 import asyncio
+import contextlib
 import functools
-from collections.abc import Callable
-from typing import Annotated
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Hashable, Sequence
+from typing import Annotated, Any
 
+import numpy as np
 import pybase64
-import structlog
-from fastapi import APIRouter, Depends
-from fastapi.responses import Response
-from pydantic import BaseModel
-
+from fastapi import APIRouter, Depends, Request, WebSocket, WebSocketDisconnect, WebSocketException, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+from src.api.encoders import ImageResult, encode_results, negotiate, provider_embedding_format
+from src.api.inference import (
+    HINTS_UNSUPPORTED,
+    admitted,
+    infer_single,
+    item_bytes,
+    operation_batch_fn,
+    process_batch,
+    supplied_faces,
+)
+from src.api.json_stream import Base64Extractor, BatchBudgetError
+from src.api.multipart import parse_multipart
 from src.config import settings
 from src.core.exceptions import AppError
-from src.dependencies import get_face_provider
+from src.dependencies import bind_request_context, get_face_provider
 from src.schemas.faces import (
+    AlignedEmbeddingSchema,
+    AlignedEmbedOptions,
+    AlignedEmbedRequest,
+    AlignedEmbedResponse,
+    AnalyzeBatchRequest,
     AnalyzeBatchResponse,
     AnalyzeBatchResultItem,
     AnalyzeFaceSchema,
+    AnalyzeRequest,
     AnalyzeResponse,
     BatchRequest,
     BoundingBoxSchema,
+    DetectBatchOptions,
     DetectBatchRequest,
     DetectBatchResponse,
     DetectBatchResultItem,
     DetectFaceSchema,
+    DetectOptions,
     DetectRequest,
     DetectResponse,
+    EmbedBatchOptions,
+    EmbedBatchRequest,
     EmbedBatchResponse,
     EmbedBatchResultItem,
     EmbedFaceSchema,
+    EmbedOptions,
+    EmbedRequest,
     EmbedResponse,
+    FaceStreamOptions,
     ImageRequest,
     LandmarkPoint,
     PoseSchema,
 )
-from src.services.face_provider.base import DetectedFace, FaceProvider
-
-logger = structlog.get_logger()
-router = APIRouter(prefix="/faces", tags=["faces"])
+from src.services.coalescer import BatchFn
+from src.services.face_provider.base import (
+    FACE_FIELDS,
+    DetectedFace,
+    FaceFields,
+    FaceHint,
+    FaceProvider,
+    wants,
+)
+from src.services.request_context import current_deadline
 
-# Bounds requests in flight inside the provider. GPU passes are serialized by
-# the provider's internal lock, so with >1 permit the CPU stages of one
-# request (decode, letterbox, crops, serialization) overlap another request's
-# GPU time instead of idling behind it. FACE_MAX_INFLIGHT=1 restores strictly
-# serial behavior.
-_inference_sem = asyncio.Semaphore(max(1, settings.face_max_inflight))
+router = APIRouter(prefix="/faces", tags=["faces"], dependencies=[Depends(bind_request_context)])
 
 
-def _json_response(model: BaseModel) -> Response:
+def _json_response(model: BaseModel, exclude: dict[str, Any] | None = None) -> Response:
     """Serialize via pydantic-core's Rust path and bypass FastAPI's response
     pipeline (jsonable_encoder + json.dumps), which costs ~19x more on
     embedding-heavy payloads (~70 ms vs ~4 ms for a 66-face batch response).
     The `response_model` in each route decorator keeps the OpenAPI schema.
     """
-    return Response(content=model.model_dump_json(), media_type="application/json")
+    return Response(content=model.model_dump_json(exclude=exclude), media_type="application/json")
+
+
+def _face_exclude(fields: FaceFields | None) -> set[str] | None:
+    """Face schema attributes left out of the response by ``fields=``."""
+    if fields is None:
+        return None
+    excluded: set[str] = set(FACE_FIELDS - fields)
+    if "embedding" in excluded:
+        excluded.add("embedding_scale")
+    return excluded
+
+
+def _faces_exclude(fields: FaceFields | None) -> dict[str, Any] | None:
+    """``exclude=`` for a model with a ``faces`` list (responses, batch items)."""
+    excluded = _face_exclude(fields)
+    return None if excluded is None else {"faces": {"__all__": excluded}}
+
+
+def _results_exclude(fields: FaceFields | None) -> dict[str, Any] | None:
+    """``exclude=`` for a batch response."""
+    excluded = _faces_exclude(fields)
+    return None if excluded is None else {"results": {"__all__": excluded}}
 
 
 ProviderDep = Annotated[FaceProvider, Depends(get_face_provider)]
 
 
-def _decode_base64(image_b64: str) -> bytes:
-    # pybase64 = SIMD (AVX2) decoder, ~5-8x the stdlib's scalar loop and it
-    # releases the GIL on large inputs; validate=True is its fastest path and
-    # keeps the same reject-invalid-input contract as base64.b64decode.
+async def _load_images(items: Sequence[ImageRequest]) -> list[bytes]:
+    return await asyncio.to_thread(lambda: [item_bytes(item) for item in items])
+
+
+# Raw-body uploads skip base64 entirely: single-image routes take the encoded
+# image as the request body (application/octet-stream or image/*), batch routes
+# take multipart/form-data with one file part per image. The bytes go to the
+# provider as-is, never materialized as a str. Options come from the query
+# string (multipart text fields also count); JSON bodies keep the base64
+# contract, parsed by pydantic-core straight from the body bytes.
+_OCTET_STREAM = "application/octet-stream"
+_MULTIPART = "multipart/form-data"
+_BINARY_SCHEMA: dict[str, Any] = {"type": "string", "format": "binary"}
+_BATCH_MAX_BYTES = settings.face_batch_max_mb * 2**20
+
+
+def _media_type(request: Request) -> str:
+    return request.headers.get("content-type", "").partition(";")[0].strip().lower()
+
+
+def _validate[M: BaseModel](model: type[M], data: bytes | dict[str, str], source: str) -> M:
     try:
-        return pybase64.b64decode(image_b64, validate=True)
-    except Exception:
-        raise AppError(400, "Invalid base64-encoded image")  # noqa: B904
+        if isinstance(data, bytes):
+            return model.model_validate_json(data)
+        return model.model_validate(data)
+    except ValidationError as exc:
+        raise RequestValidationError([{**e, "loc": (source, *e["loc"])} for e in exc.errors()]) from None
+
+
+async def _read_image[O: BaseModel](request: Request, options: type[O], json_model: type[O]) -> tuple[bytes, O]:
+    media_type = _media_type(request)
+    if media_type == _OCTET_STREAM or media_type.startswith("image/"):
+        image_bytes = await request.body()
+        if not image_bytes:
+            raise AppError(400, "Empty image body")
+        return image_bytes, _validate(options, dict(request.query_params), "query")
+    body = _validate(json_model, await request.body(), "body")
+    assert isinstance(body, ImageRequest)
+    if body.image_path is not None:
+        return await asyncio.to_thread(item_bytes, body), body
+    return item_bytes(body), body
+
+
+async def _read_batch[O: BaseModel](
+    request: Request, options: type[O], json_model: type[O]
+) -> tuple[Sequence[ImageRequest | bytes], O]:
+    if _media_type(request) == _MULTIPART:
+        return await _read_multipart(request, options)
+    body = await _stream_json_batch(request, json_model)
+    assert isinstance(body, BatchRequest)
+    return _check_batch_size(body.images), body
+
+
+async def _stream_json_batch[O: BaseModel](request: Request, json_model: type[O]) -> O:
+    """A JSON batch body, base64-decoded image by image as it is read off the
+    socket (see ``src.api.json_stream``); only the skeleton is validated."""
+    extractor = Base64Extractor(_BATCH_MAX_BYTES)
+    try:
+        async for chunk in request.stream():
+            extractor.feed(chunk)
+    except BatchBudgetError as exc:
+        raise AppError(413, str(exc)) from None
+    skeleton, decoded = extractor.finish()
+    body = _validate(json_model, skeleton, "body")
+    assert isinstance(body, BatchRequest)
+    inline = [item for item in body.images if item.image_b64 is not None]
+    if len(inline) != len(decoded):
+        # Only possible with duplicate image_b64 keys in one item.
+        raise AppError(400, "Malformed batch body: each image needs one image_b64")
+    for item, image in zip(inline, decoded, strict=True):
+        # Undecodable values keep their INVALID_IMAGE placeholder, which
+        # fails per image like any bad base64.
+        item._image = image
+    return body
+
+
+async def _read_multipart[O: BaseModel](request: Request, options: type[O]) -> tuple[list[bytes], O]:
+    # Starlette spools parts over 1 MB to temp files, so a large batch is
+    # never held twice (raw body + parts) in memory.
+    form = await parse_multipart(
+        request,
+        max_files=settings.face_max_batch_size,
+        max_bytes=_BATCH_MAX_BYTES,
+        message=f"Batch images exceed {_BATCH_MAX_BYTES} bytes",
+    )
+    fields = dict(request.query_params)
+    images: list[bytes] = []
+    total = 0
+    try:
+        for key, value in form.multi_items():
+            if isinstance(value, str):
+                fields[key] = value
+                continue
+            total += value.size or 0
+            if total > _BATCH_MAX_BYTES:
+                raise AppError(413, f"Batch images exceed {_BATCH_MAX_BYTES} bytes")
+            images.append(await value.read())
+    finally:
+        await form.close()
+    return list(_check_batch_size(images)), _validate(options, fields, "query")
+
+
+async def _read_aligned(request: Request, crop_size: int) -> tuple[np.ndarray | list[bytes], AlignedEmbedOptions]:
+    """Crops for /embed/aligned: a packed uint8 (N, S, S, 3) tensor as the raw
+    body (N inferred from its length), or encoded crops as multipart parts or
+    base64 in JSON."""
+    media_type = _media_type(request)
+    if media_type == _OCTET_STREAM:
+        options = _validate(AlignedEmbedOptions, dict(request.query_params), "query")
+        raw = await request.body()
+        crop_bytes = crop_size * crop_size * 3
+        if not raw or len(raw) % crop_bytes:
+            raise AppError(400, f"Body must be a packed uint8 (N, {crop_size}, {crop_size}, 3) tensor")
+        _check_batch_count(len(raw) // crop_bytes)
+        crops = np.frombuffer(raw, dtype=np.uint8).reshape(-1, crop_size, crop_size, 3)
+        if options.channel_order == "rgb":
+            crops = np.ascontiguousarray(crops[..., ::-1])
+        return crops, options
+    if media_type == _MULTIPART:
+        return await _read_multipart(request, AlignedEmbedOptions)
+    body = _validate(AlignedEmbedRequest, await request.body(), "body")
+    return await _load_images(_check_batch_size(body.images)), body
+
+
+def _supported_hints(item: object, provider: FaceProvider) -> list[FaceHint] | None:
+    """``supplied_faces``, or 400 if there are some and the provider can't take them."""
+    hints = supplied_faces(item)
+    if hints is not None and not provider.supports_face_hints:
+        raise AppError(400, HINTS_UNSUPPORTED)
+    return hints
+
+
+def _check_batch_size[I](images: Sequence[I]) -> Sequence[I]:
+    _check_batch_count(len(images))
+    return images
+
+
+def _check_batch_count(count: int) -> None:
+    if count > settings.face_max_batch_size:
+        raise AppError(400, f"Batch size {count} exceeds maximum of {settings.face_max_batch_size}")
+
+
+def _inline_schema(model: type[BaseModel]) -> dict[str, Any]:
+    """JSON schema with $defs references resolved in place, so it can be
+    embedded in a route's openapi_extra (the request models never reach
+    FastAPI's components section)."""
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    def _resolve(node: Any) -> Any:
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return _resolve(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {k: _resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [_resolve(v) for v in node]
+        return node
+
+    return _resolve(schema)  # type: ignore[no-any-return]
+
+
+def _openapi_body(
+    json_model: type[BaseModel], options: type[BaseModel], *, batch: bool = False, tensor: bool = False
+) -> dict[str, Any]:
+    raw: dict[str, Any] = {}
+    if batch:
+        raw[_MULTIPART] = {
+            "schema": {"type": "object", "properties": {"images": {"type": "array", "items": _BINARY_SCHEMA}}}
+        }
+    if not batch or tensor:
+        raw[_OCTET_STREAM] = {"schema": _BINARY_SCHEMA}
+    return {
+        "parameters": [
+            {"name": name, "in": "query", "required": False, "schema": schema}
+            for name, schema in _inline_schema(options).get("properties", {}).items()
+        ],
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _inline_schema(json_model)}, **raw},
+        },
+    }
 
 
 def _bbox_schema(face: DetectedFace) -> BoundingBoxSchema:
@@ -84,140 +308,381 @@ def _pose_schema(face: DetectedFace) -> PoseSchema | None:
     return PoseSchema(pitch=face.pose.pitch, yaw=face.pose.yaw, roll=face.pose.roll)
 
 
-def _to_detect_schema(face: DetectedFace) -> DetectFaceSchema:
+def _to_detect_schema(face: DetectedFace, fields: FaceFields | None = None) -> DetectFaceSchema:
     return DetectFaceSchema(
         bbox=_bbox_schema(face),
         det_score=face.det_score,
-        landmarks=_landmarks_schema(face),
-        pose=_pose_schema(face),
+        landmarks=_landmarks_schema(face) if wants(fields, "landmarks") else None,
+        pose=_pose_schema(face) if wants(fields, "pose") else None,
     )
 
 
-def _to_embed_schema(face: DetectedFace) -> EmbedFaceSchema:
+def _embedding_value(face: DetectedFace, fields: FaceFields | None) -> list[float] | str:
+    if not wants(fields, "embedding"):
+        return []
+    if face.embedding_packed is not None:
+        return pybase64.b64encode(face.embedding_packed).decode("ascii")
+    return face.embedding or []
+
+
+def _to_embed_schema(face: DetectedFace, fields: FaceFields | None = None) -> EmbedFaceSchema:
     return EmbedFaceSchema(
         bbox=_bbox_schema(face),
         det_score=face.det_score,
-        embedding=face.embedding or [],
-        landmarks=_landmarks_schema(face),
+        embedding=_embedding_value(face, fields),
+        embedding_scale=face.embedding_scale,
+        landmarks=_landmarks_schema(face) if wants(fields, "landmarks") else None,
     )
 
 
-def _to_analyze_schema(face: DetectedFace) -> AnalyzeFaceSchema:
+def _to_analyze_schema(face: DetectedFace, fields: FaceFields | None = None) -> AnalyzeFaceSchema:
     return AnalyzeFaceSchema(
         bbox=_bbox_schema(face),
         det_score=face.det_score,
-        embedding=face.embedding or [],
+        embedding=_embedding_value(face, fields),
+        embedding_scale=face.embedding_scale,
         age=face.age,
         gender=face.gender,
         race=face.race,
-        race_probs=face.race_probs,
-        landmarks=_landmarks_schema(face),
+        race_probs=face.race_probs if wants(fields, "race_probs") else None,
+        landmarks=_landmarks_schema(face) if wants(fields, "landmarks") else None,
     )
 
 
-@router.post("/detect", response_model=DetectResponse)
-async def detect(body: DetectRequest, provider: ProviderDep) -> Response:
-    image_bytes = _decode_base64(body.image_b64)
-    async with _inference_sem:
-        faces = await asyncio.to_thread(provider.detect, image_bytes, body.pose)
-    return _json_response(DetectResponse(faces=[_to_detect_schema(f) for f in faces], face_count=len(faces)))
+def _batch_items[T](
+    results: list[ImageResult],
+    to_schema: Callable[[DetectedFace, FaceFields | None], T],
+    start: int = 0,
+    fields: FaceFields | None = None,
+) -> list[dict[str, Any]]:
+    return [
+        {
+            "index": idx,
+            "faces": [to_schema(f, fields) for f in r.faces],
+            "face_count": len(r.faces),
+            "error": r.error,
+        }
+        for idx, r in enumerate(results, start)
+    ]
+
+
+def _total_faces(results: list[ImageResult]) -> int:
+    return sum(len(r.faces) for r in results)
+
+
+# Per-operation result rendering for routes that take the operation as an
+# option (/jobs, /faces/stream).
+_OPERATION_ITEMS: dict[str, tuple[type[BaseModel], Callable[[DetectedFace, FaceFields | None], Any]]] = {
+    "detect": (DetectBatchResultItem, _to_detect_schema),
+    "embed": (EmbedBatchResultItem, _to_embed_schema),
+    "analyze": (AnalyzeBatchResultItem, _to_analyze_schema),
+}
+
+
+@router.post("/detect", response_model=DetectResponse, openapi_extra=_openapi_body(DetectRequest, DetectOptions))
+async def detect(request: Request, provider: ProviderDep) -> Response:
+    response_format = negotiate(request.headers.get("accept"))
+    image_bytes, options = await _read_image(request, DetectOptions, DetectRequest)
+    fields = options.fields
+    faces = await infer_single(
+        image_bytes,
+        functools.partial(provider.detect, include_pose=options.pose, pose_mode=options.pose_mode, fields=fields),
+        functools.partial(provider.detect_batch, include_pose=options.pose, pose_mode=options.pose_mode, fields=fields),
+        ("detect", options.pose, options.pose_mode, fields),
+    )
+    if response_format != "json":
+        return encode_results(response_format, "detect", [ImageResult(faces)], batch=False, fields=fields)
+    return _json_response(
+        DetectResponse(faces=[_to_detect_schema(f, fields) for f in faces], face_count=len(faces)),
+        exclude=_faces_exclude(fields),
+    )
 
 
-@router.post("/embed", response_model=EmbedResponse)
-async def embed(body: ImageRequest, provider: ProviderDep) -> Response:
-    image_bytes = _decode_base64(body.image_b64)
-    async with _inference_sem:
-        faces = await asyncio.to_thread(provider.embed, image_bytes)
-    return _json_response(EmbedResponse(faces=[_to_embed_schema(f) for f in faces], face_count=len(faces)))
+@router.post("/embed", response_model=EmbedResponse, openapi_extra=_openapi_body(EmbedRequest, EmbedOptions))
+async def embed(request: Request, provider: ProviderDep) -> Response:
+    response_format = negotiate(request.headers.get("accept"))
+    image_bytes, options = await _read_image(request, EmbedOptions, EmbedRequest)
+    embedding_format = provider_embedding_format(response_format, options.embedding_format)
+    fields = options.fields
+    faces = await infer_single(
+        image_bytes,
+        functools.partial(provider.embed, embedding_format=embedding_format, fields=fields),
+        functools.partial(provider.embed_batch, embedding_format=embedding_format, fields=fields),
+        ("embed", embedding_format, fields),
+        _supported_hints(options, provider),
+    )
+    if response_format != "json":
+        return encode_results(
+            response_format,
+            "embed",
+            [ImageResult(faces)],
+            batch=False,
+            embedding_format=embedding_format,
+            fields=fields,
+        )
+    return _json_response(
+        EmbedResponse(faces=[_to_embed_schema(f, fields) for f in faces], face_count=len(faces)),
+        exclude=_faces_exclude(fields),
+    )
 
 
-@router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze(body: ImageRequest, provider: ProviderDep) -> Response:
-    image_bytes = _decode_base64(body.image_b64)
-    async with _inference_sem:
-        faces = await asyncio.to_thread(provider.analyze, image_bytes)
-    return _json_response(AnalyzeResponse(faces=[_to_analyze_schema(f) for f in faces], face_count=len(faces)))
+@router.post("/analyze", response_model=AnalyzeResponse, openapi_extra=_openapi_body(AnalyzeRequest, EmbedOptions))
+async def analyze(request: Request, provider: ProviderDep) -> Response:
+    response_format = negotiate(request.headers.get("accept"))
+    image_bytes, options = await _read_image(request, EmbedOptions, AnalyzeRequest)
+    embedding_format = provider_embedding_format(response_format, options.embedding_format)
+    fields = options.fields
+    faces = await infer_single(
+        image_bytes,
+        functools.partial(provider.analyze, embedding_format=embedding_format, fields=fields),
+        functools.partial(provider.analyze_batch, embedding_format=embedding_format, fields=fields),
+        ("analyze", embedding_format, fields),
+        _supported_hints(options, provider),
+    )
+    if response_format != "json":
+        return encode_results(
+            response_format,
+            "analyze",
+            [ImageResult(faces)],
+            batch=False,
+            embedding_format=embedding_format,
+            fields=fields,
+        )
+    return _json_response(
+        AnalyzeResponse(faces=[_to_analyze_schema(f, fields) for f in faces], face_count=len(faces)),
+        exclude=_faces_exclude(fields),
+    )
 
 
-@router.post("/detect/batch", response_model=DetectBatchResponse)
-async def detect_batch(body: DetectBatchRequest, provider: ProviderDep) -> Response:
-    detect_fn = functools.partial(provider.detect_batch, include_pose=body.pose)
-    results, total_faces = await _process_batch_optimized(body.images, detect_fn, _to_detect_schema)
+@router.post(
+    "/detect/batch",
+    response_model=DetectBatchResponse,
+    openapi_extra=_openapi_body(DetectBatchRequest, DetectBatchOptions, batch=True),
+)
+async def detect_batch(request: Request, provider: ProviderDep) -> Response:
+    images, options = await _read_batch(request, DetectBatchOptions, DetectBatchRequest)
+    # NDJSON lines are JSON: stream=true ignores Accept.
+    response_format = "json" if options.stream else negotiate(request.headers.get("accept"))
+    fields = options.fields
+    detect_fn = functools.partial(
+        provider.detect_batch, include_pose=options.pose, pose_mode=options.pose_mode, fields=fields
+    )
+    cache_key = ("detect", options.pose, options.pose_mode, fields)
+    if options.stream:
+        return _ndjson_stream(
+            images, detect_fn, provider.stream_chunk_size, DetectBatchResultItem, _to_detect_schema, fields, cache_key
+        )
+    results = await process_batch(images, detect_fn, cache_key)
+    if response_format != "json":
+        return encode_results(response_format, "detect", results, batch=True, fields=fields)
     return _json_response(
         DetectBatchResponse(
-            results=[DetectBatchResultItem(**r) for r in results],
-            total_faces=total_faces,
-        )
+            results=[DetectBatchResultItem(**r) for r in _batch_items(results, _to_detect_schema, fields=fields)],
+            total_faces=_total_faces(results),
+        ),
+        exclude=_results_exclude(fields),
     )
 
 
-async def _process_batch_optimized[T](
-    images: list[ImageRequest],
-    batch_method: Callable[[list[bytes]], list[list[DetectedFace]]],
-    to_schema: Callable[[DetectedFace], T],
-) -> tuple[list[dict[str, object]], int]:
-    if len(images) > settings.face_max_batch_size:
-        raise AppError(400, f"Batch size {len(images)} exceeds maximum of {settings.face_max_batch_size}")
-
-    valid_indices: list[int] = []
-    valid_bytes: list[bytes] = []
-    results: list[dict[str, object]] = [{}] * len(images)
-
-    def _decode_all() -> None:
-        # base64 of a whole batch costs ~20+ ms — keep it off the event loop
-        # so concurrent requests aren't serialized behind it (b64decode
-        # releases the GIL).
-        for idx, item in enumerate(images):
+_NDJSON = "application/x-ndjson"
+
+
+def _ndjson_stream[T](
+    images: Sequence[ImageRequest | bytes],
+    batch_method: BatchFn,
+    chunk_size: int,
+    item_model: type[BaseModel],
+    to_schema: Callable[[DetectedFace, FaceFields | None], T],
+    fields: FaceFields | None = None,
+    cache_key: Hashable | None = None,
+    *,
+    face_hints: bool = False,
+) -> StreamingResponse:
+    """stream=true: run the batch one provider chunk at a time and flush each
+    image's result line as soon as its chunk is done. Time-to-first-result is
+    one chunk instead of the whole batch, only one chunk's results are alive
+    at a time, and the admission slot is released between chunks so other
+    requests interleave. Lines carry their batch ``index``; chunks shed by
+    admission or the request deadline come back as per-image errors."""
+
+    exclude = _faces_exclude(fields)
+
+    async def _lines() -> AsyncIterator[bytes]:
+        for start in range(0, len(images), chunk_size):
+            chunk = images[start : start + chunk_size]
             try:
-                image_bytes = _decode_base64(item.image_b64)
-                valid_indices.append(idx)
-                valid_bytes.append(image_bytes)
+                results = await process_batch(chunk, batch_method, cache_key, face_hints=face_hints)
             except AppError as exc:
-                results[idx] = {"index": idx, "faces": [], "face_count": 0, "error": exc.detail}
+                # The 200 is already on the wire: shed chunks become error lines.
+                results = [ImageResult([], exc.detail)] * len(chunk)
+            for item in _batch_items(results, to_schema, start, fields):
+                yield item_model(**item).model_dump_json(exclude=exclude).encode() + b"\n"
 
-    await asyncio.to_thread(_decode_all)
+    return StreamingResponse(_lines(), media_type=_NDJSON)
 
-    total_faces = 0
 
-    if valid_bytes:
-        async with _inference_sem:
-            try:
-                all_faces = await asyncio.to_thread(batch_method, valid_bytes)
-            except asyncio.CancelledError:
-                raise
-            except Exception as exc:
-                logger.exception("Batch processing failed")
-                error_message = str(exc) or "Processing failed"
-                for idx in valid_indices:
-                    results[idx] = {"index": idx, "faces": [], "face_count": 0, "error": error_message}
-                return results, 0
-
-        for i, idx in enumerate(valid_indices):
-            faces = all_faces[i]
-            face_schemas = [to_schema(f) for f in faces]
-            results[idx] = {"index": idx, "faces": face_schemas, "face_count": len(faces), "error": None}
-            total_faces += len(faces)
-
-    return results, total_faces
-
-
-@router.post("/embed/batch", response_model=EmbedBatchResponse)
-async def embed_batch(body: BatchRequest, provider: ProviderDep) -> Response:
-    results, total_faces = await _process_batch_optimized(body.images, provider.embed_batch, _to_embed_schema)
+@router.post(
+    "/embed/batch",
+    response_model=EmbedBatchResponse,
+    openapi_extra=_openapi_body(EmbedBatchRequest, EmbedBatchOptions, batch=True),
+)
+async def embed_batch(request: Request, provider: ProviderDep) -> Response:
+    images, options = await _read_batch(request, EmbedBatchOptions, EmbedBatchRequest)
+    # NDJSON lines are JSON: stream=true ignores Accept.
+    response_format = "json" if options.stream else negotiate(request.headers.get("accept"))
+    embedding_format = provider_embedding_format(response_format, options.embedding_format)
+    fields = options.fields
+    embed_fn = functools.partial(provider.embed_batch, embedding_format=embedding_format, fields=fields)
+    cache_key = ("embed", embedding_format, fields)
+    if options.stream:
+        return _ndjson_stream(
+            images,
+            embed_fn,
+            provider.stream_chunk_size,
+            EmbedBatchResultItem,
+            _to_embed_schema,
+            fields,
+            cache_key,
+            face_hints=provider.supports_face_hints,
+        )
+    results = await process_batch(images, embed_fn, cache_key, face_hints=provider.supports_face_hints)
+    if response_format != "json":
+        return encode_results(
+            response_format, "embed", results, batch=True, embedding_format=embedding_format, fields=fields
+        )
     return _json_response(
         EmbedBatchResponse(
-            results=[EmbedBatchResultItem(**r) for r in results],
-            total_faces=total_faces,
-        )
+            results=[EmbedBatchResultItem(**r) for r in _batch_items(results, _to_embed_schema, fields=fields)],
+            total_faces=_total_faces(results),
+        ),
+        exclude=_results_exclude(fields),
     )
 
 
-@router.post("/analyze/batch", response_model=AnalyzeBatchResponse)
-async def analyze_batch(body: BatchRequest, provider: ProviderDep) -> Response:
-    results, total_faces = await _process_batch_optimized(body.images, provider.analyze_batch, _to_analyze_schema)
+@router.post(
+    "/analyze/batch",
+    response_model=AnalyzeBatchResponse,
+    openapi_extra=_openapi_body(AnalyzeBatchRequest, EmbedBatchOptions, batch=True),
+)
+async def analyze_batch(request: Request, provider: ProviderDep) -> Response:
+    images, options = await _read_batch(request, EmbedBatchOptions, AnalyzeBatchRequest)
+    # NDJSON lines are JSON: stream=true ignores Accept.
+    response_format = "json" if options.stream else negotiate(request.headers.get("accept"))
+    embedding_format = provider_embedding_format(response_format, options.embedding_format)
+    fields = options.fields
+    analyze_fn = functools.partial(provider.analyze_batch, embedding_format=embedding_format, fields=fields)
+    cache_key = ("analyze", embedding_format, fields)
+    if options.stream:
+        return _ndjson_stream(
+            images,
+            analyze_fn,
+            provider.stream_chunk_size,
+            AnalyzeBatchResultItem,
+            _to_analyze_schema,
+            fields,
+            cache_key,
+            face_hints=provider.supports_face_hints,
+        )
+    results = await process_batch(images, analyze_fn, cache_key, face_hints=provider.supports_face_hints)
+    if response_format != "json":
+        return encode_results(
+            response_format, "analyze", results, batch=True, embedding_format=embedding_format, fields=fields
+        )
     return _json_response(
         AnalyzeBatchResponse(
-            results=[AnalyzeBatchResultItem(**r) for r in results],
-            total_faces=total_faces,
+            results=[AnalyzeBatchResultItem(**r) for r in _batch_items(results, _to_analyze_schema, fields=fields)],
+            total_faces=_total_faces(results),
+        ),
+        exclude=_results_exclude(fields),
+    )
+
+
+@router.post(
+    "/embed/aligned",
+    response_model=AlignedEmbedResponse,
+    openapi_extra=_openapi_body(AlignedEmbedRequest, AlignedEmbedOptions, batch=True, tensor=True),
+)
+async def embed_aligned(request: Request, provider: ProviderDep) -> Response:
+    """Recognition only, for crops the caller already detected and aligned
+    (e.g. on an edge device): no frame decode, letterbox or detector pass."""
+    crops, options = await _read_aligned(request, provider.aligned_crop_size)
+    async with admitted():
+        try:
+            encoded = await asyncio.to_thread(provider.embed_aligned, crops, options.embedding_format)
+        except (ValueError, NotImplementedError) as exc:
+            raise AppError(400, str(exc)) from None
+    return _json_response(
+        AlignedEmbedResponse(
+            embeddings=[
+                AlignedEmbeddingSchema(
+                    index=i,
+                    embedding=pybase64.b64encode(e.packed).decode("ascii") if e.packed is not None else e.values or [],
+                    embedding_scale=e.scale,
+                )
+                for i, e in enumerate(encoded)
+            ],
+            count=len(encoded),
         )
     )
+
+
+@router.websocket("/stream")
+async def stream(websocket: WebSocket, provider: ProviderDep) -> None:
+    """Live frames over one socket. Each binary message is one encoded frame
+    (JPEG/PNG); each reply is a text message with that frame's
+    *BatchResultItem JSON, ``index`` counting frames from 0. Frames that
+    arrive while inference is busy are batched into the next provider call;
+    beyond ``max_pending`` the oldest are dropped (their indexes never get a
+    reply), so a slow model degrades frame rate, not latency. Options come
+    from the query string."""
+    try:
+        options = FaceStreamOptions.model_validate(dict(websocket.query_params))
+    except ValidationError as exc:
+        raise WebSocketException(status.WS_1008_POLICY_VIOLATION, str(exc)) from None
+    # Frames are shed by the pending bound, not a deadline: the socket lives
+    # much longer than any request budget.
+    current_deadline.set(None)
+    item_model, to_schema = _OPERATION_ITEMS[options.operation]
+    batch_fn = operation_batch_fn(provider, options)
+    exclude = _faces_exclude(options.fields)
+    pending: deque[tuple[int, bytes]] = deque(maxlen=options.max_pending)
+    frame_ready = asyncio.Event()
+
+    async def _receive() -> None:
+        index = 0
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is None:
+                await websocket.close(status.WS_1003_UNSUPPORTED_DATA, "Frames must be binary messages")
+                return
+            pending.append((index, message["bytes"]))
+            index += 1
+            frame_ready.set()
+
+    await websocket.accept()
+    receiver = asyncio.create_task(_receive())
+    try:
+        while True:
+            if not pending:
+                frame_ready.clear()
+                waiter = asyncio.create_task(frame_ready.wait())
+                await asyncio.wait((waiter, receiver), return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+            if receiver.done():
+                return  # client gone, or closed on a text message
+            frames = list(pending)
+            pending.clear()
+            try:
+                results = await process_batch([frame for _, frame in frames], batch_fn)
+            except AppError as exc:
+                results = [ImageResult([], exc.detail)] * len(frames)
+            for (index, _), item in zip(frames, _batch_items(results, to_schema, fields=options.fields), strict=True):
+                await websocket.send_text(item_model(**{**item, "index": index}).model_dump_json(exclude=exclude))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        with contextlib.suppress(asyncio.CancelledError, WebSocketDisconnect):
+            await receiver
@@ -0,0 +1,325 @@
+import asyncio
+import contextlib
+import functools
+import sys
+import tarfile
+import zipfile
+from collections.abc import AsyncIterator
+from typing import IO, Annotated, Any
+
+from fastapi import APIRouter, Depends, Path, Request
+from fastapi.responses import FileResponse, Response
+
+from src.api.endpoints.faces import (
+    _BINARY_SCHEMA,
+    _MULTIPART,
+    _NDJSON,
+    _OPERATION_ITEMS,
+    _batch_items,
+    _faces_exclude,
+    _json_response,
+    _media_type,
+    _openapi_body,
+    _total_faces,
+    _validate,
+)
+from src.api.inference import item_bytes, operation_batch_fn, operation_cache_key, process_batch
+from src.api.json_stream import Base64Extractor, BatchBudgetError
+from src.api.multipart import parse_multipart
+from src.config import settings
+from src.core.exceptions import AppError
+from src.dependencies import get_job_worker
+from src.schemas.faces import ImageRequest
+from src.schemas.jobs import JobOptions, JobRequest, JobResponse
+from src.services.face_provider.base import FaceProvider
+from src.services.jobs import Job, JobNotFoundError, JobTooLargeError, JobWorker, JobWriter
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+JobWorkerDep = Annotated[JobWorker, Depends(get_job_worker)]
+JobId = Annotated[str, Path(pattern=r"^[0-9a-f]{32}$")]
+
+# Besides JSON and multipart, a job can be submitted as one archive body: each
+# regular file in it is an image, in archive order.
+_ZIP = "application/zip"
+_TAR = ("application/x-tar", "application/gzip")
+
+# A full admission queue (429) only delays a job chunk; it retries after this.
+_ADMISSION_RETRY_S = 0.5
+# Upload data collected on the event loop goes to disk in a worker thread once
+# this much is buffered.
+_WRITE_BUFFER = 1 << 20
+
+
+async def run_job_chunk(provider: FaceProvider, job: Job, images: list[bytes], start: int) -> tuple[bytes, int]:
+    """The job worker's processor: one chunk through the same batch path as
+    the /faces/*/batch routes, rendered as that route's result item lines.
+    Jobs read the result cache but leave it to the interactive routes."""
+    options = JobOptions.model_validate({**job.options, "operation": job.operation})
+    item_model, to_schema = _OPERATION_ITEMS[options.operation]
+    batch_fn = operation_batch_fn(provider, options)
+    while True:
+        try:
+            results = await process_batch(images, batch_fn, operation_cache_key(options), cache_fill=False)
+            break
+        except AppError as exc:
+            if exc.status_code != 429:
+                raise
+            await asyncio.sleep(_ADMISSION_RETRY_S)
+    exclude = _faces_exclude(options.fields)
+    lines = [
+        item_model(**item).model_dump_json(exclude=exclude).encode()
+        for item in _batch_items(results, to_schema, start, options.fields)
+    ]
+    return b"\n".join(lines) + b"\n", _total_faces(results)
+
+
+def _job_response(job: Job, status_code: int = 200) -> Response:
+    response = _json_response(
+        JobResponse(
+            job_id=job.job_id,
+            status=job.status,
+            operation=job.operation,
+            total_images=job.total_images,
+            processed_images=job.processed_images,
+            total_faces=job.total_faces,
+            result_chunks=job.result_chunks,
+            chunk_size=job.chunk_size,
+            error=job.error,
+            created_at=job.created_at,
+            finished_at=job.finished_at,
+        )
+    )
+    response.status_code = status_code
+    return response
+
+
+def _check_job_size(count: int) -> None:
+    if count > settings.face_job_max_images:
+        raise AppError(400, f"Job exceeds maximum of {settings.face_job_max_images} images")
+
+
+def _unpack_archive(writer: JobWriter, media_type: str) -> None:
+    try:
+        if media_type == _ZIP:
+            with zipfile.ZipFile(writer.upload_path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        _check_job_size(len(writer) + 1)
+                        with archive.open(info) as src:
+                            writer.add_file(src)
+            return
+        with tarfile.open(writer.upload_path, mode="r:*") as archive:
+            for member in archive:
+                member_file = archive.extractfile(member) if member.isfile() else None
+                if member_file is not None:
+                    _check_job_size(len(writer) + 1)
+                    writer.add_file(member_file)
+    except (zipfile.BadZipFile, tarfile.TarError):
+        raise AppError(400, "Invalid archive") from None
+
+
+def _job_byte_limits() -> tuple[int, int]:
+    """Per-image and per-job byte limits (0 = none)."""
+    return settings.face_job_max_image_mb * 2**20, settings.face_job_max_mb * 2**20
+
+
+async def _new_writer(worker: JobWorker, options: JobOptions) -> JobWriter:
+    stored = options.model_dump(mode="json", include={"pose", "pose_mode", "embedding_format", "fields"})
+    max_image_bytes, max_bytes = _job_byte_limits()
+    return await asyncio.to_thread(
+        functools.partial(
+            worker.spool.create,
+            options.operation,
+            stored,
+            settings.face_job_chunk_size,
+            max_image_bytes=max_image_bytes,
+            max_bytes=max_bytes,
+        )
+    )
+
+
+@contextlib.asynccontextmanager
+async def _filling(writer: JobWriter) -> AsyncIterator[None]:
+    """Discard the upload if spooling it fails; a byte limit hit is a 413."""
+    try:
+        yield
+    except JobTooLargeError as exc:
+        await asyncio.to_thread(writer.abort)
+        raise AppError(413, str(exc)) from None
+    except BaseException:
+        await asyncio.to_thread(writer.abort)
+        raise
+
+
+def _check_upload_size(writer: JobWriter, size: int) -> None:
+    if writer.max_bytes and size > writer.max_bytes:
+        raise JobTooLargeError(f"Job upload exceeds {writer.max_bytes} bytes")
+
+
+class _ThreadedWriter:
+    """Buffers writes made on the event loop and hands them to ``f`` in a
+    worker thread, ~_WRITE_BUFFER at a time, so disk I/O never blocks the
+    loop."""
+
+    def __init__(self, f: IO[bytes]) -> None:
+        self._f = f
+        self._parts: list[bytes] = []
+        self._size = 0
+
+    def write(self, data: bytes) -> None:
+        self._parts.append(data)
+        self._size += len(data)
+
+    async def flush(self, *, force: bool = False) -> None:
+        if not self._parts or (self._size < _WRITE_BUFFER and not force):
+            return
+        parts, self._parts, self._size = self._parts, [], 0
+        await asyncio.to_thread(self._f.writelines, parts)
+
+
+def _spool_images(writer: JobWriter, items: list[ImageRequest], scratch: IO[bytes], spans: list[int | None]) -> None:
+    """Copy a JSON job's images into ``writer`` in document order: inline
+    ones from ``scratch`` (``spans`` holds their decoded lengths, ``None``
+    if undecodable), image_path ones read from disk one at a time."""
+    lengths = iter(spans)
+    scratch.seek(0)
+    for item in items:
+        if item.image_b64 is None:
+            writer.add(item_bytes(item))
+            continue
+        length = next(lengths)
+        # Undecodable: the INVALID_IMAGE placeholder fails like bad base64.
+        writer.add(item_bytes(item) if length is None else scratch.read(length))
+
+
+async def _spool_json(request: Request, worker: JobWorker) -> JobWriter:
+    """A JSON job body, base64-decoded image by image off the socket (see
+    ``src.api.json_stream``) into a scratch file on the spool's disk — the
+    job, and so its writer, only exists once the skeleton has validated."""
+    max_image_bytes, max_bytes = _job_byte_limits()
+    spans: list[int | None] = []
+    with await asyncio.to_thread(worker.spool.scratch) as scratch:
+        out = _ThreadedWriter(scratch)
+
+        def _sink(image: bytes | None) -> None:
+            if image is not None:
+                out.write(image)
+            spans.append(None if image is None else len(image))
+
+        extractor = Base64Extractor(max_bytes or sys.maxsize, max_image_bytes=max_image_bytes, sink=_sink)
+        try:
+            async for chunk in request.stream():
+                extractor.feed(chunk)
+                await out.flush()
+        except BatchBudgetError as exc:
+            raise AppError(413, str(exc)) from None
+        await out.flush(force=True)
+        skeleton, _ = extractor.finish()
+        body = _validate(JobRequest, skeleton, "body")
+        _check_job_size(len(body.images))
+        if sum(item.image_b64 is not None for item in body.images) != len(spans):
+            # Only possible with duplicate image_b64 keys in one item.
+            raise AppError(400, "Malformed job body: each image needs one image_b64")
+        writer = await _new_writer(worker, body)
+        async with _filling(writer):
+            await asyncio.to_thread(_spool_images, writer, body.images, scratch, spans)
+    return writer
+
+
+async def _spool_upload(request: Request, worker: JobWorker) -> JobWriter:
+    """Stream the submitted images into a new spool entry, never holding more
+    than one image in memory."""
+    media_type = _media_type(request)
+    if media_type in (_ZIP, *_TAR):
+        options = _validate(JobOptions, dict(request.query_params), "query")
+        writer = await _new_writer(worker, options)
+        async with _filling(writer):
+            size = 0
+            with await asyncio.to_thread(writer.upload_path.open, "wb") as f:
+                out = _ThreadedWriter(f)
+                async for part in request.stream():
+                    size += len(part)
+                    _check_upload_size(writer, size)
+                    out.write(part)
+                    await out.flush()
+                await out.flush(force=True)
+            await asyncio.to_thread(_unpack_archive, writer, media_type)
+        return writer
+    if media_type == _MULTIPART:
+        # Starlette spools parts over 1 MB to temp files — bounded by the job
+        # byte budget while it reads — and each is copied into the spool file
+        # by file.
+        max_bytes = _job_byte_limits()[1]
+        form = await parse_multipart(
+            request,
+            max_files=settings.face_job_max_images,
+            max_bytes=max_bytes,
+            message=f"Job upload exceeds {max_bytes} bytes",
+        )
+        try:
+            fields = dict(request.query_params)
+            fields.update((k, v) for k, v in form.multi_items() if isinstance(v, str))
+            options = _validate(JobOptions, fields, "query")
+            writer = await _new_writer(worker, options)
+            async with _filling(writer):
+                for _, value in form.multi_items():
+                    if not isinstance(value, str):
+                        await asyncio.to_thread(writer.add_file, value.file)
+        finally:
+            await form.close()
+        return writer
+    return await _spool_json(request, worker)
+
+
+def _openapi_job_body() -> dict[str, Any]:
+    extra = _openapi_body(JobRequest, JobOptions, batch=True)
+    extra["requestBody"]["content"].update({media_type: {"schema": _BINARY_SCHEMA} for media_type in (_ZIP, *_TAR)})
+    return extra
+
+
+@router.post(
+    "",
+    status_code=202,
+    response_model=JobResponse,
+    openapi_extra=_openapi_job_body(),
+)
+async def create_job(request: Request, worker: JobWorkerDep) -> Response:
+    writer = await _spool_upload(request, worker)
+    if not len(writer):
+        await asyncio.to_thread(writer.abort)
+        raise AppError(400, "Job has no images")
+    job = await asyncio.to_thread(writer.commit)
+    worker.submit(job)
+    response = _job_response(job, status_code=202)
+    response.headers["location"] = f"/jobs/{job.job_id}"
+    return response
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: JobId, worker: JobWorkerDep) -> Response:
+    try:
+        job = await asyncio.to_thread(worker.spool.load, job_id)
+    except JobNotFoundError:
+        raise AppError(404, "Job not found") from None
+    return _job_response(job)
+
+
+@router.get("/{job_id}/results/{chunk}", response_class=FileResponse)
+async def get_job_results(job_id: JobId, chunk: int, worker: JobWorkerDep) -> FileResponse:
+    """One chunk of results: a *BatchResultItem NDJSON line per image, carrying
+    the image's index in the job."""
+    try:
+        path = await asyncio.to_thread(worker.spool.results_path, job_id, chunk)
+    except JobNotFoundError:
+        raise AppError(404, "Result chunk not found") from None
+    return FileResponse(path, media_type=_NDJSON)
+
+
+@router.delete("/{job_id}", status_code=204)
+async def delete_job(job_id: JobId, worker: JobWorkerDep) -> Response:
+    try:
+        await worker.delete(job_id)
+    except JobNotFoundError:
+        raise AppError(404, "Job not found") from None
+    return Response(status_code=204)
@@ -0,0 +1,332 @@
+"""The inference path the /faces routes, /jobs and gRPC share.
+
+Admission, coalescing of single images, the per-image result cache and the
+batch runner live here rather than in an endpoint module, so every front end
+reaches the provider the same way and holds the same admission slots.
+"""
+
+import asyncio
+import functools
+from collections.abc import AsyncIterator, Callable, Hashable, Sequence
+from contextlib import asynccontextmanager
+
+import pybase64
+import structlog
+
+from src.api.encoders import ImageResult
+from src.config import settings
+from src.core.exceptions import AppError
+from src.schemas.faces import HintedImageRequest, ImageRequest, OperationOptions
+from src.services.admission import AdmissionController, AdmissionRejectedError
+from src.services.coalescer import BatchFn, RequestCoalescer
+from src.services.face_provider.base import BoundingBox, DetectedFace, FaceHint, FaceProvider
+from src.services.file_ingest import FileIngestor, IngestPathError
+from src.services.image_header import megapixels
+from src.services.request_context import DeadlineExceededError, current_priority
+from src.services.result_cache import ResultCache, digest
+
+logger = structlog.get_logger()
+
+# Bounds requests in flight inside the provider. GPU passes are serialized by
+# the provider's pass scheduler, so with >1 permit the CPU stages of one
+# request (decode, letterbox, crops, serialization) overlap another request's
+# GPU time instead of idling behind it, and same-model chunks of concurrent
+# requests share a pass. FACE_MAX_INFLIGHT=1 restores strictly serial behavior.
+# Admission is priority-ordered (X-Priority), with FACE_INTERACTIVE_RESERVE
+# extra slots for interactive requests.
+_admission = AdmissionController(
+    settings.face_max_inflight,
+    interactive_reserve=settings.face_interactive_reserve,
+    max_queue=settings.face_admission_max_queue,
+)
+
+
+@asynccontextmanager
+async def admitted() -> AsyncIterator[None]:
+    """An admission slot, with load shedding surfaced as HTTP errors: 429 when
+    the admission queue is full, 503 once the request deadline has passed —
+    whether still queued or between the provider's model passes."""
+    try:
+        async with _admission.slot():
+            yield
+    except AdmissionRejectedError:
+        raise AppError(429, "Too many requests queued for inference") from None
+    except DeadlineExceededError:
+        raise AppError(503, "Request deadline exceeded") from None
+
+
+async def _run_batch(
+    batch_fn: BatchFn, images: list[bytes], hints: Sequence[list[FaceHint] | None] | None = None
+) -> list[list[DetectedFace]]:
+    async with admitted():
+        if hints is None:
+            return await asyncio.to_thread(batch_fn, images)
+        return await asyncio.to_thread(batch_fn, images, hints=hints)
+
+
+# Opt-in micro-batching of single-image requests (FACE_COALESCE_WINDOW_MS > 0):
+# concurrent /detect, /embed, /analyze calls with the same options share one
+# *_batch provider call — and one admission slot — instead of each running
+# at batch size 1.
+_coalescer = (
+    RequestCoalescer(
+        _run_batch,
+        window_s=settings.face_coalesce_window_ms / 1000,
+        max_images=settings.face_coalesce_max_images,
+    )
+    if settings.face_coalesce_window_ms > 0
+    else None
+)
+
+
+# Opt-in cache of per-image results (FACE_RESULT_CACHE_MB > 0): re-submitted
+# images are answered without an admission slot or a provider call. Entries
+# are keyed by image digest, the route's options key and the model config.
+_result_cache = (
+    ResultCache(settings.face_result_cache_mb * 2**20, ttl_s=settings.face_result_cache_ttl_s)
+    if settings.face_result_cache_mb > 0
+    else None
+)
+_MODEL_KEY = (
+    settings.face_provider,
+    settings.face_model_name,
+    settings.face_det_size,
+    settings.face_pad_fallback_border_px,
+    settings.face_pad_fallback_fill,
+)
+
+
+async def infer_single(
+    image_bytes: bytes,
+    single_fn: Callable[[bytes], list[DetectedFace]],
+    batch_fn: BatchFn,
+    key: Hashable,
+    hints: list[FaceHint] | None = None,
+) -> list[DetectedFace]:
+    """``hints`` may only be passed for a provider that ``supports_face_hints``."""
+    _image_megapixels(image_bytes)
+    if hints is not None:
+        # Supplied faces are part of the input: no coalescing or caching.
+        (hinted,) = await _run_batch(batch_fn, [image_bytes], [hints])
+        return hinted
+    cache = _result_cache
+    if cache is not None:
+        # Hashing one image is ~0.1 ms per 100 KB; not worth a thread hop.
+        image_digest = digest(image_bytes)
+        faces = cache.get((_MODEL_KEY, key), image_digest)
+        if faces is not None:
+            return faces
+    if _coalescer is not None:
+        try:
+            faces = await _coalescer.submit((current_priority.get(), key), batch_fn, image_bytes)
+        except DeadlineExceededError:
+            raise AppError(503, "Request deadline exceeded") from None
+    else:
+        async with admitted():
+            faces = await asyncio.to_thread(single_fn, image_bytes)
+    if cache is not None:
+        cache.put((_MODEL_KEY, key), image_digest, faces)
+    return faces
+
+
+def _image_megapixels(image_bytes: bytes) -> float:
+    """Decoded size from the header; AppError(400) past FACE_MAX_IMAGE_MEGAPIXELS.
+    Unrecognized formats count as 0 and are left to the decoder."""
+    mp = megapixels(image_bytes) or 0.0
+    limit = settings.face_max_image_megapixels
+    if limit > 0 and mp > limit:
+        raise AppError(400, f"Image is {mp:.1f} megapixels, over the limit of {limit:g}")
+    return mp
+
+
+def _sub_batches(sizes: Sequence[float], limit: float) -> list[tuple[int, int]]:
+    """Consecutive [start, stop) ranges whose ``sizes`` sum to at most
+    ``limit`` (an image over it on its own gets its own range)."""
+    if limit <= 0 or sum(sizes) <= limit:
+        return [(0, len(sizes))]
+    ranges: list[tuple[int, int]] = []
+    start, total = 0, 0.0
+    for i, size in enumerate(sizes):
+        if i > start and total + size > limit:
+            ranges.append((start, i))
+            start, total = i, 0.0
+        total += size
+    ranges.append((start, len(sizes)))
+    return ranges
+
+
+def _decode_base64(image_b64: str) -> bytes:
+    # pybase64 = SIMD (AVX2) decoder, ~5-8x the stdlib's scalar loop and it
+    # releases the GIL on large inputs; validate=True is its fastest path and
+    # keeps the same reject-invalid-input contract as base64.b64decode.
+    try:
+        return pybase64.b64decode(image_b64, validate=True)
+    except Exception:
+        raise AppError(400, "Invalid base64-encoded image")  # noqa: B904
+
+
+# image_path items (FACE_INGEST_ROOT set): read server-side from the shared
+# volume instead of arriving base64-encoded in the body.
+_ingestor = (
+    FileIngestor(settings.face_ingest_root, max_bytes=settings.face_ingest_max_mb * 2**20)
+    if settings.face_ingest_root
+    else None
+)
+
+
+def item_bytes(item: ImageRequest) -> bytes:
+    """The encoded image a JSON item carries, inline or by path. Blocking
+    (base64 decode or file read): call off the event loop for large images."""
+    if item._image is not None:
+        return item._image
+    if item.image_path is None:
+        assert item.image_b64 is not None
+        return _decode_base64(item.image_b64)
+    if _ingestor is None:
+        raise AppError(400, "image_path is disabled: FACE_INGEST_ROOT is not set")
+    try:
+        return _ingestor.read(item.image_path)
+    except IngestPathError as exc:
+        raise AppError(400, str(exc)) from None
+
+
+HINTS_UNSUPPORTED = "The configured face provider does not accept client-supplied faces"
+
+
+def supplied_faces(item: object) -> list[FaceHint] | None:
+    """Provider hints for an embed/analyze image that came with ``faces``."""
+    if not isinstance(item, HintedImageRequest) or item.faces is None:
+        return None
+    return [
+        FaceHint(
+            landmarks=[(p.x, p.y) for p in face.landmarks],
+            bbox=None
+            if face.bbox is None
+            else BoundingBox(face.bbox.x, face.bbox.y, face.bbox.width, face.bbox.height),
+        )
+        for face in item.faces
+    ]
+
+
+def operation_cache_key(options: OperationOptions) -> Hashable:
+    """The named route's result cache key for these options."""
+    if options.operation == "detect":
+        return ("detect", options.pose, options.pose_mode, options.fields)
+    return (options.operation, options.embedding_format, options.fields)
+
+
+def operation_batch_fn(provider: FaceProvider, options: OperationOptions) -> BatchFn:
+    if options.operation == "detect":
+        return functools.partial(
+            provider.detect_batch, include_pose=options.pose, pose_mode=options.pose_mode, fields=options.fields
+        )
+    if options.operation == "embed":
+        return functools.partial(provider.embed_batch, embedding_format=options.embedding_format, fields=options.fields)
+    return functools.partial(provider.analyze_batch, embedding_format=options.embedding_format, fields=options.fields)
+
+
+async def process_batch(
+    images: Sequence[ImageRequest | bytes],
+    batch_method: BatchFn,
+    cache_key: Hashable | None = None,
+    *,
+    face_hints: bool = False,
+    cache_fill: bool = True,
+) -> list[ImageResult]:
+    """Decode, then run the valid images through ``batch_method`` — one
+    provider call, or several consecutive ones if the batch is over
+    FACE_BATCH_MAX_MEGAPIXELS. With a ``cache_key`` (the route's options, as
+    for ``infer_single``) and the result cache on, only images it can't
+    answer are sent — each distinct image once; ``cache_fill=False`` looks
+    the images up without storing what the provider returns (bulk work that
+    would otherwise evict interactive entries). Images that came with
+    ``faces`` get a per-image error unless ``face_hints`` (the provider's
+    ``supports_face_hints``)."""
+    cache = _result_cache if cache_key is not None else None
+    namespace = (_MODEL_KEY, cache_key)
+    valid_indices: list[int] = []
+    valid_bytes: list[bytes] = []
+    valid_mp: list[float] = []
+    digests: list[bytes] = []
+    results: list[ImageResult] = [ImageResult([])] * len(images)
+
+    def _decode_all() -> None:
+        # base64 of a whole batch costs ~20+ ms — keep it off the event loop
+        # so concurrent requests aren't serialized behind it (b64decode
+        # releases the GIL). Same for image_path reads.
+        for idx, item in enumerate(images):
+            try:
+                if isinstance(item, bytes):
+                    if not item:
+                        raise AppError(400, "Empty image")
+                    image_bytes = item
+                else:
+                    image_bytes = item_bytes(item)
+                mp = _image_megapixels(image_bytes)
+                valid_indices.append(idx)
+                valid_bytes.append(image_bytes)
+                valid_mp.append(mp)
+                if cache is not None:
+                    digests.append(digest(image_bytes))
+            except AppError as exc:
+                results[idx] = ImageResult([], exc.detail)
+
+    await asyncio.to_thread(_decode_all)
+
+    # Provider inputs with their supplied faces, and the result indexes each
+    # one answers. Images with supplied faces bypass the cache.
+    run_bytes: list[bytes] = []
+    run_hints: list[list[FaceHint] | None] = []
+    run_mp: list[float] = []
+    run_digests: list[bytes | None] = []  # cache key digests (None: not cached)
+    owners: list[list[int]] = []
+    misses: dict[bytes, int] = {}  # digest -> position in run_bytes
+    for n, (idx, image_bytes) in enumerate(zip(valid_indices, valid_bytes, strict=True)):
+        image_digest = None
+        hints = supplied_faces(images[idx])
+        if hints is not None and not face_hints:
+            results[idx] = ImageResult([], HINTS_UNSUPPORTED)
+            continue
+        if cache is not None and hints is None:
+            image_digest = digests[n]
+            if image_digest in misses:
+                owners[misses[image_digest]].append(idx)
+                continue
+            cached = cache.get(namespace, image_digest)
+            if cached is not None:
+                results[idx] = ImageResult(cached)
+                continue
+            misses[image_digest] = len(run_bytes)
+        run_bytes.append(image_bytes)
+        run_hints.append(hints)
+        run_mp.append(valid_mp[n])
+        run_digests.append(image_digest)
+        owners.append([idx])
+
+    # Sub-batches run one after another, each with its own admission slot, so
+    # decoded frames of at most FACE_BATCH_MAX_MEGAPIXELS are alive at once.
+    for start, stop in _sub_batches(run_mp, settings.face_batch_max_megapixels) if run_bytes else ():
+        # Only embed/analyze items (HintedImageRequest) carry faces, so
+        # batch_method is an embed_batch/analyze_batch partial when any do.
+        sub_hints = run_hints[start:stop]
+        try:
+            all_faces = await _run_batch(
+                batch_method, run_bytes[start:stop], sub_hints if any(h is not None for h in sub_hints) else None
+            )
+        except (asyncio.CancelledError, AppError):
+            raise
+        except Exception as exc:
+            logger.exception("Batch processing failed")
+            error_message = str(exc) or "Processing failed"
+            for idxs in owners[start:stop]:
+                for idx in idxs:
+                    results[idx] = ImageResult([], error_message)
+            continue
+
+        for faces, idxs, image_digest in zip(all_faces, owners[start:stop], run_digests[start:stop], strict=True):
+            for idx in idxs:
+                results[idx] = ImageResult(faces)
+            if cache is not None and cache_fill and image_digest is not None:
+                cache.put(namespace, image_digest, faces)
+
+    return results
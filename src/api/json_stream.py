@@ -0,0 +1,197 @@
+"""Incremental parsing of JSON batch bodies.
+
+A 64-image batch of 4 MB photos is a ~350 MB JSON body. Parsed the usual way
+it is held three times over: the raw body, one ``image_b64`` str per image,
+and the decoded bytes. ``Base64Extractor`` is fed the body chunk by chunk as
+it comes off the socket and diverts every ``"image_b64"`` string value into
+an incremental base64 decoder, so only the decoded images and a small JSON
+"skeleton" — the body with each of those values emptied — are ever held.
+The skeleton then goes through the usual pydantic validation.
+
+Scanning is done with ``bytes.find`` (memchr), so the per-byte Python work is
+limited to the (small) skeleton outside the base64 strings.
+"""
+
+from collections.abc import Callable
+from enum import Enum, auto
+
+import pybase64
+
+# Skeleton value for an image_b64 string that failed to decode: not valid
+# base64 itself, so the usual per-image error is reported for it.
+INVALID_IMAGE = "*"
+
+_KEY = b"image_b64"
+# Decode pending base64 once this much has accumulated: large enough that the
+# per-call overhead vanishes, small enough to add little to peak memory.
+_DECODE_CHUNK = 1 << 18
+_WHITESPACE = b" \t\r\n"
+
+
+class BatchBudgetError(Exception):
+    pass
+
+
+class _Mode(Enum):
+    OUT = auto()
+    STRING = auto()
+    IMAGE = auto()
+
+
+class _KeyState(Enum):
+    NONE = auto()
+    KEY_CLOSED = auto()  # just closed a string equal to "image_b64"
+    VALUE_NEXT = auto()  # ...followed by ':' — the next string is an image
+
+
+class Base64Extractor:
+    """Feed body chunks; ``finish()`` returns the skeleton JSON and the decoded
+    images, in document order (``None`` for values that were not valid base64).
+    Raises BatchBudgetError as soon as the decoded images exceed ``max_bytes``,
+    or one of them ``max_image_bytes`` (0 = no limit).
+
+    With a ``sink``, each image is handed to it as soon as its string closes
+    instead of being kept, so at most one decoded image is ever held.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        *,
+        max_image_bytes: int = 0,
+        sink: Callable[[bytes | None], None] | None = None,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._max_image_bytes = max_image_bytes
+        self._sink = sink if sink is not None else self._keep
+        self._decoded_total = 0
+        self._skeleton = bytearray()
+        self._images: list[bytes | None] = []
+        self._mode = _Mode.OUT
+        self._key_state = _KeyState.NONE
+        self._escape = False
+        # Content of the string being scanned, up to len(_KEY) + 1 bytes —
+        # enough to tell whether it is the image_b64 key.
+        self._string = bytearray()
+        self._string_escaped = False
+        self._pending = bytearray()
+        self._image = bytearray()
+        self._image_invalid = False
+
+    def feed(self, chunk: bytes) -> None:
+        pos, end = 0, len(chunk)
+        while pos < end:
+            if self._escape:
+                self._escaped_byte(chunk[pos : pos + 1])
+                pos += 1
+            elif self._mode is _Mode.OUT:
+                pos = self._scan_out(chunk, pos)
+            else:
+                pos = self._scan_string(chunk, pos)
+
+    def finish(self) -> tuple[bytes, list[bytes | None]]:
+        # An unterminated image string leaves the skeleton unterminated too,
+        # which fails JSON validation.
+        return bytes(self._skeleton), self._images
+
+    def _keep(self, image: bytes | None) -> None:
+        self._images.append(image)
+
+    def _scan_out(self, chunk: bytes, pos: int) -> int:
+        quote = chunk.find(b'"', pos)
+        stop = len(chunk) if quote < 0 else quote
+        between = chunk[pos:stop]
+        self._skeleton += between
+        stripped = between.strip(_WHITESPACE)
+        if stripped:
+            if self._key_state is _KeyState.KEY_CLOSED and stripped == b":":
+                self._key_state = _KeyState.VALUE_NEXT
+            else:
+                self._key_state = _KeyState.NONE
+        if quote < 0:
+            return stop
+        self._skeleton += b'"'
+        if self._key_state is _KeyState.VALUE_NEXT:
+            self._mode = _Mode.IMAGE
+        else:
+            self._mode = _Mode.STRING
+            self._string.clear()
+            self._string_escaped = False
+        self._key_state = _KeyState.NONE
+        return quote + 1
+
+    def _scan_string(self, chunk: bytes, pos: int) -> int:
+        quote = chunk.find(b'"', pos)
+        stop = len(chunk) if quote < 0 else quote
+        backslash = chunk.find(b"\\", pos, stop)
+        if backslash >= 0:
+            stop = backslash
+        segment = chunk[pos:stop]
+        if self._mode is _Mode.IMAGE:
+            self._feed_image(segment)
+        else:
+            self._skeleton += segment
+            if len(self._string) <= len(_KEY):
+                self._string += segment[: len(_KEY) + 1 - len(self._string)]
+        if stop == len(chunk):
+            return stop
+        if backslash >= 0:
+            self._escape = True
+            return stop + 1
+        self._close_string()
+        return stop + 1
+
+    def _escaped_byte(self, byte: bytes) -> None:
+        self._escape = False
+        if self._mode is _Mode.IMAGE:
+            # JSON encoders may escape '/'; anything else is not base64.
+            if byte == b"/":
+                self._feed_image(byte)
+            else:
+                self._image_invalid = True
+        else:
+            self._skeleton += b"\\" + byte
+            self._string_escaped = True
+
+    def _close_string(self) -> None:
+        if self._mode is _Mode.IMAGE:
+            self._flush_image(final=True)
+            if self._image_invalid:
+                self._skeleton += INVALID_IMAGE.encode()
+                self._sink(None)
+            else:
+                self._sink(bytes(self._image))
+            self._image.clear()
+            self._image_invalid = False
+        elif self._string == _KEY and not self._string_escaped:
+            self._key_state = _KeyState.KEY_CLOSED
+        self._skeleton += b'"'
+        self._mode = _Mode.OUT
+
+    def _feed_image(self, segment: bytes) -> None:
+        if self._image_invalid:
+            return
+        self._pending += segment
+        if len(self._pending) >= _DECODE_CHUNK:
+            self._flush_image(final=False)
+
+    def _flush_image(self, *, final: bool) -> None:
+        if self._image_invalid:
+            self._pending.clear()
+            return
+        n = len(self._pending) if final else len(self._pending) // 4 * 4
+        try:
+            decoded = pybase64.b64decode(self._pending[:n], validate=True)
+        except Exception:
+            self._image_invalid = True
+            self._pending.clear()
+            return
+        del self._pending[:n]
+        self._image += decoded
+        self._decoded_total += len(decoded)
+        if self._decoded_total > self._max_bytes:
+            msg = f"Batch images exceed {self._max_bytes} bytes"
+            raise BatchBudgetError(msg)
+        if self._max_image_bytes and len(self._image) > self._max_image_bytes:
+            msg = f"Image exceeds {self._max_image_bytes} bytes"
+            raise BatchBudgetError(msg)
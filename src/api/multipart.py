@@ -0,0 +1,52 @@
+"""Size-bounded multipart parsing.
+
+``request.form()`` has Starlette spool the whole body — parts over 1 MB to
+temp files — before the caller can look at a single part, so a byte limit
+checked afterwards only runs once the disk has already taken the upload.
+``parse_multipart`` refuses a body over the limit before that: up front by
+its Content-Length, or, for a chunked body, as soon as that much has been
+read.
+"""
+
+from collections.abc import AsyncGenerator
+
+from fastapi import Request
+from starlette.datastructures import FormData
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from src.core.exceptions import AppError
+
+# Room in a multipart body for the part framing and text fields on top of the
+# image bytes themselves.
+_FRAMING_SLACK = 2**20
+
+
+class _BodyTooLargeError(MultiPartException):
+    pass
+
+
+async def parse_multipart(request: Request, *, max_files: int, max_bytes: int, message: str) -> FormData:
+    """The request's multipart form, or AppError 413 (with ``message``) once
+    the body passes ``max_bytes`` of images plus 1 MB of framing (0 = no
+    limit); 400 for a malformed body."""
+    max_body = max_bytes + _FRAMING_SLACK if max_bytes else 0
+    length = request.headers.get("content-length", "")
+    if max_body and length.isdigit() and int(length) > max_body:
+        raise AppError(413, message)
+
+    async def _counted() -> AsyncGenerator[bytes]:
+        total = 0
+        async for chunk in request.stream():
+            total += len(chunk)
+            if max_body and total > max_body:
+                raise _BodyTooLargeError(message)
+            yield chunk
+
+    # Raised inside the parser as a MultiPartException, so it closes the temp
+    # files spooled so far.
+    try:
+        return await MultiPartParser(request.headers, _counted(), max_files=max_files).parse()
+    except _BodyTooLargeError:
+        raise AppError(413, message) from None
+    except MultiPartException as exc:
+        raise AppError(400, exc.message) from None
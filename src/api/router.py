@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 
-from src.api.endpoints import faces, health
+from src.api.endpoints import faces, health, jobs
 
 router = APIRouter()
 router.include_router(health.router, tags=["health"])
 router.include_router(faces.router)
+router.include_router(jobs.router)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -12,6 +14,10 @@ class Settings(BaseSettings):
     log_level: str = "info"
     cors_origins: list[str] = ["*"]
     metrics_enabled: bool = True
+    # gRPC front end (src/rpc/face.proto) served next to the HTTP app on this
+    # port, for service-to-service callers: raw image bytes, packed float
+    # embeddings, one long-lived channel. 0 disables; needs the grpc extra.
+    grpc_port: int = 0
 
     # Face provider settings
     face_provider: str = "insightface"
@@ -21,6 +27,22 @@ class Settings(BaseSettings):
     face_model_name: str = "buffalo_l"
     face_model_dir: str = "~/.insightface"
     face_max_batch_size: int = 64
+    # Total size of the images in one batch request, in MB (after base64
+    # decoding). JSON batch bodies are parsed as they stream in, each image
+    # decoded straight off the socket, and rejected with 413 as soon as they
+    # pass this — so a request costs about this much memory, not 2-3x its
+    # body. Multipart batches count their parts the same way, and a multipart
+    # body past this (plus 1 MB of framing) is refused by its Content-Length,
+    # or as it is read, before it is spooled to temp files.
+    face_batch_max_mb: int = 512
+    # Decode cost follows pixels, not bytes: a 2 MB JPEG can be a 50 MP scan
+    # (150 MB decoded). Sizes are read from image headers (no decode). An
+    # image over face_max_image_megapixels is refused (400, or a per-image
+    # batch error) before it is decoded; a batch whose images sum past
+    # face_batch_max_megapixels is split into consecutive provider calls that
+    # each stay under it. 0 disables either limit.
+    face_max_image_megapixels: float = 100.0
+    face_batch_max_megapixels: float = 200.0
     face_use_tensorrt: bool = False
     face_trt_cache_path: str = "/models/trt_cache"
     # TensorRT optimization-profile bounds for dynamic-batch models (recognition,
@@ -47,17 +69,106 @@ class Settings(BaseSettings):
     face_det_uint8_input: bool = True
     face_det_trt_max_batch: int = 32
     face_det_trt_opt_batch: int = 8
+    # In-graph SCRFD decode (requires face_det_dynamic_batch): a sidecar graph
+    # (<det>.onnx.dets, rewritten at startup) appends anchor decoding, score
+    # thresholding, TopK and NMS to the detector, so a batched pass returns
+    # [N, max_dets, 15] detections instead of nine flat anchor maps (~17k rows
+    # per image at 640) — less device-to-host copy, no per-image CPU decode.
+    # Keeps at most face_det_graph_max_dets faces per image.
+    face_det_graph_decode: bool = False
+    face_det_graph_max_dets: int = 256
+    # Dynamic-batch 1k3d68 landmark graph (re-exported in place at startup,
+    # original kept as .onnx.bak), so pose=true costs one landmark pass per
+    # request chunk instead of one per face. Off restores the stock graph.
+    face_pose_dynamic_batch: bool = True
     # Size of the provider's persistent CPU worker pool (JPEG decode, letterbox,
     # crops). Decode scales near-linearly to ~16 threads on an idle host; keep
     # instances_per_host * face_thread_workers within the core budget.
     face_thread_workers: int = 8
     # Requests allowed inside the provider concurrently. GPU passes stay
-    # serialized by an internal lock, so >1 lets request N+1's CPU stages
-    # (decode, letterbox, crops, serialization) overlap request N's GPU time —
-    # the GPU is busy only ~25-30% of a request otherwise. 1 restores strictly
-    # serial behavior. The CvWorkPool is shared, so inflight does not multiply
-    # the thread budget.
+    # serialized by the provider's pass scheduler, so >1 lets request N+1's CPU
+    # stages (decode, letterbox, crops, serialization) overlap request N's GPU
+    # time — the GPU is busy only ~25-30% of a request otherwise — and chunks
+    # queued for the same model by different requests merge into one pass.
+    # 1 restores strictly serial behavior. The CvWorkPool is shared, so
+    # inflight does not multiply the thread budget.
     face_max_inflight: int = 3
+    # Model passes that may run at once across those requests. "per_model":
+    # each model stage (det, rec, genderage, landmark_3d_68) is its own lane
+    # with one pass at a time, so request A's recognition overlaps request B's
+    # detection — separate ORT sessions, and on CPU separate thread pools.
+    # "serial": one pass at a time across all models (keep it for a single
+    # small GPU or a tight core budget). Per-stage slots: "det=1,rec=2".
+    face_pass_concurrency: str = "per_model"
+    # CPU-only serving (ignored with face_use_gpu): K ORT session replicas
+    # per model, each with its own intra-op pool of face_cpu_replica_threads
+    # (0 = cores / K), and K concurrent passes per model stage — a pass runs
+    # on whichever replica is free. Overrides FACE_INTRA_OP_THREADS /
+    # FACE_INTER_OP_THREADS. Pair with face_max_inflight >= K. 1 = one
+    # session per model.
+    face_cpu_replicas: int = 1
+    face_cpu_replica_threads: int = 0
+    # Priority classes (X-Priority: interactive|bulk). Interactive requests are
+    # admitted ahead of queued bulk ones and may use this many slots beyond
+    # face_max_inflight, so bulk batches can't lock them out; inside the
+    # provider their chunks run ahead of queued bulk chunks.
+    face_interactive_reserve: int = 1
+    # Priority for requests that don't send X-Priority.
+    face_default_priority: Literal["interactive", "bulk"] = "interactive"
+    # Load shedding. Requests waiting for a provider slot beyond this many are
+    # rejected with 429 straight away instead of queueing without bound (0 =
+    # unbounded).
+    face_admission_max_queue: int = 64
+    # Deadline for requests without X-Request-Deadline-Ms, in ms from arrival
+    # (0 = none). A request past its deadline gets 503 while still queued, and
+    # the provider drops its remaining detector/recognition chunks rather than
+    # spending GPU time on a response nobody is waiting for.
+    face_default_deadline_ms: int = 0
+    # Micro-batching of concurrent single-image requests. >0 parks each
+    # /detect, /embed, /analyze image for up to this many ms so requests with
+    # the same options go through one *_batch call (filling the dynamic-batch
+    # detector/recognition passes) instead of N batch-size-1 calls. Adds at
+    # most the window to a lone request's latency; 0 disables.
+    face_coalesce_window_ms: float = 0.0
+    # A gathered batch is flushed early once it holds this many images.
+    face_coalesce_max_images: int = 16
+    # Content-addressed cache of per-image results, in MB (0 disables).
+    # Re-submitted images — the same avatar or ID photo checked again — are
+    # answered without decode, detection or recognition; batches send only the
+    # images it can't answer to the provider. Hits and misses are exported as
+    # face_result_cache_* metrics.
+    face_result_cache_mb: int = 0
+    # Cached results expire this long after they were computed.
+    face_result_cache_ttl_s: float = 300.0
+    # Provider-side cache of per-image detection output (decoded image,
+    # bboxes, keypoints, pad offsets), in MB (0 disables). A detect followed
+    # by embed/analyze on the same image skips decode and detection and only
+    # runs recognition/genderage. Entries hold the decoded image (~6 MB at
+    # 1080p), hence the separate budget and short TTL.
+    face_stage_cache_mb: int = 0
+    face_stage_cache_ttl_s: float = 30.0
+    # Asynchronous jobs (POST /jobs) for batches beyond face_max_batch_size.
+    # Uploads are spooled here and results written back as NDJSON chunks, so
+    # the directory needs room for the images plus their results.
+    face_job_spool_dir: str = "/tmp/face-jobs"
+    # Images per provider call for job chunks, and per result chunk.
+    face_job_chunk_size: int = 64
+    face_job_max_images: int = 100_000
+    # Byte limits for a job's images, in MB: per image, and for the whole job
+    # (also the cap on a raw archive body). Counted while each image is copied
+    # into the spool — archive members by their inflated size, so a zip bomb
+    # is cut off at the limit — and refused with 413 past either. 0 = no limit.
+    face_job_max_image_mb: int = 32
+    face_job_max_mb: int = 20_480
+    # Finished jobs (and their results) are deleted this long after finishing.
+    face_job_ttl_s: int = 86_400
+    # Server-side ingestion for co-located producers: JSON image items may
+    # give image_path (relative to, or absolute inside, this directory)
+    # instead of image_b64, and the file is read here — no base64 and no
+    # request body holding the image. Empty disables.
+    face_ingest_root: str = ""
+    # Larger files are rejected rather than read into memory.
+    face_ingest_max_mb: int = 64
     # Pad-to-square fallback for frame-filling faces missed by RetinaFace anchors.
     face_pad_fallback_border_px: int = 100
     face_pad_fallback_fill: int = 128
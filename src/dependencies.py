@@ -1,11 +1,38 @@
-from fastapi import Request
+import time
+from typing import Annotated
 
+from fastapi import Header
+from fastapi.requests import HTTPConnection
+
+from src.config import settings
 from src.core.exceptions import AppError
 from src.services.face_provider.base import FaceProvider
+from src.services.jobs import JobWorker
+from src.services.request_context import Priority, current_deadline, current_priority
 
 
-def get_face_provider(request: Request) -> FaceProvider:
+def get_face_provider(request: HTTPConnection) -> FaceProvider:
     provider: FaceProvider | None = getattr(request.app.state, "face_provider", None)
     if provider is None:
         raise AppError(503, "Face provider not initialized")
     return provider
+
+
+def get_job_worker(request: HTTPConnection) -> JobWorker:
+    worker: JobWorker | None = getattr(request.app.state, "job_worker", None)
+    if worker is None:
+        raise AppError(503, "Job worker not initialized")
+    return worker
+
+
+async def bind_request_context(
+    x_priority: Annotated[Priority | None, Header()] = None,
+    x_request_deadline_ms: Annotated[int | None, Header(gt=0)] = None,
+) -> None:
+    """Bind the request's priority class (``X-Priority: interactive|bulk``)
+    and deadline (``X-Request-Deadline-Ms``, a budget from arrival) for
+    admission and the provider's pass scheduler. Async on purpose: the context
+    vars must be set in the request's own task, not a threadpool."""
+    current_priority.set(x_priority or settings.face_default_priority)
+    budget_ms = x_request_deadline_ms or settings.face_default_deadline_ms
+    current_deadline.set(time.monotonic() + budget_ms / 1000 if budget_ms > 0 else None)
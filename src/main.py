@@ -1,15 +1,19 @@
+import functools
 import logging
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from pathlib import Path
 
 import structlog
 from fastapi import FastAPI
 
+from src.api.endpoints.jobs import run_job_chunk
 from src.api.router import router
 from src.config import settings
 from src.core.exceptions import register_exception_handlers
 from src.core.middleware import register_middleware
 from src.services.face_provider import create_provider
+from src.services.jobs import JobSpool, JobWorker
 
 logger = structlog.get_logger()
 
@@ -37,8 +41,24 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     provider = create_provider(settings)
     provider.load_model()
     app.state.face_provider = provider
+    job_worker = JobWorker(
+        JobSpool(Path(settings.face_job_spool_dir).expanduser()),
+        functools.partial(run_job_chunk, provider),
+        ttl_s=settings.face_job_ttl_s,
+    )
+    job_worker.start()
+    app.state.job_worker = job_worker
+    grpc_server = None
+    if settings.grpc_port > 0:
+        from src.rpc.server import start_grpc_server  # noqa: PLC0415
+
+        grpc_server, _ = await start_grpc_server(provider, settings.grpc_port)
     logger.info("startup", app_name=settings.app_name, face_provider=provider.provider_name)
     yield
+    if grpc_server is not None:
+        await grpc_server.stop(grace=5)
+    await job_worker.stop()
+    app.state.job_worker = None
     app.state.face_provider = None
     logger.info("shutdown", app_name=settings.app_name)
 
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: src/rpc/face.proto
+# Protobuf Python Version: 6.33.5
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    33,
+    5,
+    '',
+    'src/rpc/face.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12src/rpc/face.proto\x12\x07\x66\x61\x63\x65.v1\"R\n\rDetectRequest\x12\r\n\x05image\x18\x01 \x01(\x0c\x12\x0c\n\x04pose\x18\x02 \x01(\x08\x12$\n\tpose_mode\x18\x03 \x01(\x0e\x32\x11.face.v1.PoseMode\"\x1d\n\x0cImageRequest\x12\r\n\x05image\x18\x01 \x01(\x0c\"\x85\x01\n\rStreamRequest\x12\n\n\x02id\x18\x01 \x01(\x04\x12\r\n\x05image\x18\x02 \x01(\x0c\x12%\n\toperation\x18\x03 \x01(\x0e\x32\x12.face.v1.Operation\x12\x0c\n\x04pose\x18\x04 \x01(\x08\x12$\n\tpose_mode\x18\x05 \x01(\x0e\x32\x11.face.v1.PoseMode\"I\n\x0eStreamResponse\x12\n\n\x02id\x18\x01 \x01(\x04\x12\x1c\n\x05\x66\x61\x63\x65s\x18\x02 \x03(\x0b\x32\r.face.v1.Face\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"-\n\rFacesResponse\x12\x1c\n\x05\x66\x61\x63\x65s\x18\x01 \x03(\x0b\x32\r.face.v1.Face\"B\n\x0b\x42oundingBox\x12\t\n\x01x\x18\x01 \x01(\x02\x12\t\n\x01y\x18\x02 \x01(\x02\x12\r\n\x05width\x18\x03 \x01(\x02\x12\x0e\n\x06height\x18\x04 \x01(\x02\"0\n\x04Pose\x12\r\n\x05pitch\x18\x01 \x01(\x02\x12\x0b\n\x03yaw\x18\x02 \x01(\x02\x12\x0c\n\x04roll\x18\x03 \x01(\x02\"\xc8\x02\n\x04\x46\x61\x63\x65\x12\"\n\x04\x62\x62ox\x18\x01 \x01(\x0b\x32\x14.face.v1.BoundingBox\x12\x11\n\tdet_score\x18\x02 \x01(\x02\x12\x11\n\tlandmarks\x18\x03 \x03(\x02\x12 \n\x04pose\x18\x04 \x01(\x0b\x32\r.face.v1.PoseH\x00\x88\x01\x01\x12\x11\n\tembedding\x18\x05 \x03(\x02\x12\x10\n\x03\x61ge\x18\x06 \x01(\x02H\x01\x88\x01\x01\x12\x13\n\x06gender\x18\x07 \x01(\tH\x02\x88\x01\x01\x12\x11\n\x04race\x18\x08 \x01(\tH\x03\x88\x01\x01\x12\x30\n\nrace_probs\x18\t \x03(\x0b\x32\x1c.face.v1.Face.RaceProbsEntry\x1a\x30\n\x0eRaceProbsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x02:\x02\x38\x01\x42\x07\n\x05_poseB\x06\n\x04_ageB\t\n\x07_genderB\x07\n\x05_race*3\n\x08PoseMode\x12\x13\n\x0fPOSE_MODE_MODEL\x10\x00\x12\x12\n\x0ePOSE_MODE_FAST\x10\x01*M\n\tOperation\x12\x14\n\x10OPERATION_DETECT\x10\x00\x12\x13\n\x0fOPERATION_EMBED\x10\x01\x12\x15\n\x11OPERATION_ANALYZE\x10\x02\x32\xf8\x01\n\x0b\x46\x61\x63\x65Service\x12\x38\n\x06\x44\x65tect\x12\x16.face.v1.DetectRequest\x1a\x16.face.v1.FacesResponse\x12\x36\n\x05\x45mbed\x12\x15.face.v1.ImageRequest\x1a\x16.face.v1.FacesResponse\x12\x38\n\x07\x41nalyze\x12\x15.face.v1.ImageRequest\x1a\x16.face.v1.FacesResponse\x12=\n\x06Stream\x12\x16.face.v1.StreamRequest\x1a\x17.face.v1.StreamResponse(\x01\x30\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'src.rpc.face_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_FACE_RACEPROBSENTRY']._loaded_options = None
+  _globals['_FACE_RACEPROBSENTRY']._serialized_options = b'8\001'
+  _globals['_POSEMODE']._serialized_start=853
+  _globals['_POSEMODE']._serialized_end=904
+  _globals['_OPERATION']._serialized_start=906
+  _globals['_OPERATION']._serialized_end=983
+  _globals['_DETECTREQUEST']._serialized_start=31
+  _globals['_DETECTREQUEST']._serialized_end=113
+  _globals['_IMAGEREQUEST']._serialized_start=115
+  _globals['_IMAGEREQUEST']._serialized_end=144
+  _globals['_STREAMREQUEST']._serialized_start=147
+  _globals['_STREAMREQUEST']._serialized_end=280
+  _globals['_STREAMRESPONSE']._serialized_start=282
+  _globals['_STREAMRESPONSE']._serialized_end=355
+  _globals['_FACESRESPONSE']._serialized_start=357
+  _globals['_FACESRESPONSE']._serialized_end=402
+  _globals['_BOUNDINGBOX']._serialized_start=404
+  _globals['_BOUNDINGBOX']._serialized_end=470
+  _globals['_POSE']._serialized_start=472
+  _globals['_POSE']._serialized_end=520
+  _globals['_FACE']._serialized_start=523
+  _globals['_FACE']._serialized_end=851
+  _globals['_FACE_RACEPROBSENTRY']._serialized_start=766
+  _globals['_FACE_RACEPROBSENTRY']._serialized_end=814
+  _globals['_FACESERVICE']._serialized_start=986
+  _globals['_FACESERVICE']._serialized_end=1234
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,121 @@
+from google.protobuf.internal import containers as _containers
+from google.protobuf.internal import enum_type_wrapper as _enum_type_wrapper
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from collections.abc import Iterable as _Iterable, Mapping as _Mapping
+from typing import ClassVar as _ClassVar, Optional as _Optional, Union as _Union
+
+DESCRIPTOR: _descriptor.FileDescriptor
+
+class PoseMode(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    POSE_MODE_MODEL: _ClassVar[PoseMode]
+    POSE_MODE_FAST: _ClassVar[PoseMode]
+
+class Operation(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    OPERATION_DETECT: _ClassVar[Operation]
+    OPERATION_EMBED: _ClassVar[Operation]
+    OPERATION_ANALYZE: _ClassVar[Operation]
+POSE_MODE_MODEL: PoseMode
+POSE_MODE_FAST: PoseMode
+OPERATION_DETECT: Operation
+OPERATION_EMBED: Operation
+OPERATION_ANALYZE: Operation
+
+class DetectRequest(_message.Message):
+    __slots__ = ("image", "pose", "pose_mode")
+    IMAGE_FIELD_NUMBER: _ClassVar[int]
+    POSE_FIELD_NUMBER: _ClassVar[int]
+    POSE_MODE_FIELD_NUMBER: _ClassVar[int]
+    image: bytes
+    pose: bool
+    pose_mode: PoseMode
+    def __init__(self, image: _Optional[bytes] = ..., pose: _Optional[bool] = ..., pose_mode: _Optional[_Union[PoseMode, str]] = ...) -> None: ...
+
+class ImageRequest(_message.Message):
+    __slots__ = ("image",)
+    IMAGE_FIELD_NUMBER: _ClassVar[int]
+    image: bytes
+    def __init__(self, image: _Optional[bytes] = ...) -> None: ...
+
+class StreamRequest(_message.Message):
+    __slots__ = ("id", "image", "operation", "pose", "pose_mode")
+    ID_FIELD_NUMBER: _ClassVar[int]
+    IMAGE_FIELD_NUMBER: _ClassVar[int]
+    OPERATION_FIELD_NUMBER: _ClassVar[int]
+    POSE_FIELD_NUMBER: _ClassVar[int]
+    POSE_MODE_FIELD_NUMBER: _ClassVar[int]
+    id: int
+    image: bytes
+    operation: Operation
+    pose: bool
+    pose_mode: PoseMode
+    def __init__(self, id: _Optional[int] = ..., image: _Optional[bytes] = ..., operation: _Optional[_Union[Operation, str]] = ..., pose: _Optional[bool] = ..., pose_mode: _Optional[_Union[PoseMode, str]] = ...) -> None: ...
+
+class StreamResponse(_message.Message):
+    __slots__ = ("id", "faces", "error")
+    ID_FIELD_NUMBER: _ClassVar[int]
+    FACES_FIELD_NUMBER: _ClassVar[int]
+    ERROR_FIELD_NUMBER: _ClassVar[int]
+    id: int
+    faces: _containers.RepeatedCompositeFieldContainer[Face]
+    error: str
+    def __init__(self, id: _Optional[int] = ..., faces: _Optional[_Iterable[_Union[Face, _Mapping]]] = ..., error: _Optional[str] = ...) -> None: ...
+
+class FacesResponse(_message.Message):
+    __slots__ = ("faces",)
+    FACES_FIELD_NUMBER: _ClassVar[int]
+    faces: _containers.RepeatedCompositeFieldContainer[Face]
+    def __init__(self, faces: _Optional[_Iterable[_Union[Face, _Mapping]]] = ...) -> None: ...
+
+class BoundingBox(_message.Message):
+    __slots__ = ("x", "y", "width", "height")
+    X_FIELD_NUMBER: _ClassVar[int]
+    Y_FIELD_NUMBER: _ClassVar[int]
+    WIDTH_FIELD_NUMBER: _ClassVar[int]
+    HEIGHT_FIELD_NUMBER: _ClassVar[int]
+    x: float
+    y: float
+    width: float
+    height: float
+    def __init__(self, x: _Optional[float] = ..., y: _Optional[float] = ..., width: _Optional[float] = ..., height: _Optional[float] = ...) -> None: ...
+
+class Pose(_message.Message):
+    __slots__ = ("pitch", "yaw", "roll")
+    PITCH_FIELD_NUMBER: _ClassVar[int]
+    YAW_FIELD_NUMBER: _ClassVar[int]
+    ROLL_FIELD_NUMBER: _ClassVar[int]
+    pitch: float
+    yaw: float
+    roll: float
+    def __init__(self, pitch: _Optional[float] = ..., yaw: _Optional[float] = ..., roll: _Optional[float] = ...) -> None: ...
+
+class Face(_message.Message):
+    __slots__ = ("bbox", "det_score", "landmarks", "pose", "embedding", "age", "gender", "race", "race_probs")
+    class RaceProbsEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: float
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[float] = ...) -> None: ...
+    BBOX_FIELD_NUMBER: _ClassVar[int]
+    DET_SCORE_FIELD_NUMBER: _ClassVar[int]
+    LANDMARKS_FIELD_NUMBER: _ClassVar[int]
+    POSE_FIELD_NUMBER: _ClassVar[int]
+    EMBEDDING_FIELD_NUMBER: _ClassVar[int]
+    AGE_FIELD_NUMBER: _ClassVar[int]
+    GENDER_FIELD_NUMBER: _ClassVar[int]
+    RACE_FIELD_NUMBER: _ClassVar[int]
+    RACE_PROBS_FIELD_NUMBER: _ClassVar[int]
+    bbox: BoundingBox
+    det_score: float
+    landmarks: _containers.RepeatedScalarFieldContainer[float]
+    pose: Pose
+    embedding: _containers.RepeatedScalarFieldContainer[float]
+    age: float
+    gender: str
+    race: str
+    race_probs: _containers.ScalarMap[str, float]
+    def __init__(self, bbox: _Optional[_Union[BoundingBox, _Mapping]] = ..., det_score: _Optional[float] = ..., landmarks: _Optional[_Iterable[float]] = ..., pose: _Optional[_Union[Pose, _Mapping]] = ..., embedding: _Optional[_Iterable[float]] = ..., age: _Optional[float] = ..., gender: _Optional[str] = ..., race: _Optional[str] = ..., race_probs: _Optional[_Mapping[str, float]] = ...) -> None: ...
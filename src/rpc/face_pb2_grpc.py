@@ -0,0 +1,228 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from src.rpc import face_pb2 as src_dot_rpc_dot_face__pb2
+
+GRPC_GENERATED_VERSION = '1.81.1'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in src/rpc/face_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class FaceServiceStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Detect = channel.unary_unary(
+                '/face.v1.FaceService/Detect',
+                request_serializer=src_dot_rpc_dot_face__pb2.DetectRequest.SerializeToString,
+                response_deserializer=src_dot_rpc_dot_face__pb2.FacesResponse.FromString,
+                _registered_method=True)
+        self.Embed = channel.unary_unary(
+                '/face.v1.FaceService/Embed',
+                request_serializer=src_dot_rpc_dot_face__pb2.ImageRequest.SerializeToString,
+                response_deserializer=src_dot_rpc_dot_face__pb2.FacesResponse.FromString,
+                _registered_method=True)
+        self.Analyze = channel.unary_unary(
+                '/face.v1.FaceService/Analyze',
+                request_serializer=src_dot_rpc_dot_face__pb2.ImageRequest.SerializeToString,
+                response_deserializer=src_dot_rpc_dot_face__pb2.FacesResponse.FromString,
+                _registered_method=True)
+        self.Stream = channel.stream_stream(
+                '/face.v1.FaceService/Stream',
+                request_serializer=src_dot_rpc_dot_face__pb2.StreamRequest.SerializeToString,
+                response_deserializer=src_dot_rpc_dot_face__pb2.StreamResponse.FromString,
+                _registered_method=True)
+
+
+class FaceServiceServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def Detect(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Embed(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Analyze(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Stream(self, request_iterator, context):
+        """Long-lived channel for high-rate callers: images are fed to the
+        provider's batch methods as they arrive, one result per request, in order.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_FaceServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Detect': grpc.unary_unary_rpc_method_handler(
+                    servicer.Detect,
+                    request_deserializer=src_dot_rpc_dot_face__pb2.DetectRequest.FromString,
+                    response_serializer=src_dot_rpc_dot_face__pb2.FacesResponse.SerializeToString,
+            ),
+            'Embed': grpc.unary_unary_rpc_method_handler(
+                    servicer.Embed,
+                    request_deserializer=src_dot_rpc_dot_face__pb2.ImageRequest.FromString,
+                    response_serializer=src_dot_rpc_dot_face__pb2.FacesResponse.SerializeToString,
+            ),
+            'Analyze': grpc.unary_unary_rpc_method_handler(
+                    servicer.Analyze,
+                    request_deserializer=src_dot_rpc_dot_face__pb2.ImageRequest.FromString,
+                    response_serializer=src_dot_rpc_dot_face__pb2.FacesResponse.SerializeToString,
+            ),
+            'Stream': grpc.stream_stream_rpc_method_handler(
+                    servicer.Stream,
+                    request_deserializer=src_dot_rpc_dot_face__pb2.StreamRequest.FromString,
+                    response_serializer=src_dot_rpc_dot_face__pb2.StreamResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'face.v1.FaceService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('face.v1.FaceService', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class FaceService:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def Detect(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/face.v1.FaceService/Detect',
+            src_dot_rpc_dot_face__pb2.DetectRequest.SerializeToString,
+            src_dot_rpc_dot_face__pb2.FacesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Embed(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/face.v1.FaceService/Embed',
+            src_dot_rpc_dot_face__pb2.ImageRequest.SerializeToString,
+            src_dot_rpc_dot_face__pb2.FacesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Analyze(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/face.v1.FaceService/Analyze',
+            src_dot_rpc_dot_face__pb2.ImageRequest.SerializeToString,
+            src_dot_rpc_dot_face__pb2.FacesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Stream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/face.v1.FaceService/Stream',
+            src_dot_rpc_dot_face__pb2.StreamRequest.SerializeToString,
+            src_dot_rpc_dot_face__pb2.StreamResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,198 @@
+"""gRPC front end (``src/rpc/face.proto``), served next to the HTTP app.
+
+Requests take the same path as the /faces routes — admission, priority and
+deadline, coalescing of single images — minus the HTTP/JSON layer: images are
+raw ``bytes`` and embeddings packed ``repeated float``. Needs the ``grpc``
+extra; only imported when GRPC_PORT is set.
+"""
+
+import asyncio
+import contextlib
+import functools
+import time
+from collections.abc import AsyncIterator, Callable
+from typing import TYPE_CHECKING, get_args
+
+import grpc
+import structlog
+
+from src.api.inference import infer_single, process_batch
+from src.config import settings
+from src.core.exceptions import AppError
+from src.rpc import face_pb2, face_pb2_grpc
+from src.services.request_context import Priority, current_deadline, current_priority
+
+if TYPE_CHECKING:
+    from src.services.coalescer import BatchFn
+    from src.services.face_provider.base import DetectedFace, FaceProvider, PoseMode
+
+logger = structlog.get_logger()
+
+UnaryContext = grpc.aio.ServicerContext[object, face_pb2.FacesResponse]
+StreamContext = grpc.aio.ServicerContext[face_pb2.StreamRequest, face_pb2.StreamResponse]
+
+_POSE_MODES: dict[int, "PoseMode"] = {face_pb2.POSE_MODE_MODEL: "model", face_pb2.POSE_MODE_FAST: "fast"}
+
+_STATUS_CODES = {
+    400: grpc.StatusCode.INVALID_ARGUMENT,
+    429: grpc.StatusCode.RESOURCE_EXHAUSTED,
+    503: grpc.StatusCode.UNAVAILABLE,
+}
+
+
+def _to_proto(face: "DetectedFace") -> face_pb2.Face:
+    bbox = face.bbox
+    msg = face_pb2.Face(
+        bbox=face_pb2.BoundingBox(x=bbox.x, y=bbox.y, width=bbox.width, height=bbox.height),
+        det_score=face.det_score,
+        embedding=face.embedding,
+        age=face.age,
+        gender=face.gender,
+        race=face.race,
+        race_probs=face.race_probs,
+    )
+    if face.landmarks is not None:
+        msg.landmarks.extend(c for point in face.landmarks for c in point)
+    if face.pose is not None:
+        msg.pose.CopyFrom(face_pb2.Pose(pitch=face.pose.pitch, yaw=face.pose.yaw, roll=face.pose.roll))
+    return msg
+
+
+def _bind_request_context(context: UnaryContext | StreamContext) -> None:
+    """The gRPC counterpart of ``bind_request_context``: priority from the
+    ``x-priority`` metadata key, deadline from the call's own deadline."""
+    metadata = dict(context.invocation_metadata() or ())
+    priority = metadata.get("x-priority")
+    current_priority.set(
+        priority if priority in get_args(Priority) else settings.face_default_priority  # type: ignore[arg-type]
+    )
+    remaining = context.time_remaining()
+    if remaining is None and settings.face_default_deadline_ms > 0:
+        remaining = settings.face_default_deadline_ms / 1000
+    current_deadline.set(None if remaining is None else time.monotonic() + remaining)
+
+
+class FaceServicer(face_pb2_grpc.FaceServiceServicer):
+    def __init__(self, provider: "FaceProvider") -> None:
+        self._provider = provider
+
+    def _batch_fn(self, operation: int, pose: bool, pose_mode: int) -> "BatchFn":
+        if operation == face_pb2.OPERATION_DETECT:
+            return functools.partial(
+                self._provider.detect_batch, include_pose=pose, pose_mode=_POSE_MODES.get(pose_mode, "model")
+            )
+        if operation == face_pb2.OPERATION_EMBED:
+            return self._provider.embed_batch
+        return self._provider.analyze_batch
+
+    async def _unary(
+        self,
+        image: bytes,
+        single_fn: Callable[[bytes], list["DetectedFace"]],
+        batch_fn: "BatchFn",
+        key: tuple[str, bool, "PoseMode"],
+        context: UnaryContext,
+    ) -> face_pb2.FacesResponse:
+        _bind_request_context(context)
+        if not image:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Empty image")
+        try:
+            faces = await infer_single(image, single_fn, batch_fn, key)
+        except AppError as exc:
+            await context.abort(_STATUS_CODES.get(exc.status_code, grpc.StatusCode.INTERNAL), exc.detail)
+        return face_pb2.FacesResponse(faces=[_to_proto(f) for f in faces])
+
+    async def Detect(  # noqa: N802
+        self, request: face_pb2.DetectRequest, context: UnaryContext
+    ) -> face_pb2.FacesResponse:
+        provider = self._provider
+        pose_mode = _POSE_MODES.get(request.pose_mode, "model")
+        return await self._unary(
+            request.image,
+            functools.partial(provider.detect, include_pose=request.pose, pose_mode=pose_mode),
+            functools.partial(provider.detect_batch, include_pose=request.pose, pose_mode=pose_mode),
+            ("detect", request.pose, pose_mode),
+            context,
+        )
+
+    async def Embed(  # noqa: N802
+        self, request: face_pb2.ImageRequest, context: UnaryContext
+    ) -> face_pb2.FacesResponse:
+        return await self._unary(
+            request.image, self._provider.embed, self._provider.embed_batch, ("embed", False, "model"), context
+        )
+
+    async def Analyze(  # noqa: N802
+        self, request: face_pb2.ImageRequest, context: UnaryContext
+    ) -> face_pb2.FacesResponse:
+        return await self._unary(
+            request.image, self._provider.analyze, self._provider.analyze_batch, ("analyze", False, "model"), context
+        )
+
+    async def Stream(  # noqa: N802
+        self, request_iterator: AsyncIterator[face_pb2.StreamRequest], context: StreamContext
+    ) -> AsyncIterator[face_pb2.StreamResponse]:
+        """Requests are read ahead while a batch runs; each batch takes every
+        request queued since, up to FACE_MAX_BATCH_SIZE with the same operation
+        and options, so a busy stream fills the batched passes and a quiet one
+        runs each image as soon as it arrives. The bounded read-ahead queue
+        pushes back on the caller through HTTP/2 flow control."""
+        max_batch = max(1, settings.face_max_batch_size)
+        pending: asyncio.Queue[face_pb2.StreamRequest | None] = asyncio.Queue(maxsize=2 * max_batch)
+
+        async def _read() -> None:
+            async for request in request_iterator:
+                await pending.put(request)
+            await pending.put(None)
+
+        reader = asyncio.create_task(_read())
+        carry: face_pb2.StreamRequest | None = None
+        try:
+            while True:
+                head = carry or await pending.get()
+                if head is None:
+                    break
+                batch, carry, ended = [head], None, False
+                while len(batch) < max_batch and not pending.empty():
+                    item = pending.get_nowait()
+                    if item is None:
+                        ended = True
+                        break
+                    if (item.operation, item.pose, item.pose_mode) != (head.operation, head.pose, head.pose_mode):
+                        carry = item
+                        break
+                    batch.append(item)
+                # Bound per batch: the stream lives much longer than any
+                # request budget, so FACE_DEFAULT_DEADLINE_MS starts afresh
+                # for each batch (a call deadline still bounds the whole call).
+                _bind_request_context(context)
+                for response in await self._run_stream_batch(batch):
+                    yield response
+                if ended:
+                    break
+        finally:
+            reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await reader
+
+    async def _run_stream_batch(self, batch: list[face_pb2.StreamRequest]) -> list[face_pb2.StreamResponse]:
+        batch_fn = self._batch_fn(batch[0].operation, batch[0].pose, batch[0].pose_mode)
+        try:
+            results = await process_batch([r.image for r in batch], batch_fn)
+        except AppError as exc:
+            return [face_pb2.StreamResponse(id=r.id, error=exc.detail) for r in batch]
+        return [
+            face_pb2.StreamResponse(id=r.id, faces=[_to_proto(f) for f in result.faces], error=result.error or "")
+            for r, result in zip(batch, results, strict=True)
+        ]
+
+
+async def start_grpc_server(provider: "FaceProvider", port: int) -> tuple[grpc.aio.Server, int]:
+    """Start serving on ``port`` (0 = any free port); returns the server and
+    the port it bound."""
+    server = grpc.aio.server()
+    face_pb2_grpc.add_FaceServiceServicer_to_server(FaceServicer(provider), server)  # type: ignore[no-untyped-call]
+    bound = server.add_insecure_port(f"{settings.host}:{port}")
+    await server.start()
+    logger.info("grpc_started", port=bound)
+    return server, bound
@@ -1,22 +1,15 @@
-from pydantic import BaseModel
+from typing import Annotated, Any, Literal, Self
 
-# --- Request schemas ---
-
-
-class ImageRequest(BaseModel):
-    image_b64: str
+from pydantic import BaseModel, BeforeValidator, Field, PrivateAttr, model_validator
 
-
-class BatchRequest(BaseModel):
-    images: list[ImageRequest]
+from src.services.face_provider.base import EmbeddingFormat, FaceFields, PoseMode
 
 
-class DetectRequest(ImageRequest):
-    pose: bool = False
-
-
-class DetectBatchRequest(BatchRequest):
-    pose: bool = False
+def _split_fields(value: Any) -> Any:
+    # Query strings and multipart fields carry ``fields=bbox,embedding``.
+    if isinstance(value, str):
+        return [name.strip() for name in value.split(",") if name.strip()]
+    return value
 
 
 # --- Shared schemas ---
@@ -40,6 +33,134 @@ class PoseSchema(BaseModel):
     roll: float
 
 
+# --- Request schemas ---
+
+# Options are split from the image payload so raw-body uploads
+# (application/octet-stream, multipart/form-data) can take the same options
+# from the query string.
+
+
+class ImageOptions(BaseModel):
+    pass
+
+
+class ImageRequest(ImageOptions):
+    # Exactly one: the encoded image in base64, or — with FACE_INGEST_ROOT
+    # set — the path of the image file under that root, read server-side.
+    image_b64: str | None = None
+    image_path: str | None = None
+    # The image_b64 value, already decoded by the streaming batch parser
+    # (which leaves image_b64 itself empty).
+    _image: bytes | None = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _one_source(self) -> Self:
+        if (self.image_b64 is None) == (self.image_path is None):
+            msg = "Provide exactly one of image_b64 or image_path"
+            raise ValueError(msg)
+        return self
+
+
+class BatchOptions(ImageOptions):
+    # Respond with application/x-ndjson: one *BatchResultItem line per image,
+    # flushed as soon as the provider chunk containing it is done.
+    stream: bool = False
+
+
+class BatchRequest(BatchOptions):
+    images: list[ImageRequest]
+
+
+class ProjectionOptions(ImageOptions):
+    # Per-face outputs to return (e.g. "bbox,embedding"); omitted = all. The
+    # provider skips the work behind the rest — landmarks, pose, recognition,
+    # demographics — and they are left out of the response.
+    fields: Annotated[FaceFields | None, BeforeValidator(_split_fields)] = None
+
+
+class DetectOptions(ProjectionOptions):
+    pose: bool = False
+    # "fast": pose from the 5 detector keypoints, no 3D landmark model pass.
+    pose_mode: PoseMode = "model"
+
+
+class DetectRequest(ImageRequest, DetectOptions):
+    pass
+
+
+class DetectBatchOptions(DetectOptions, BatchOptions):
+    pass
+
+
+class DetectBatchRequest(BatchRequest, DetectBatchOptions):
+    pass
+
+
+class EmbedOptions(ProjectionOptions):
+    embedding_format: EmbeddingFormat = "float_list"
+
+
+class FaceHintSchema(BaseModel):
+    # The 5 SCRFD/ArcFace points: left eye, right eye, nose, left and right
+    # mouth corner, in image pixels.
+    landmarks: list[LandmarkPoint] = Field(min_length=5, max_length=5)
+    # Estimated from the landmarks when omitted.
+    bbox: BoundingBoxSchema | None = None
+
+
+class HintedImageRequest(ImageRequest):
+    # Faces already located by the caller (an upstream tracker, an earlier
+    # /faces/detect response): embed/analyze align these instead of running
+    # detection on the image. [] means no faces.
+    faces: list[FaceHintSchema] | None = None
+
+
+class EmbedRequest(HintedImageRequest, EmbedOptions):
+    pass
+
+
+class EmbedBatchOptions(EmbedOptions, BatchOptions):
+    pass
+
+
+class EmbedBatchRequest(BatchRequest, EmbedBatchOptions):
+    images: list[HintedImageRequest]  # type: ignore[assignment]
+
+
+class AnalyzeRequest(HintedImageRequest, EmbedOptions):
+    pass
+
+
+class AnalyzeBatchRequest(BatchRequest, EmbedBatchOptions):
+    images: list[HintedImageRequest]  # type: ignore[assignment]
+
+
+class AlignedEmbedOptions(ImageOptions):
+    embedding_format: EmbeddingFormat = "float_list"
+    # Channel order of a raw application/octet-stream tensor. Encoded crops
+    # (multipart, JSON) always decode to BGR.
+    channel_order: Literal["bgr", "rgb"] = "bgr"
+
+
+class AlignedEmbedRequest(AlignedEmbedOptions):
+    # Encoded (PNG/JPEG) crops, already aligned to the recognition template.
+    images: list[ImageRequest]
+
+
+# Routes that pick the operation per call (/jobs, /faces/stream): results are
+# the named batch route's *BatchResultItem.
+Operation = Literal["detect", "embed", "analyze"]
+
+
+class OperationOptions(DetectOptions, EmbedOptions):
+    operation: Operation = "detect"
+
+
+class FaceStreamOptions(OperationOptions):
+    # Frames queued beyond this while inference is busy drop the oldest.
+    max_pending: int = Field(default=4, ge=1, le=64)
+
+
 # --- Per-endpoint face schemas ---
 
 
@@ -51,7 +172,10 @@ class DetectFaceSchema(BaseModel):
 
 
 class EmbedFaceSchema(DetectFaceSchema):
-    embedding: list[float]
+    # float list, or a base64 string for the packed embedding_format values.
+    embedding: list[float] | str
+    # int8_b64 only: multiply the decoded int8 values by this to dequantize.
+    embedding_scale: float | None = Field(default=None, exclude_if=lambda v: v is None)
 
 
 class AnalyzeFaceSchema(EmbedFaceSchema):
@@ -116,3 +240,18 @@ class EmbedBatchResponse(BaseModel):
 class AnalyzeBatchResponse(BaseModel):
     results: list[AnalyzeBatchResultItem]
     total_faces: int
+
+
+# --- Aligned-crop responses ---
+
+
+class AlignedEmbeddingSchema(BaseModel):
+    # Position of the crop in the request.
+    index: int
+    embedding: list[float] | str
+    embedding_scale: float | None = Field(default=None, exclude_if=lambda v: v is None)
+
+
+class AlignedEmbedResponse(BaseModel):
+    embeddings: list[AlignedEmbeddingSchema]
+    count: int
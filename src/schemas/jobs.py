@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+
+from src.schemas.faces import ImageRequest, Operation, OperationOptions
+from src.services.jobs import JobStatus
+
+
+class JobOptions(OperationOptions):
+    operation: Operation = "embed"
+
+
+class JobRequest(JobOptions):
+    images: list[ImageRequest]
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+    operation: Operation
+    total_images: int
+    processed_images: int
+    total_faces: int
+    # Result chunks ready at GET /jobs/{job_id}/results/{n}, n < result_chunks;
+    # chunk n holds images [n * chunk_size, (n + 1) * chunk_size).
+    result_chunks: int
+    chunk_size: int
+    error: str | None = None
+    created_at: float
+    finished_at: float | None = None
@@ -0,0 +1,104 @@
+"""Priority-aware admission into the face provider.
+
+Replaces a plain ``asyncio.Semaphore``: waiters are granted in priority order
+(interactive before bulk, FIFO within a class), and interactive requests get
+``interactive_reserve`` extra slots so a full house of bulk batches can't keep
+them out of the provider — once inside, the pass scheduler runs their chunks
+ahead of queued bulk chunks.
+
+The wait is bounded twice: at most ``max_queue`` requests may wait at all
+(more are rejected immediately rather than timing out at the client), and a
+waiter gives up as soon as its request deadline passes.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from src.services.request_context import (
+    PRIORITY_RANK,
+    DeadlineExceededError,
+    Priority,
+    check_deadline,
+    current_priority,
+    remaining_s,
+)
+
+
+class AdmissionRejectedError(Exception):
+    """The admission queue is full."""
+
+
+class AdmissionController:
+    def __init__(self, max_inflight: int, *, interactive_reserve: int = 0, max_queue: int = 0) -> None:
+        self._max_inflight = max(1, max_inflight)
+        self._interactive_reserve = max(0, interactive_reserve)
+        self._max_queue = max_queue
+        self._inflight = 0
+        self._waiters: dict[Priority, deque[asyncio.Future[None]]] = {p: deque() for p in PRIORITY_RANK}
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def queued(self) -> int:
+        return sum(len(w) for w in self._waiters.values())
+
+    def _limit(self, priority: Priority) -> int:
+        if priority == "interactive":
+            return self._max_inflight + self._interactive_reserve
+        return self._max_inflight
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one provider slot for the current request's priority.
+
+        Raises AdmissionRejectedError when ``max_queue`` requests already wait,
+        DeadlineExceededError when the request's deadline passes first.
+        """
+        await self._acquire(current_priority.get())
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: Priority) -> None:
+        check_deadline()
+        if self._inflight < self._limit(priority) and not self._queued_ahead(priority):
+            self._inflight += 1
+            return
+        if self._max_queue > 0 and self.queued >= self._max_queue:
+            raise AdmissionRejectedError
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(future)
+        try:
+            async with asyncio.timeout(remaining_s()):
+                await future
+        except (asyncio.CancelledError, TimeoutError) as exc:
+            if future.done() and not future.cancelled():
+                self._release()  # granted just as we gave up
+            elif future in self._waiters[priority]:
+                self._waiters[priority].remove(future)
+            if isinstance(exc, TimeoutError):
+                raise DeadlineExceededError from None
+            raise
+
+    def _queued_ahead(self, priority: Priority) -> bool:
+        rank = PRIORITY_RANK[priority]
+        return any(self._waiters[p] for p, r in PRIORITY_RANK.items() if r <= rank)
+
+    def _release(self) -> None:
+        self._inflight -= 1
+        # Grants move the slot straight to the waiter, so nothing can sneak in
+        # between release and wake-up.
+        for priority in sorted(PRIORITY_RANK, key=PRIORITY_RANK.__getitem__):
+            waiters = self._waiters[priority]
+            while waiters and self._inflight < self._limit(priority):
+                future = waiters.popleft()
+                if not future.done():
+                    self._inflight += 1
+                    future.set_result(None)
+            if waiters:
+                return  # higher class still waiting: lower classes stay queued
@@ -0,0 +1,121 @@
+"""Micro-batching of concurrent single-image requests.
+
+Single-image routes otherwise run one provider call per request at batch size
+1, leaving the dynamic-batch detector/recognition passes under-filled. The
+coalescer parks each image for at most ``window_s``; images that arrive in the
+same window with the same key (route + options) go through one ``*_batch``
+call and each caller gets its own slice of the results back.
+
+Callers keep their own request deadlines: the gathered batch runs until the
+latest of them (unbounded if any caller has none), and each caller gives up
+on its own deadline while the batch serves the rest.
+"""
+
+import asyncio
+import contextvars
+import time
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from src.services.face_provider.base import DetectedFace, FaceHint
+from src.services.request_context import DeadlineExceededError, current_deadline
+
+
+class BatchFn(Protocol):
+    """A provider ``*_batch`` call with the route's options bound. ``hints``
+    (faces supplied per image) is only passed to embed/analyze batch calls,
+    and only when the provider ``supports_face_hints``."""
+
+    def __call__(
+        self, images: list[bytes], /, *, hints: Sequence[list[FaceHint] | None] | None = None
+    ) -> list[list[DetectedFace]]: ...
+
+
+BatchRunner = Callable[[BatchFn, list[bytes]], Awaitable[list[list[DetectedFace]]]]
+
+
+@dataclass(slots=True)
+class _PendingBatch:
+    batch_fn: BatchFn
+    images: list[bytes] = field(default_factory=list)
+    futures: list[asyncio.Future[list[DetectedFace]]] = field(default_factory=list)
+    deadlines: list[float | None] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+class RequestCoalescer:
+    """Gathers single-image calls into provider batches.
+
+    ``run`` executes one gathered batch (off the event loop, under whatever
+    admission the caller applies) and must return one face list per image.
+    A batch is flushed when it reaches ``max_images`` or when the window that
+    opened with its first image closes, whichever comes first.
+    """
+
+    def __init__(self, run: BatchRunner, *, window_s: float, max_images: int) -> None:
+        self._run = run
+        self._window_s = window_s
+        self._max_images = max(1, max_images)
+        self._pending: dict[Hashable, _PendingBatch] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(self, key: Hashable, batch_fn: BatchFn, image_bytes: bytes) -> list[DetectedFace]:
+        """Queue one image under ``key``. Callers sharing a key must pass
+        equivalent ``batch_fn``s — the first one in a window is used. Raises
+        DeadlineExceededError once this caller's own deadline passes."""
+        loop = asyncio.get_running_loop()
+        deadline = current_deadline.get()
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingBatch(batch_fn)
+            pending.timer = loop.call_later(self._window_s, self._flush, key)
+        future: asyncio.Future[list[DetectedFace]] = loop.create_future()
+        pending.images.append(image_bytes)
+        pending.futures.append(future)
+        pending.deadlines.append(deadline)
+        if len(pending.images) >= self._max_images:
+            self._flush(key)
+        if deadline is None:
+            return await future
+        try:
+            return await asyncio.wait_for(future, max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            raise DeadlineExceededError from None
+
+    def _flush(self, key: Hashable) -> None:
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+        # The batch runs in whichever caller's context flushed it; give it the
+        # deadline of the whole batch instead of that caller's own.
+        live = [d for d, fut in zip(pending.deadlines, pending.futures, strict=True) if not fut.done()]
+        context = contextvars.copy_context()
+        bounded = [d for d in live if d is not None]
+        context.run(current_deadline.set, max(bounded) if live and len(bounded) == len(live) else None)
+        # Keep a strong reference: the loop only holds tasks weakly.
+        task = asyncio.get_running_loop().create_task(self._execute(pending), context=context)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, pending: _PendingBatch) -> None:
+        # Callers cancelled while parked (client gone) don't cost a slot.
+        live = [i for i, fut in enumerate(pending.futures) if not fut.done()]
+        if not live:
+            return
+        try:
+            results = await self._run(pending.batch_fn, [pending.images[i] for i in live])
+        except asyncio.CancelledError:
+            for i in live:
+                pending.futures[i].cancel()
+            raise
+        except Exception as exc:
+            for i in live:
+                if not pending.futures[i].done():
+                    pending.futures[i].set_exception(exc)
+            return
+        for i, faces in zip(live, results, strict=True):
+            if not pending.futures[i].done():
+                pending.futures[i].set_result(faces)
@@ -1,4 +1,4 @@
-from src.services.face_provider.base import BoundingBox, DetectedFace, FaceProvider
+from src.services.face_provider.base import BoundingBox, DetectedFace, EmbeddingFormat, FaceProvider, PoseMode
 from src.services.face_provider.registry import create_provider
 
-__all__ = ["BoundingBox", "DetectedFace", "FaceProvider", "create_provider"]
+__all__ = ["BoundingBox", "DetectedFace", "EmbeddingFormat", "FaceProvider", "PoseMode", "create_provider"]
@@ -1,5 +1,35 @@
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Literal, get_args
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from src.services.face_provider.embedding_codec import EncodedEmbedding
+
+# Wire encodings for embeddings. float_list is a plain JSON float array; the
+# packed formats are little-endian float32 / float16 / int8 vectors (int8 with
+# a per-vector dequantization scale), base64-encoded in JSON responses.
+EmbeddingFormat = Literal["float_list", "f32_b64", "f16_b64", "int8_b64"]
+
+# How pose=true estimates head pose: "model" runs the 1k3d68 3D landmark model;
+# "fast" solves it from the 5 detector keypoints with no extra model pass —
+# coarse, but enough for frontal/non-frontal gating.
+PoseMode = Literal["model", "fast"]
+
+# Per-face outputs a caller can project to (``fields=``). ``None`` means all.
+# Providers skip the work behind unrequested outputs — landmark conversion,
+# pose estimation, recognition, genderage — and leave those attributes None;
+# bbox and det_score are always filled (they cost nothing extra).
+FaceField = Literal["bbox", "det_score", "landmarks", "pose", "embedding", "age", "gender", "race", "race_probs"]
+FaceFields = frozenset[FaceField]
+FACE_FIELDS: FaceFields = frozenset(get_args(FaceField))
+
+
+def wants(fields: FaceFields | None, *names: FaceField) -> bool:
+    """True if any of ``names`` is requested."""
+    return fields is None or not fields.isdisjoint(names)
 
 
 @dataclass(frozen=True, slots=True)
@@ -28,6 +58,19 @@ class DetectedFace:
     race_probs: dict[str, float] | None = field(default=None)
     landmarks: list[tuple[float, float]] | None = None
     pose: HeadPose | None = None
+    # Set instead of `embedding` when a packed EmbeddingFormat was requested.
+    embedding_packed: bytes | None = None
+    embedding_scale: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class FaceHint:
+    """A face the caller already located: embed/analyze align it from these
+    five landmarks (eyes, nose, mouth corners) instead of detecting faces."""
+
+    landmarks: list[tuple[float, float]]
+    # Estimated from the landmarks when None.
+    bbox: BoundingBox | None = None
 
 
 class FaceProvider(ABC):
@@ -37,22 +80,85 @@ class FaceProvider(ABC):
     def load_model(self) -> None: ...
 
     @abstractmethod
-    def detect(self, image_bytes: bytes, include_pose: bool = False) -> list[DetectedFace]: ...
+    def detect(
+        self,
+        image_bytes: bytes,
+        include_pose: bool = False,
+        fields: FaceFields | None = None,
+        pose_mode: PoseMode = "model",
+    ) -> list[DetectedFace]: ...
 
     @abstractmethod
-    def embed(self, image_bytes: bytes) -> list[DetectedFace]: ...
+    def embed(
+        self, image_bytes: bytes, embedding_format: EmbeddingFormat = "float_list", fields: FaceFields | None = None
+    ) -> list[DetectedFace]: ...
 
     @abstractmethod
-    def analyze(self, image_bytes: bytes) -> list[DetectedFace]: ...
+    def analyze(
+        self, image_bytes: bytes, embedding_format: EmbeddingFormat = "float_list", fields: FaceFields | None = None
+    ) -> list[DetectedFace]: ...
+
+    def detect_batch(
+        self,
+        images: list[bytes],
+        include_pose: bool = False,
+        fields: FaceFields | None = None,
+        pose_mode: PoseMode = "model",
+    ) -> list[list[DetectedFace]]:
+        return [self.detect(img, include_pose, fields, pose_mode) for img in images]
+
+    def embed_batch(
+        self,
+        images: list[bytes],
+        embedding_format: EmbeddingFormat = "float_list",
+        fields: FaceFields | None = None,
+        hints: Sequence[list[FaceHint] | None] | None = None,
+    ) -> list[list[DetectedFace]]:
+        """``hints``, per image: faces supplied by the caller, or None to detect."""
+        self._check_hints(hints)
+        return [self.embed(img, embedding_format, fields) for img in images]
+
+    def analyze_batch(
+        self,
+        images: list[bytes],
+        embedding_format: EmbeddingFormat = "float_list",
+        fields: FaceFields | None = None,
+        hints: Sequence[list[FaceHint] | None] | None = None,
+    ) -> list[list[DetectedFace]]:
+        self._check_hints(hints)
+        return [self.analyze(img, embedding_format, fields) for img in images]
 
-    def detect_batch(self, images: list[bytes], include_pose: bool = False) -> list[list[DetectedFace]]:
-        return [self.detect(img, include_pose) for img in images]
+    @property
+    def supports_face_hints(self) -> bool:
+        """Whether embed_batch/analyze_batch take ``hints``; callers check
+        this before passing any."""
+        return False
 
-    def embed_batch(self, images: list[bytes]) -> list[list[DetectedFace]]:
-        return [self.embed(img) for img in images]
+    def _check_hints(self, hints: Sequence[list[FaceHint] | None] | None) -> None:
+        if hints is not None and any(h is not None for h in hints):
+            msg = f"The {self.provider_name} provider does not accept client-supplied faces"
+            raise NotImplementedError(msg)
 
-    def analyze_batch(self, images: list[bytes]) -> list[list[DetectedFace]]:
-        return [self.analyze(img) for img in images]
+    @property
+    def aligned_crop_size(self) -> int:
+        """Side of the square face crops ``embed_aligned`` takes."""
+        return 112
+
+    def embed_aligned(
+        self, crops: "np.ndarray | Sequence[bytes]", embedding_format: EmbeddingFormat = "float_list"
+    ) -> list["EncodedEmbedding"]:
+        """Recognition only, for faces already detected and aligned (ArcFace
+        template) by the caller: an (N, S, S, 3) uint8 BGR tensor or N encoded
+        images, S = ``aligned_crop_size``. Raises ValueError for crops of the
+        wrong size or that fail to decode."""
+        msg = f"The {self.provider_name} provider does not embed aligned crops"
+        raise NotImplementedError(msg)
+
+    @property
+    def stream_chunk_size(self) -> int:
+        """Images per *_batch call when a batch is streamed back image by image.
+        Batching providers return the pass size their models are tuned for."""
+        return 1
 
     @property
     @abstractmethod
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from src.services.face_provider.base import EmbeddingFormat
+
+_PACKED_DTYPES: dict[str, str] = {"f32_b64": "<f4", "f16_b64": "<f2", "int8_b64": "i1"}
+
+
+class EncodedEmbedding(NamedTuple):
+    values: list[float] | None
+    packed: bytes | None
+    scale: float | None
+
+
+# Stand-in for faces whose embedding was not requested.
+NO_EMBEDDING = EncodedEmbedding(None, None, None)
+
+
+def encode_embeddings(embeddings: np.ndarray, embedding_format: EmbeddingFormat) -> list[EncodedEmbedding]:
+    """Encode an (N, D) matrix of embeddings row by row.
+
+    float_list converts the whole matrix with one ``tolist`` call. The packed
+    formats cast/quantize the matrix once and slice raw bytes per row, so no
+    per-float Python objects are created at all — 512 floats become 2 KB
+    (f32), 1 KB (f16) or 512 B (int8) instead of ~5 KB of JSON text.
+
+    int8 is symmetric per-vector quantization: ``scale = max|x| / 127`` and
+    ``x ≈ q * scale``. Normalized embeddings keep cosine similarity to ~1e-4.
+    """
+    if embedding_format == "float_list":
+        return [EncodedEmbedding(row, None, None) for row in embeddings.astype(np.float32).tolist()]
+    dtype = _PACKED_DTYPES[embedding_format]
+    if embedding_format == "int8_b64":
+        peak = np.abs(embeddings).max(axis=1, keepdims=True) if embeddings.size else np.zeros((0, 1))
+        scales = np.maximum(peak, 1e-12) / 127.0
+        packed = np.clip(np.rint(embeddings / scales), -127, 127).astype(dtype)
+        return [EncodedEmbedding(None, packed[i].tobytes(), float(scales[i, 0])) for i in range(packed.shape[0])]
+    packed = np.ascontiguousarray(embeddings, dtype=dtype)
+    return [EncodedEmbedding(None, packed[i].tobytes(), None) for i in range(packed.shape[0])]
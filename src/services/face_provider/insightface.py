@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-import threading
+import copy
+import functools
+import os
 from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING, Any
 
@@ -10,7 +12,22 @@ if TYPE_CHECKING:
 import cv2
 import numpy as np
 
-from src.services.face_provider.base import BoundingBox, DetectedFace, FaceProvider, HeadPose
+from src.services.face_provider.base import (
+    BoundingBox,
+    DetectedFace,
+    EmbeddingFormat,
+    FaceFields,
+    FaceHint,
+    FaceProvider,
+    HeadPose,
+    PoseMode,
+    wants,
+)
+from src.services.face_provider.embedding_codec import NO_EMBEDDING, EncodedEmbedding, encode_embeddings
+from src.services.face_provider.pass_scheduler import PassScheduler
+from src.services.face_provider.replica_pool import ReplicaPool
+from src.services.face_provider.stage_cache import StageCache
+from src.services.result_cache import digest
 
 
 class CvWorkPool:
@@ -39,6 +56,9 @@ class CvWorkPool:
         return list(self._pool.map(fn, items))
 
 
+# Pass scheduler stages, one per model session.
+_STAGES = ("det", "rec", "genderage", "landmark_3d_68")
+
 # Per-image detection state: (bboxes, kpss, working_img, dx, dy, orig_h, orig_w).
 _DetResult = tuple[np.ndarray, "np.ndarray | None", "np.ndarray | None", int, int, int, int]
 
@@ -55,8 +75,8 @@ def _trt_batch_profile(
 
     Matches models whose first input dim is a dynamic batch and whose remaining
     dims are static (recognition `Nx3x112x112`, genderage `Nx3x96x96`, and the
-    re-exported detector `Nx3x640x640` — see ``scrfd_export``). Returns ``{}``
-    for anything else.
+    re-exported detector `Nx3x640x640` and landmark model `Nx3x192x192` — see
+    ``scrfd_export`` / ``landmark_export``). Returns ``{}`` for anything else.
 
     The detector's inputs are ~30x larger than a recognition crop, so it gets
     its own batch bounds: an input whose static dims equal ``det_static_dims``
@@ -213,6 +233,77 @@ def _to_pose(raw: object) -> HeadPose | None:
     return HeadPose(pitch=float(arr[0]), yaw=float(arr[1]), roll=float(arr[2]))
 
 
+# pose_mode="fast" reference: the eye centers, nose tip and mouth corners (SCRFD
+# keypoint order) of insightface's 68-point mean shape (meanshape_68.pkl), so
+# fast poses share the 1k3d68 pose's axes and zero.
+_POSE_REF_5PT = np.array(
+    [
+        [-0.2735, -0.3172, 0.3119],
+        [0.2580, -0.3173, 0.3176],
+        [-0.0073, -0.1426, 0.5987],
+        [-0.2014, 0.2374, 0.3795],
+        [0.2182, 0.2390, 0.3757],
+    ],
+    dtype=np.float64,
+)
+_POSE_REF_5PT_PINV = np.linalg.pinv(np.hstack([_POSE_REF_5PT, np.ones((5, 1))]))
+
+
+def _angles_from_affine(fit: np.ndarray) -> np.ndarray:
+    """[pitch, yaw, roll] in degrees from per-face affine camera fits.
+
+    ``fit`` is (N, 4, C) with C >= 2: each face's least-squares P.T mapping
+    homogeneous reference points to image x, y (, z). Only the x and y rows of
+    P carry the rotation — insightface's P2sRt then matrix2angle, batched.
+    """
+    r1 = fit[:, :3, 0] / np.linalg.norm(fit[:, :3, 0], axis=1, keepdims=True)
+    r2 = fit[:, :3, 1] / np.linalg.norm(fit[:, :3, 1], axis=1, keepdims=True)
+    r3 = np.cross(r1, r2)
+
+    sy = np.hypot(r1[:, 0], r2[:, 0])
+    singular = sy < 1e-6
+    pitch = np.where(singular, np.arctan2(-r2[:, 2], r2[:, 1]), np.arctan2(r3[:, 1], r3[:, 2]))
+    yaw = np.arctan2(-r3[:, 0], sy)
+    roll = np.where(singular, 0.0, np.arctan2(r2[:, 0], r1[:, 0]))
+    angles: np.ndarray = np.degrees(np.stack([pitch, yaw, roll], axis=1))
+    return angles
+
+
+def _poses_from_keypoints(kpss: np.ndarray) -> np.ndarray:
+    """pose_mode="fast": (N, 5, 2) detector keypoints -> (N, 3) [pitch, yaw,
+    roll] degrees. A weak-perspective (affine camera) PnP against a fixed
+    5-point head model: the reference is shared by every face, so the
+    least-squares solve for the whole batch is one einsum with its
+    pseudo-inverse. With only the nose tip off the eye/mouth plane, pitch is
+    the least constrained axis."""
+    return _angles_from_affine(np.einsum("kj,njc->nkc", _POSE_REF_5PT_PINV, kpss.astype(np.float64)))
+
+
+def _poses_from_landmarks(preds: np.ndarray, mats: np.ndarray, mean_lmk: np.ndarray, size: int) -> np.ndarray:
+    """Vectorized Landmark.get pose for a batch of raw 1k3d68 outputs.
+
+    ``preds`` is (N, 3309) and ``mats`` the (N, 2, 3) crop affines; returns
+    (N, 3) [pitch, yaw, roll] in degrees. Per face this is insightface's
+    decode -> estimate_affine_matrix_3d23d -> P2sRt -> matrix2angle; the
+    least-squares fit is against the same 68-point mean shape for every face,
+    so its pseudo-inverse is shared and the whole batch is one einsum.
+    """
+    pts = preds.reshape(preds.shape[0], -1, 3)[:, -mean_lmk.shape[0] :, :].astype(np.float64)
+    half = size // 2
+    pts[:, :, :2] = (pts[:, :, :2] + 1) * half
+    pts[:, :, 2] *= half
+
+    # Back to image coordinates: xy through the inverse crop affine, z scaled
+    # by its scale (trans_points3d).
+    inv = np.linalg.inv(mats[:, :, :2])
+    offset = -np.einsum("nij,nj->ni", inv, mats[:, :, 2])
+    pts[:, :, :2] = np.einsum("nij,nkj->nki", inv, pts[:, :, :2]) + offset[:, None, :]
+    pts[:, :, 2] *= np.hypot(inv[:, 0, 0], inv[:, 0, 1])[:, None]
+
+    x_homo = np.hstack([mean_lmk, np.ones((mean_lmk.shape[0], 1))])
+    return _angles_from_affine(np.einsum("kj,njc->nkc", np.linalg.pinv(x_homo), pts))
+
+
 class InsightFaceProvider(FaceProvider):
     def __init__(
         self,
@@ -230,9 +321,17 @@ class InsightFaceProvider(FaceProvider):
         det_uint8_input: bool = True,
         det_trt_max_batch: int = 32,
         det_trt_opt_batch: int = 8,
+        det_graph_decode: bool = False,
+        det_graph_max_dets: int = 256,
+        pose_dynamic_batch: bool = True,
         thread_workers: int = 8,
         pad_fallback_border_px: int = 100,
         pad_fallback_fill: int = 128,
+        stage_cache_mb: int = 0,
+        stage_cache_ttl_s: float = 30.0,
+        stage_slots: dict[str, int] | None = None,
+        cpu_replicas: int = 1,
+        cpu_replica_threads: int = 0,
     ) -> None:
         self._use_gpu = use_gpu
         self._ctx_id = ctx_id
@@ -247,17 +346,38 @@ class InsightFaceProvider(FaceProvider):
         self._det_uint8_input = det_uint8_input
         self._det_trt_max_batch = det_trt_max_batch
         self._det_trt_opt_batch = det_trt_opt_batch
+        self._det_graph_decode = det_graph_decode
+        self._det_graph_max_dets = det_graph_max_dets
+        # Detector running the in-graph decode + NMS sidecar, set by
+        # load_model when det_graph_decode is on (see scrfd_export).
+        self._det_decode_model: Any = None
+        self._pose_dynamic_batch = pose_dynamic_batch
         self._pad_border_px = pad_fallback_border_px
         self._pad_fill = pad_fallback_fill
         self._cv_pool = CvWorkPool(thread_workers)
-        # Serializes GPU passes when FACE_MAX_INFLIGHT lets several requests
-        # run their CPU stages concurrently. Held only around session.run-style
-        # calls, per chunk, so requests interleave at chunk granularity.
+        # Bounds model passes when FACE_MAX_INFLIGHT lets several requests
+        # run concurrently — per model stage ("det", "rec", "genderage",
+        # "landmark_3d_68"), or across all of them with stage_slots=None — and
+        # merges the detector / recognition / genderage chunks that concurrent
+        # requests queue for the same model into one forward pass (bounded by
+        # the TRT profile max). ORT sessions are safe to run concurrently.
         # Everything else touched concurrently is safe: CvWorkPool is a
         # thread-safe executor, _det_center_cache worst-cases a duplicate
         # compute under the GIL, and all blobs/buffers are per-call locals.
-        self._gpu_lock = threading.Lock()
+        # CPU replica mode: K copies of every model session, so each stage
+        # lane runs K passes at once (explicit per-stage slots still win).
+        self._cpu_replicas = cpu_replicas if not use_gpu else 1
+        self._cpu_replica_threads = cpu_replica_threads or max(1, (os.cpu_count() or 1) // self._cpu_replicas)
+        self._replica_pools: dict[int, ReplicaPool[Any]] = {}
+        if self._cpu_replicas > 1:
+            stage_slots = {stage: self._cpu_replicas for stage in _STAGES} | (stage_slots or {})
+        self._passes = PassScheduler(stage_slots)
         self._det_center_cache: dict[int, np.ndarray] = {}
+        # Detection output by image digest, so detect -> embed -> analyze on
+        # the same image decodes and detects once (see stage_cache).
+        self._stage_cache: StageCache[_DetResult] | None = (
+            StageCache(stage_cache_mb * 2**20, ttl_s=stage_cache_ttl_s) if stage_cache_mb > 0 else None
+        )
         self._app: Any = None
 
     def load_model(self) -> None:
@@ -307,6 +427,10 @@ class InsightFaceProvider(FaceProvider):
                 except FileNotFoundError:
                     continue  # a concurrently restoring peer won the race
                 log.info("scrfd_dynamic_batch_restore", model=det_path)
+        # With the detector export off a fresh pack is only downloaded below,
+        # so its landmark graph converts on the next start; until then poses
+        # take the per-face path.
+        self._export_landmark_graphs(pack_dir, log)
 
         # Monkey-patch to inject SessionOptions into all insightface ORT sessions.
         # FaceAnalysis only forwards `providers` and `provider_options` to sessions,
@@ -334,6 +458,9 @@ class InsightFaceProvider(FaceProvider):
 
         _intra = int(_os.environ.get("FACE_INTRA_OP_THREADS", "0"))
         _inter = int(_os.environ.get("FACE_INTER_OP_THREADS", "0"))
+        if self._cpu_replicas > 1:
+            # Replicas split the cores between them instead.
+            _intra, _inter = self._cpu_replica_threads, 1
 
         def _patched_init(self_sess: PickableInferenceSession, model_path: str, **kwargs: Any) -> None:
             if "sess_options" not in kwargs:
@@ -407,11 +534,113 @@ class InsightFaceProvider(FaceProvider):
 
         self._app = FaceAnalysis(name=self._model_name, root=self._model_dir, **fa_kwargs)
         self._app.prepare(ctx_id=self._ctx_id, det_size=self._det_size)
+        if self._det_graph_decode and self._det_dynamic_batch:
+            self._det_decode_model = self._load_det_decode_model(providers, provider_options, log)
+        if self._cpu_replicas > 1:
+            # Shallow copies with their own session: model methods (detect,
+            # get_feat, get) only touch self.session and read-only settings.
+            def _replicate(model: Any) -> Any:
+                replica = copy.copy(model)
+                replica.session = PickableInferenceSession(
+                    model.model_file, providers=providers, provider_options=provider_options
+                )
+                return replica
+
+            models = [*self._app.models.values()]
+            if self._det_decode_model is not None:
+                models.append(self._det_decode_model)
+            self._replica_pools = {
+                id(model): ReplicaPool([model, *(_replicate(model) for _ in range(self._cpu_replicas - 1))])
+                for model in models
+            }
+            log.info("cpu_replicas", replicas=self._cpu_replicas, intra_op_threads=self._cpu_replica_threads)
         self._loaded = True
 
         # Restore original init to avoid side effects on other code
         PickableInferenceSession.__init__ = _original_init
 
+    def _load_det_decode_model(self, providers: list[str], provider_options: list[dict[str, str]], log: Any) -> Any:
+        """A shallow copy of the detector running its decode + NMS sidecar
+        graph (see ``scrfd_export.export_decode_graph``), with the detector's
+        own thresholds baked in. Only the batched path uses it; None when the
+        loaded detector can't take one."""
+        from insightface.model_zoo.model_zoo import PickableInferenceSession  # noqa: PLC0415
+
+        from src.services.face_provider.scrfd_export import DECODE_SUFFIX, export_decode_graph  # noqa: PLC0415
+
+        det_model = self._app.det_model
+        if not self._det_batch_capable():
+            return None
+        outcome = export_decode_graph(
+            det_model.model_file,
+            score_threshold=det_model.det_thresh,
+            iou_threshold=det_model.nms_thresh,
+            max_dets=self._det_graph_max_dets,
+        )
+        log.info("scrfd_graph_decode_export", model=det_model.model_file, outcome=outcome)
+        if outcome == "unsupported":
+            return None
+        decode_model = copy.copy(det_model)
+        decode_model.model_file = det_model.model_file + DECODE_SUFFIX
+        decode_model.session = PickableInferenceSession(
+            decode_model.model_file, providers=providers, provider_options=provider_options
+        )
+        decode_model.input_names = [i.name for i in decode_model.session.get_inputs()]
+        decode_model.output_names = [o.name for o in decode_model.session.get_outputs()]
+        return decode_model
+
+    def _export_landmark_graphs(self, pack_dir: str, log: Any) -> None:
+        """Dynamic-batch 1k3d68 for batched pose (see landmark_export), or
+        the stock graph restored from its .bak when the flag is off."""
+        import glob  # noqa: PLC0415
+
+        if self._pose_dynamic_batch:
+            from src.services.face_provider.landmark_export import (  # noqa: PLC0415
+                convert_landmark_to_dynamic_batch,
+            )
+
+            for path in sorted(glob.glob(os.path.join(pack_dir, "1k3d68*.onnx"))):
+                outcome = convert_landmark_to_dynamic_batch(path)
+                log.info("landmark_dynamic_batch_export", model=path, outcome=outcome)
+            return
+        for bak_path in sorted(glob.glob(os.path.join(pack_dir, "1k3d68*.onnx.bak"))):
+            path = bak_path.removesuffix(".bak")
+            try:
+                os.replace(bak_path, path)
+            except FileNotFoundError:
+                continue
+            log.info("landmark_dynamic_batch_restore", model=path)
+
+    def _replica_call(self, model: Any, method: str, *args: Any, **kwargs: Any) -> Any:
+        """``model.<method>(...)`` on a free replica of ``model`` (CPU replica
+        mode), or on ``model`` itself."""
+        pool = self._replica_pools.get(id(model))
+        if pool is None:
+            return getattr(model, method)(*args, **kwargs)
+        with pool.take() as replica:
+            return getattr(replica, method)(*args, **kwargs)
+
+    def _get_feat(self, rec_model: Any) -> Callable[[list[np.ndarray]], np.ndarray]:
+        if id(rec_model) not in self._replica_pools:
+            return rec_model.get_feat  # type: ignore[no-any-return]
+        return functools.partial(self._replica_call, rec_model, "get_feat")
+
+    def _session_run(self, model: Any, inputs: np.ndarray | tuple[np.ndarray, ...]) -> list[np.ndarray]:
+        """One forward pass of ``model`` (or a free CPU replica of it). A tuple
+        feeds the graph's inputs in order — the blob, then side inputs such as
+        the decode graph's letterbox scales — named by ``model.input_names``."""
+        pool = self._replica_pools.get(id(model))
+        if pool is None:
+            return model.session.run(model.output_names, self._feeds(model, inputs))  # type: ignore[no-any-return]
+        with pool.take() as replica:
+            return replica.session.run(replica.output_names, self._feeds(replica, inputs))  # type: ignore[no-any-return]
+
+    @staticmethod
+    def _feeds(model: Any, inputs: np.ndarray | tuple[np.ndarray, ...]) -> dict[str, np.ndarray]:
+        if not isinstance(inputs, tuple):
+            return {model.input_name: inputs}
+        return dict(zip(model.input_names, inputs, strict=True))
+
     def _decode_image(self, image_bytes: bytes) -> np.ndarray | None:
         import cv2
 
@@ -419,8 +648,8 @@ class InsightFaceProvider(FaceProvider):
         return cv2.imdecode(arr, cv2.IMREAD_COLOR)
 
     def _detect_faces(self, img: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
-        with self._gpu_lock:
-            bboxes, kpss = self._app.det_model.detect(img, max_num=0, metric="default")
+        with self._passes.exclusive("det"):
+            bboxes, kpss = self._replica_call(self._app.det_model, "detect", img, max_num=0, metric="default")
         return bboxes, kpss
 
     def _pad_to_square(self, img: np.ndarray) -> tuple[np.ndarray, int, int]:
@@ -492,6 +721,8 @@ class InsightFaceProvider(FaceProvider):
 
         The converted graph keeps the stock flat 2-D outputs, so a batch of N
         yields (N*K, C) per stride with image b occupying rows [b*K:(b+1)*K].
+        Batches go through ``_decode_det_outputs``; this is its per-image
+        reference and fallback for tied scores.
         """
         from insightface.model_zoo.scrfd import (  # type: ignore[import-untyped] # noqa: PLC0415
             distance2bbox,
@@ -535,6 +766,121 @@ class InsightFaceProvider(FaceProvider):
             return det, kpss_all[order, :, :][keep, :, :]
         return det, None
 
+    def _decode_det_outputs(
+        self, net_outs: list[np.ndarray], det_scales: Sequence[float]
+    ) -> list[tuple[np.ndarray, np.ndarray | None]]:
+        """Decode a whole batched SCRFD forward pass at once: threshold,
+        gather and transform the anchors of every image (one vectorized step
+        per stride, not per image x stride), then one greedy NMS for all images.
+
+        Bit-identical to ``_decode_det_output`` per image: candidates keep its
+        (stride, anchor) order and float32 arithmetic, and the suppression is
+        SCRFD.nms's. Only the sort differs — a stable sort on (image, -score)
+        equals insightface's argsort when an image's candidate scores are
+        distinct; an image with tied scores goes through
+        ``_decode_det_output`` so its tie order matches too.
+        """
+        from insightface.model_zoo.scrfd import (  # noqa: PLC0415
+            distance2bbox,
+            distance2kps,
+        )
+
+        det_model = self._app.det_model
+        n = len(det_scales)
+        fmc = det_model.fmc
+        image_parts: list[np.ndarray] = []
+        score_parts: list[np.ndarray] = []
+        bbox_parts: list[np.ndarray] = []
+        kps_parts: list[np.ndarray] = []
+        for idx, stride in enumerate(det_model._feat_stride_fpn):
+            scores = net_outs[idx].reshape(n, -1)
+            image_idx, anchor_idx = np.nonzero(scores >= det_model.det_thresh)
+            rows = image_idx * scores.shape[1] + anchor_idx
+            centers = self._det_anchor_centers(stride)[anchor_idx]
+            image_parts.append(image_idx)
+            score_parts.append(scores[image_idx, anchor_idx])
+            bbox_parts.append(distance2bbox(centers, net_outs[idx + fmc][rows] * stride))
+            if det_model.use_kps:
+                kpss = distance2kps(centers, net_outs[idx + fmc * 2][rows] * stride)
+                kps_parts.append(kpss.reshape((kpss.shape[0], kpss.shape[1] // 2, 2)))
+
+        image = np.concatenate(image_parts)
+        scores_all = np.concatenate(score_parts)
+        order = np.lexsort((-scores_all, image))
+        image, scores_all = image[order], scores_all[order]
+        tied = (image[1:] == image[:-1]) & (scores_all[1:] == scores_all[:-1])
+        tie_images = set(image[1:][tied].tolist())
+
+        scales = np.array(det_scales, dtype=np.float32)[image]
+        bboxes_all = np.concatenate(bbox_parts)[order] / scales[:, None]
+        pre_det = np.hstack((bboxes_all, scores_all[:, None])).astype(np.float32, copy=False)
+        kpss_all = np.concatenate(kps_parts)[order] / scales[:, None, None] if det_model.use_kps else None
+
+        counts = np.bincount(image, minlength=n)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        keep = self._nms_batched(pre_det, image, np.arange(image.size) - starts[image], counts)
+        results: list[tuple[np.ndarray, np.ndarray | None]] = []
+        for b in range(n):
+            if b in tie_images:
+                results.append(self._decode_det_output(net_outs, b, det_scales[b]))
+                continue
+            rows = starts[b] + np.flatnonzero(keep[b, : counts[b]])
+            results.append((pre_det[rows], kpss_all[rows] if kpss_all is not None else None))
+        return results
+
+    def _nms_batched(self, dets: np.ndarray, image: np.ndarray, pos: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """SCRFD.nms for every image at once. ``dets`` rows are grouped by
+        ``image`` and sorted by score within it, ``pos`` is each row's rank
+        in its image. Returns a (n_images, max_count) keep mask.
+
+        Each round keeps every image's best remaining box and drops the boxes
+        it overlaps, with SCRFD.nms's float32 arithmetic — so the rounds run
+        as many times as the most crowded image keeps faces, not once per
+        image per face.
+        """
+        width = int(counts.max()) if counts.size else 0
+        shape = (counts.size, width)
+        x1, y1, x2, y2 = (np.zeros(shape, dtype=np.float32) for _ in range(4))
+        for col, arr in enumerate((x1, y1, x2, y2)):
+            arr[image, pos] = dets[:, col]
+        areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+        alive = np.zeros(shape, dtype=bool)
+        alive[image, pos] = True
+        keep = np.zeros(shape, dtype=bool)
+        thresh = self._app.det_model.nms_thresh
+        rows = np.flatnonzero(alive.any(axis=1))
+        while rows.size:
+            best = alive[rows].argmax(axis=1)
+            keep[rows, best] = True
+            alive[rows, best] = False
+            xx1 = np.maximum(x1[rows, best][:, None], x1[rows])
+            yy1 = np.maximum(y1[rows, best][:, None], y1[rows])
+            xx2 = np.minimum(x2[rows, best][:, None], x2[rows])
+            yy2 = np.minimum(y2[rows, best][:, None], y2[rows])
+            w = np.maximum(0.0, xx2 - xx1 + 1)
+            h = np.maximum(0.0, yy2 - yy1 + 1)
+            inter = w * h
+            ovr = inter / (areas[rows, best][:, None] + areas[rows] - inter)
+            alive[rows] &= ovr <= thresh
+            rows = rows[alive[rows].any(axis=1)]
+        return keep
+
+    @staticmethod
+    def _graph_dets(
+        dets: np.ndarray, det_scales: Sequence[float], use_kps: bool
+    ) -> list[tuple[np.ndarray, np.ndarray | None]]:
+        """Per-image (bboxes, kpss) from the decode graph's ``[N, max_dets, 15]``
+        output: the non-empty rows (score > 0), already in score order,
+        scaled back from detector-input pixels as ``_decode_det_output`` does.
+        kpss is None for a detector without keypoints (``use_kps`` False)."""
+        results: list[tuple[np.ndarray, np.ndarray | None]] = []
+        for rows, det_scale in zip(dets, det_scales, strict=True):
+            live = rows[rows[:, 4] > 0]
+            scale = np.float32(det_scale)
+            det = np.hstack((live[:, :4] / scale, live[:, 4:5]))
+            results.append((det, live[:, 5:].reshape(-1, 5, 2) / scale if use_kps else None))
+        return results
+
     def _det_input_size(self) -> tuple[int, int]:
         """(W, H) of the detector graph input, layout-aware: converted graphs
         are NCHW float or NHWC uint8. Falls back to insightface's parsed value
@@ -577,9 +923,11 @@ class InsightFaceProvider(FaceProvider):
 
         Workers write each image's blob straight into its slice of one
         preallocated (N, 3, H, W) array — a serial np.concatenate over the
-        batch costs more than the forward pass itself.
+        batch costs more than the forward pass itself. With the decode graph
+        loaded, each pass returns finished detections instead of anchor maps.
         """
         det_model = self._app.det_model
+        decode_model = self._det_decode_model
         n = len(imgs)
         input_w, input_h = self._det_input_size()
         uint8_input = self._det_input_is_uint8()
@@ -614,10 +962,24 @@ class InsightFaceProvider(FaceProvider):
         results: list[tuple[np.ndarray, np.ndarray | None]] = []
         for start in range(0, n, max_b):
             chunk = blob[start : start + max_b]
-            with self._gpu_lock:
-                net_outs = det_model.session.run(det_model.output_names, {det_model.input_name: chunk})
-            for b in range(chunk.shape[0]):
-                results.append(self._decode_det_output(net_outs, b, det_scales[start + b]))
+            scales = det_scales[start : start + chunk.shape[0]]
+            if decode_model is not None:
+                # The decode graph's NMS needs each image's letterbox scale
+                # (see scrfd_export._append_decode); it travels with the blob
+                # through merged passes. While the graph is loaded every
+                # batched "det" pass takes this form, so merges stay uniform.
+                net_outs: list[np.ndarray] = self._passes.run(
+                    "det",
+                    (chunk, np.asarray(scales, dtype=np.float32)),
+                    functools.partial(self._session_run, decode_model),
+                    self._det_trt_max_batch,
+                )
+                results.extend(self._graph_dets(net_outs[0], scales, det_model.use_kps))
+                continue
+            net_outs = self._passes.run(
+                "det", chunk, functools.partial(self._session_run, det_model), self._det_trt_max_batch
+            )
+            results.extend(self._decode_det_outputs(net_outs, scales))
         return results
 
     def _detect_batch(self, imgs: list[np.ndarray]) -> list[tuple[np.ndarray, np.ndarray | None]]:
@@ -662,11 +1024,59 @@ class InsightFaceProvider(FaceProvider):
         empty: _DetResult = (np.zeros((0, 5), dtype=np.float32), None, None, 0, 0, 0, 0)
         return [r if r is not None else empty for r in results]
 
-    def _detect_with_pad_fallback(self, img: np.ndarray) -> tuple[np.ndarray, np.ndarray | None, np.ndarray, int, int]:
-        """Single-image wrapper over the batched pad-fallback path."""
-        bboxes, kpss, working, dx, dy, _, _ = self._detect_with_pad_fallback_batch([img])[0]
-        assert working is not None
-        return bboxes, kpss, working, dx, dy
+    def _locate_faces(self, images: list[bytes], hints: Sequence[list[FaceHint] | None] | None) -> list[_DetResult]:
+        """Stages 1-2 for embed/analyze: images with caller-supplied faces are
+        only decoded — the hints stand in for the detector output — and the
+        rest go through ``_decode_and_detect``."""
+        if hints is None or all(h is None for h in hints):
+            return self._decode_and_detect(images)
+        detect_idx = [i for i, h in enumerate(hints) if h is None]
+        hinted_idx = [i for i, h in enumerate(hints) if h is not None]
+        results: list[_DetResult | None] = [None] * len(images)
+        for i, det in zip(detect_idx, self._decode_and_detect([images[i] for i in detect_idx]), strict=True):
+            results[i] = det
+        decoded = self._cv_pool.decode_batch(self._decode_image, [images[i] for i in hinted_idx])
+        for i, img in zip(hinted_idx, decoded, strict=True):
+            results[i] = self._hinted_det(img, hints[i] or [])
+        return [r for r in results if r is not None]
+
+    @staticmethod
+    def _hinted_det(img: np.ndarray | None, faces: list[FaceHint]) -> _DetResult:
+        """Detector-shaped output for supplied faces: score 1.0, missing boxes
+        estimated from the landmarks. The five points cover roughly the
+        central 40% of a detector box, so their extent is scaled 2.5x."""
+        if img is None:
+            return (np.zeros((0, 5), dtype=np.float32), None, None, 0, 0, 0, 0)
+        bboxes = np.ones((len(faces), 5), dtype=np.float32)
+        kpss = np.zeros((len(faces), 5, 2), dtype=np.float32)
+        for i, face in enumerate(faces):
+            kpss[i] = face.landmarks
+            if face.bbox is not None:
+                b = face.bbox
+                bboxes[i, :4] = (b.x, b.y, b.x + b.width, b.y + b.height)
+            else:
+                center = (kpss[i].min(axis=0) + kpss[i].max(axis=0)) / 2
+                half = (kpss[i].max(axis=0) - kpss[i].min(axis=0)) * 1.25
+                bboxes[i, :4] = (*(center - half), *(center + half))
+        return (bboxes, kpss, img, 0, 0, img.shape[0], img.shape[1])
+
+    def _decode_and_detect(self, images: list[bytes]) -> list[_DetResult]:
+        """Decode + detect with pad fallback (stages 1-2 of every operation).
+        With the stage cache on, images detected recently — by any operation —
+        skip both; only the rest are decoded and go through the detector."""
+        cache = self._stage_cache
+        if cache is None:
+            return self._detect_with_pad_fallback_batch(self._cv_pool.decode_batch(self._decode_image, images))
+        digests: list[bytes] = self._cv_pool.map(digest, images)
+        results = [cache.get(d) for d in digests]
+        misses = [i for i, r in enumerate(results) if r is None]
+        if misses:
+            decoded = self._cv_pool.decode_batch(self._decode_image, [images[i] for i in misses])
+            for i, det in zip(misses, self._detect_with_pad_fallback_batch(decoded), strict=True):
+                results[i] = det
+                if det[2] is not None:
+                    cache.put(digests[i], det)
+        return [r for r in results if r is not None]
 
     @staticmethod
     def _make_bbox(raw_bbox: np.ndarray, dx: int = 0, dy: int = 0, orig_w: int = 0, orig_h: int = 0) -> BoundingBox:
@@ -694,22 +1104,23 @@ class InsightFaceProvider(FaceProvider):
         """
         max_b = self._trt_max_batch
         if max_b <= 0 or len(crops) <= max_b:
-            with self._gpu_lock:
-                return rec_model.get_feat(crops)  # type: ignore[no-any-return]
-        feats = []
-        for i in range(0, len(crops), max_b):
-            with self._gpu_lock:
-                feats.append(rec_model.get_feat(crops[i : i + max_b]))
-        return np.concatenate(feats, axis=0)
+            feats: np.ndarray = self._passes.run("rec", crops, self._get_feat(rec_model), max_b)
+            return feats
+        chunks: list[np.ndarray] = [
+            self._passes.run("rec", crops[i : i + max_b], self._get_feat(rec_model), max_b)
+            for i in range(0, len(crops), max_b)
+        ]
+        return np.concatenate(chunks, axis=0)
 
     @staticmethod
-    def _ga_batch_capable(ga_model: Any) -> bool:
-        """True if the genderage model can take a batched forward pass: the
-        stock graph already has a dynamic batch dim (`[None,3,96,96]`), so this
-        mostly guards against test doubles and exotic model packs."""
-        if getattr(ga_model, "taskname", None) != "genderage":
+    def _batch_capable(model: Any, taskname: str) -> bool:
+        """True if ``model`` is a ``taskname`` model whose graph takes a
+        batched forward pass (`[None,3,H,W]`): stock genderage, and 1k3d68
+        once re-exported (see landmark_export). Test doubles and exotic model
+        packs fail this and keep the per-face path."""
+        if getattr(model, "taskname", None) != taskname:
             return False
-        shape = ga_model.session.get_inputs()[0].shape
+        shape = model.session.get_inputs()[0].shape
         return (
             isinstance(shape, (list, tuple))
             and len(shape) == 4
@@ -718,16 +1129,26 @@ class InsightFaceProvider(FaceProvider):
             and isinstance(shape[3], int)
         )
 
+    @classmethod
+    def _ga_batch_capable(cls, ga_model: Any) -> bool:
+        return cls._batch_capable(ga_model, "genderage")
+
     @staticmethod
-    def _ga_crop(img: np.ndarray, bbox: np.ndarray, size: int) -> np.ndarray:
-        """Center-crop a face for the genderage model — numpy equivalent of
-        insightface's face_align.transform with rotation 0 (skimage-free, and
-        cv2.warpAffine releases the GIL so it threads well)."""
+    def _center_crop_matrix(bbox: np.ndarray, size: int) -> np.ndarray:
+        """The affine of insightface's face_align.transform with rotation 0:
+        the bbox center to the middle of a size x size crop, its longer side
+        scaled to size / 1.5."""
         w, h = bbox[2] - bbox[0], bbox[3] - bbox[1]
         cx, cy = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
         s = size / (max(w, h) * 1.5)
-        mat = np.array([[s, 0.0, size / 2 - s * cx], [0.0, s, size / 2 - s * cy]], dtype=np.float64)
-        return cv2.warpAffine(img, mat, (size, size), borderValue=0.0)
+        return np.array([[s, 0.0, size / 2 - s * cx], [0.0, s, size / 2 - s * cy]], dtype=np.float64)
+
+    @classmethod
+    def _ga_crop(cls, img: np.ndarray, bbox: np.ndarray, size: int) -> np.ndarray:
+        """Center-crop a face for the genderage model — numpy equivalent of
+        insightface's face_align.transform with rotation 0 (skimage-free, and
+        cv2.warpAffine releases the GIL so it threads well)."""
+        return cv2.warpAffine(img, cls._center_crop_matrix(bbox, size), (size, size), borderValue=0.0)
 
     def _genderage_batch(
         self, ga_model: Any, tasks: list[tuple[np.ndarray, np.ndarray]]
@@ -756,10 +1177,12 @@ class InsightFaceProvider(FaceProvider):
         max_b = self._trt_max_batch if self._trt_max_batch > 0 else n
         results: list[tuple[float | None, str | None]] = []
         for start in range(0, n, max_b):
-            with self._gpu_lock:
-                preds = ga_model.session.run(ga_model.output_names, {ga_model.input_name: blob[start : start + max_b]})[
-                    0
-                ]
+            preds = self._passes.run(
+                "genderage",
+                blob[start : start + max_b],
+                lambda b: self._session_run(ga_model, b)[0],
+                self._trt_max_batch,
+            )
             for pred in preds:
                 age = float(int(np.round(pred[2] * 100)))
                 gender = "male" if int(np.argmax(pred[:2])) == 1 else "female"
@@ -776,8 +1199,8 @@ class InsightFaceProvider(FaceProvider):
         results: list[tuple[float | None, str | None]] = []
         for i in range(bboxes.shape[0]):
             face_obj = _FaceProxy(bbox=bboxes[i, :4], kps=kpss[i] if kpss is not None else None)
-            with self._gpu_lock:
-                ga_model.get(working, face_obj)
+            with self._passes.exclusive("genderage"):
+                self._replica_call(ga_model, "get", working, face_obj)
             age = _to_float(face_obj.get("age"))
             gender_val = face_obj.get("gender")
             gender: str | None = None
@@ -804,12 +1227,45 @@ class InsightFaceProvider(FaceProvider):
     def _align_and_embed(self, img: np.ndarray, kpss: np.ndarray) -> np.ndarray:
         rec_model = self._app.models["recognition"]
         crops = self._aligned_crops([(img, kps) for kps in kpss], rec_model.input_size[0])
-        embeddings: np.ndarray = self._recognize(rec_model, crops)
+        return self._l2_normalize(self._recognize(rec_model, crops))
+
+    @staticmethod
+    def _l2_normalize(embeddings: np.ndarray) -> np.ndarray:
         norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
         norms = np.maximum(norms, 1e-10)
         normalized: np.ndarray = embeddings / norms
         return normalized
 
+    @property
+    def aligned_crop_size(self) -> int:
+        return int(self._app.models["recognition"].input_size[0])
+
+    def embed_aligned(
+        self, crops: np.ndarray | Sequence[bytes], embedding_format: EmbeddingFormat = "float_list"
+    ) -> list[EncodedEmbedding]:
+        """Straight to the recognition passes: no frame decode, letterbox,
+        detector or alignment warp. Encoded crops are only decoded (112x112
+        decodes are ~50 us each, on the shared pool)."""
+        size = self.aligned_crop_size
+        if isinstance(crops, np.ndarray):
+            if crops.ndim != 4 or crops.shape[1:] != (size, size, 3) or crops.dtype != np.uint8:
+                msg = f"Aligned crops must be uint8 (N, {size}, {size}, 3), got {crops.dtype} {crops.shape}"
+                raise ValueError(msg)
+            batch = list(crops)
+        else:
+            batch = self._cv_pool.decode_batch(self._decode_image, list(crops))
+            for i, crop in enumerate(batch):
+                if crop is None:
+                    msg = f"Crop {i} could not be decoded"
+                    raise ValueError(msg)
+                if crop.shape[:2] != (size, size):
+                    msg = f"Crop {i} is {crop.shape[1]}x{crop.shape[0]}, expected {size}x{size}"
+                    raise ValueError(msg)
+        if not batch:
+            return []
+        rec_model = self._app.models["recognition"]
+        return encode_embeddings(self._l2_normalize(self._recognize(rec_model, batch)), embedding_format)
+
     @staticmethod
     def _kps_to_landmarks(kps: np.ndarray | None, dx: int = 0, dy: int = 0) -> list[tuple[float, float]] | None:
         if kps is None:
@@ -818,34 +1274,106 @@ class InsightFaceProvider(FaceProvider):
             return [(float(p[0]) - dx, float(p[1]) - dy) for p in kps]
         return [(float(p[0]), float(p[1])) for p in kps]
 
-    def _estimate_poses(self, img: np.ndarray, bboxes: np.ndarray, kpss: np.ndarray | None) -> list[HeadPose | None]:
-        """Real head pose via the 1k3d68 landmark model (detect + pose only, no recognition)."""
+    def _landmarks_for_image(
+        self, kpss: np.ndarray | None, dx: int, dy: int, fields: FaceFields | None
+    ) -> list[list[tuple[float, float]] | None]:
+        if kpss is None or not wants(fields, "landmarks"):
+            return [None] * (0 if kpss is None else kpss.shape[0])
+        return [self._kps_to_landmarks(kps, dx, dy) for kps in kpss]
+
+    def _embeddings_for_image(
+        self, img: np.ndarray, kpss: np.ndarray, embedding_format: EmbeddingFormat, fields: FaceFields | None
+    ) -> list[EncodedEmbedding]:
+        """Aligned, recognized and encoded embeddings for one image's faces —
+        or no recognition pass at all when the caller projected them away."""
+        if not wants(fields, "embedding"):
+            return [NO_EMBEDDING] * kpss.shape[0]
+        return encode_embeddings(self._align_and_embed(img, kpss), embedding_format)
+
+    def _pose_batch(self, pose_model: Any, tasks: list[tuple[np.ndarray, np.ndarray]]) -> list[HeadPose | None]:
+        """Head pose for (working_img, bbox) pairs with one session.run per
+        chunk instead of one per face. Crops mirror Landmark.get exactly; the
+        landmark decode and pose fit are vectorized over the batch."""
+        if not tasks:
+            return []
+        size = pose_model.input_size[0]
+        n = len(tasks)
+        blob = np.empty((n, 3, size, size), dtype=np.float32)
+        mats = np.empty((n, 2, 3), dtype=np.float64)
+
+        def _fill(i: int) -> None:
+            img, bbox = tasks[i]
+            mats[i] = self._center_crop_matrix(bbox, size)
+            aimg = cv2.warpAffine(img, mats[i], (size, size), borderValue=0.0)
+            blob[i] = cv2.dnn.blobFromImage(
+                aimg,
+                1.0 / pose_model.input_std,
+                (size, size),
+                (pose_model.input_mean, pose_model.input_mean, pose_model.input_mean),
+                swapRB=True,
+            )[0]
+
+        self._cv_pool.map(_fill, range(n))
+
+        max_b = self._trt_max_batch if self._trt_max_batch > 0 else n
+        preds = np.concatenate(
+            [
+                self._passes.run(
+                    "landmark_3d_68",
+                    blob[start : start + max_b],
+                    lambda b: self._session_run(pose_model, b)[0],
+                    self._trt_max_batch,
+                )
+                for start in range(0, n, max_b)
+            ]
+        )
+        angles = _poses_from_landmarks(preds, mats, pose_model.mean_lmk, size)
+        return [HeadPose(pitch=float(p), yaw=float(y), roll=float(r)) for p, y, r in angles]
+
+    @staticmethod
+    def _fast_poses(kpss: np.ndarray | None, n: int) -> list[HeadPose | None]:
+        if kpss is None:
+            return [None] * n
+        return [HeadPose(pitch=float(p), yaw=float(y), roll=float(r)) for p, y, r in _poses_from_keypoints(kpss)]
+
+    def _estimate_poses(
+        self, img: np.ndarray, bboxes: np.ndarray, kpss: np.ndarray | None, pose_mode: PoseMode = "model"
+    ) -> list[HeadPose | None]:
+        """Real head pose via the 1k3d68 landmark model (detect + pose only, no
+        recognition), or from the detector keypoints alone with pose_mode="fast"."""
+        if pose_mode == "fast":
+            return self._fast_poses(kpss, bboxes.shape[0])
         pose_model = self._app.models.get("landmark_3d_68")
         if pose_model is None:
             return [None] * bboxes.shape[0]
+        if self._batch_capable(pose_model, "landmark_3d_68"):
+            return self._pose_batch(pose_model, [(img, bboxes[i, :4]) for i in range(bboxes.shape[0])])
         poses: list[HeadPose | None] = []
         for i in range(bboxes.shape[0]):
             face_obj = _FaceProxy(bbox=bboxes[i, :4], kps=kpss[i] if kpss is not None else None)
-            with self._gpu_lock:
-                pose_model.get(img, face_obj)
+            with self._passes.exclusive("landmark_3d_68"):
+                self._replica_call(pose_model, "get", img, face_obj)
             poses.append(_to_pose(face_obj.get("pose")))
         return poses
 
-    def detect(self, image_bytes: bytes, include_pose: bool = False) -> list[DetectedFace]:
-        img = self._decode_image(image_bytes)
-        if img is None:
-            return []
-        return self._detect_decoded(img, include_pose)
-
-    def _detect_decoded(self, img: np.ndarray, include_pose: bool) -> list[DetectedFace]:
-        bboxes, kpss, working, dx, dy = self._detect_with_pad_fallback(img)
-        if bboxes.shape[0] == 0:
+    def detect(
+        self,
+        image_bytes: bytes,
+        include_pose: bool = False,
+        fields: FaceFields | None = None,
+        pose_mode: PoseMode = "model",
+    ) -> list[DetectedFace]:
+        bboxes, kpss, working, dx, dy, orig_h, orig_w = self._decode_and_detect([image_bytes])[0]
+        if bboxes.shape[0] == 0 or working is None:
             return []
 
         poses: list[HeadPose | None] = (
-            self._estimate_poses(working, bboxes, kpss) if include_pose else [None] * bboxes.shape[0]
+            self._estimate_poses(working, bboxes, kpss, pose_mode)
+            if include_pose and wants(fields, "pose")
+            else [None] * bboxes.shape[0]
         )
-        orig_h, orig_w = img.shape[:2]
+        if not wants(fields, "landmarks"):
+            kpss = None
         return [
             DetectedFace(
                 bbox=self._make_bbox(bboxes[i, :4], dx, dy, orig_w, orig_h),
@@ -856,77 +1384,103 @@ class InsightFaceProvider(FaceProvider):
             for i in range(bboxes.shape[0])
         ]
 
-    def embed(self, image_bytes: bytes) -> list[DetectedFace]:
-        img = self._decode_image(image_bytes)
-        if img is None:
-            return []
-
-        bboxes, kpss, working, dx, dy = self._detect_with_pad_fallback(img)
-        if bboxes.shape[0] == 0 or kpss is None:
+    def embed(
+        self, image_bytes: bytes, embedding_format: EmbeddingFormat = "float_list", fields: FaceFields | None = None
+    ) -> list[DetectedFace]:
+        bboxes, kpss, working, dx, dy, orig_h, orig_w = self._decode_and_detect([image_bytes])[0]
+        if bboxes.shape[0] == 0 or kpss is None or working is None:
             return []
 
         # Alignment uses padded coords + padded image so it can sample past the
         # original edges without hitting black borders.
-        embeddings = self._align_and_embed(working, kpss)
+        embeddings = self._embeddings_for_image(working, kpss, embedding_format, fields)
+        landmarks = self._landmarks_for_image(kpss, dx, dy, fields)
 
-        orig_h, orig_w = img.shape[:2]
         return [
             DetectedFace(
                 bbox=self._make_bbox(bboxes[i, :4], dx, dy, orig_w, orig_h),
                 det_score=float(bboxes[i, 4]),
-                embedding=embeddings[i].astype(np.float32).tolist(),
-                landmarks=self._kps_to_landmarks(kpss[i], dx, dy),
+                embedding=embeddings[i].values,
+                embedding_packed=embeddings[i].packed,
+                embedding_scale=embeddings[i].scale,
+                landmarks=landmarks[i],
             )
             for i in range(bboxes.shape[0])
         ]
 
-    def analyze(self, image_bytes: bytes) -> list[DetectedFace]:
-        img = self._decode_image(image_bytes)
-        if img is None:
+    def analyze(
+        self, image_bytes: bytes, embedding_format: EmbeddingFormat = "float_list", fields: FaceFields | None = None
+    ) -> list[DetectedFace]:
+        bboxes, kpss, working, dx, dy, orig_h, orig_w = self._decode_and_detect([image_bytes])[0]
+        if bboxes.shape[0] == 0 or kpss is None or working is None:
             return []
 
-        bboxes, kpss, working, dx, dy = self._detect_with_pad_fallback(img)
-        if bboxes.shape[0] == 0 or kpss is None:
-            return []
-
-        embeddings = self._align_and_embed(working, kpss)
+        embeddings = self._embeddings_for_image(working, kpss, embedding_format, fields)
+        landmarks = self._landmarks_for_image(kpss, dx, dy, fields)
         ga_model = self._app.models.get("genderage")
 
         demographics: list[tuple[float | None, str | None]]
-        if ga_model is not None:
+        if ga_model is not None and wants(fields, "age", "gender"):
             demographics = self._genderage_for_image(ga_model, working, bboxes, kpss)
         else:
             demographics = [(None, None)] * bboxes.shape[0]
 
-        orig_h, orig_w = img.shape[:2]
         return [
             DetectedFace(
                 bbox=self._make_bbox(bboxes[i, :4], dx, dy, orig_w, orig_h),
                 det_score=float(bboxes[i, 4]),
-                embedding=embeddings[i].astype(np.float32).tolist(),
+                embedding=embeddings[i].values,
+                embedding_packed=embeddings[i].packed,
+                embedding_scale=embeddings[i].scale,
                 age=demographics[i][0],
                 gender=demographics[i][1],
-                landmarks=self._kps_to_landmarks(kpss[i], dx, dy),
+                landmarks=landmarks[i],
             )
             for i in range(bboxes.shape[0])
         ]
 
-    def detect_batch(self, images: list[bytes], include_pose: bool = False) -> list[list[DetectedFace]]:
+    def detect_batch(
+        self,
+        images: list[bytes],
+        include_pose: bool = False,
+        fields: FaceFields | None = None,
+        pose_mode: PoseMode = "model",
+    ) -> list[list[DetectedFace]]:
         # Stage 1: Decode images in parallel (cv2.imdecode releases the GIL)
-        decoded = self._cv_pool.decode_batch(self._decode_image, images)
-
         # Stage 2: One batched detection pass, plus one batched pad-retry pass
-        # over the zero-face subset.
-        per_image = self._detect_with_pad_fallback_batch(decoded)
-
+        # over the zero-face subset. Both skipped for stage-cache hits.
+        per_image = self._decode_and_detect(images)
+
+        include_pose = include_pose and wants(fields, "pose")
+        want_landmarks = wants(fields, "landmarks")
+        # Pose across ALL faces of the request in one batched pass when the
+        # landmark graph allows it (same as genderage in analyze_batch).
+        pose_model = self._app.models.get("landmark_3d_68") if include_pose and pose_mode == "model" else None
+        batched_poses: list[HeadPose | None] | None = None
+        if pose_model is not None and self._batch_capable(pose_model, "landmark_3d_68"):
+            pose_tasks = [
+                (working, bboxes[i, :4])
+                for bboxes, _, working, *_ in per_image
+                if working is not None
+                for i in range(bboxes.shape[0])
+            ]
+            batched_poses = self._pose_batch(pose_model, pose_tasks)
+        pose_offset = 0
         results: list[list[DetectedFace]] = []
         for bboxes, kpss, working, dx, dy, orig_h, orig_w in per_image:
             if bboxes.shape[0] == 0 or working is None:
                 results.append([])
                 continue
-            poses: list[HeadPose | None] = (
-                self._estimate_poses(working, bboxes, kpss) if include_pose else [None] * bboxes.shape[0]
-            )
+            poses: list[HeadPose | None]
+            if batched_poses is not None:
+                poses = batched_poses[pose_offset : pose_offset + bboxes.shape[0]]
+                pose_offset += bboxes.shape[0]
+            elif include_pose:
+                poses = self._estimate_poses(working, bboxes, kpss, pose_mode)
+            else:
+                poses = [None] * bboxes.shape[0]
+            if not want_landmarks:
+                kpss = None
             results.append(
                 [
                     DetectedFace(
@@ -940,16 +1494,21 @@ class InsightFaceProvider(FaceProvider):
             )
         return results
 
-    def embed_batch(self, images: list[bytes]) -> list[list[DetectedFace]]:
+    def embed_batch(
+        self,
+        images: list[bytes],
+        embedding_format: EmbeddingFormat = "float_list",
+        fields: FaceFields | None = None,
+        hints: Sequence[list[FaceHint] | None] | None = None,
+    ) -> list[list[DetectedFace]]:
         rec_model = self._app.models["recognition"]
         image_size = rec_model.input_size[0]
 
         # Stage 1: Decode images in parallel (cv2.imdecode releases the GIL)
-        decoded = self._cv_pool.decode_batch(self._decode_image, images)
-
         # Stage 2: One batched detection pass, plus one batched pad-retry pass
-        # over the zero-face subset.
-        per_image = self._detect_with_pad_fallback_batch(decoded)
+        # over the zero-face subset. Both skipped for stage-cache hits, and
+        # detection for images with caller-supplied faces.
+        per_image = self._locate_faces(images, hints)
 
         # Stage 3: Align face crops in parallel (_norm_crop releases the GIL)
         all_crops: list[np.ndarray] = []
@@ -964,16 +1523,21 @@ class InsightFaceProvider(FaceProvider):
                 align_tasks.append((it_working, kps))
             crop_counts.append(it_bboxes.shape[0])
 
-        if align_tasks:
-            all_crops = self._aligned_crops(align_tasks, image_size)
-
-        if all_crops:
-            all_embeddings: np.ndarray = self._recognize(rec_model, all_crops)
-            norms = np.linalg.norm(all_embeddings, axis=1, keepdims=True)
-            norms = np.maximum(norms, 1e-10)
-            all_embeddings = all_embeddings / norms
+        # Stage 4: recognition, unless the caller projected embeddings away.
+        if not wants(fields, "embedding"):
+            encoded = [NO_EMBEDDING] * len(align_tasks)
         else:
-            all_embeddings = np.zeros((0, 512), dtype=np.float32)
+            if align_tasks:
+                all_crops = self._aligned_crops(align_tasks, image_size)
+            if all_crops:
+                all_embeddings: np.ndarray = self._recognize(rec_model, all_crops)
+                norms = np.linalg.norm(all_embeddings, axis=1, keepdims=True)
+                norms = np.maximum(norms, 1e-10)
+                all_embeddings = all_embeddings / norms
+            else:
+                all_embeddings = np.zeros((0, 512), dtype=np.float32)
+            encoded = encode_embeddings(all_embeddings, embedding_format)
+        want_landmarks = wants(fields, "landmarks")
 
         results: list[list[DetectedFace]] = []
         emb_offset = 0
@@ -986,8 +1550,14 @@ class InsightFaceProvider(FaceProvider):
                     DetectedFace(
                         bbox=self._make_bbox(it_bboxes[i, :4], it_dx, it_dy, it_ow, it_oh),
                         det_score=float(it_bboxes[i, 4]),
-                        embedding=all_embeddings[emb_offset + i].astype(np.float32).tolist(),
-                        landmarks=self._kps_to_landmarks(it_kpss[i] if it_kpss is not None else None, it_dx, it_dy),
+                        embedding=encoded[emb_offset + i].values,
+                        embedding_packed=encoded[emb_offset + i].packed,
+                        embedding_scale=encoded[emb_offset + i].scale,
+                        landmarks=(
+                            self._kps_to_landmarks(it_kpss[i], it_dx, it_dy)
+                            if want_landmarks and it_kpss is not None
+                            else None
+                        ),
                     )
                 )
             emb_offset += n
@@ -995,17 +1565,22 @@ class InsightFaceProvider(FaceProvider):
 
         return results
 
-    def analyze_batch(self, images: list[bytes]) -> list[list[DetectedFace]]:
+    def analyze_batch(
+        self,
+        images: list[bytes],
+        embedding_format: EmbeddingFormat = "float_list",
+        fields: FaceFields | None = None,
+        hints: Sequence[list[FaceHint] | None] | None = None,
+    ) -> list[list[DetectedFace]]:
         rec_model = self._app.models["recognition"]
         ga_model = self._app.models.get("genderage")
         image_size = rec_model.input_size[0]
 
         # Stage 1: Decode images in parallel (cv2.imdecode releases the GIL)
-        decoded = self._cv_pool.decode_batch(self._decode_image, images)
-
         # Stage 2: One batched detection pass, plus one batched pad-retry pass
-        # over the zero-face subset.
-        per_image = self._detect_with_pad_fallback_batch(decoded)
+        # over the zero-face subset. Both skipped for stage-cache hits, and
+        # detection for images with caller-supplied faces.
+        per_image = self._locate_faces(images, hints)
 
         # Stage 3: Align face crops in parallel (_norm_crop releases the GIL)
         all_crops: list[np.ndarray] = []
@@ -1020,23 +1595,28 @@ class InsightFaceProvider(FaceProvider):
                 align_tasks.append((it_working, kps))
             crop_counts.append(it_bboxes.shape[0])
 
-        if align_tasks:
-            all_crops = self._aligned_crops(align_tasks, image_size)
-
-        if all_crops:
-            all_embeddings: np.ndarray = self._recognize(rec_model, all_crops)
-            norms = np.linalg.norm(all_embeddings, axis=1, keepdims=True)
-            norms = np.maximum(norms, 1e-10)
-            all_embeddings = all_embeddings / norms
+        # Stage 4: recognition, unless the caller projected embeddings away.
+        if not wants(fields, "embedding"):
+            encoded = [NO_EMBEDDING] * len(align_tasks)
         else:
-            all_embeddings = np.zeros((0, 512), dtype=np.float32)
+            if align_tasks:
+                all_crops = self._aligned_crops(align_tasks, image_size)
+            if all_crops:
+                all_embeddings: np.ndarray = self._recognize(rec_model, all_crops)
+                norms = np.linalg.norm(all_embeddings, axis=1, keepdims=True)
+                norms = np.maximum(norms, 1e-10)
+                all_embeddings = all_embeddings / norms
+            else:
+                all_embeddings = np.zeros((0, 512), dtype=np.float32)
+            encoded = encode_embeddings(all_embeddings, embedding_format)
+        want_landmarks = wants(fields, "landmarks")
 
         # Genderage across ALL faces of the request in one batched pass (one
         # session.run per chunk instead of one per face); falls back to
         # per-image Attribute.get when the graph can't batch. Task order
         # mirrors the crop/embedding order, so emb_offset indexes both.
         demographics: list[tuple[float | None, str | None]] = []
-        if ga_model is not None and all_crops:
+        if ga_model is not None and align_tasks and wants(fields, "age", "gender"):
             if self._ga_batch_capable(ga_model):
                 ga_tasks: list[tuple[np.ndarray, np.ndarray]] = []
                 for idx, it in enumerate(per_image):
@@ -1052,7 +1632,7 @@ class InsightFaceProvider(FaceProvider):
                             self._genderage_for_image(ga_model, it_working, it_bboxes[: crop_counts[idx]], it_kpss)
                         )
         else:
-            demographics = [(None, None)] * len(all_crops)
+            demographics = [(None, None)] * len(align_tasks)
 
         results: list[list[DetectedFace]] = []
         emb_offset = 0
@@ -1065,10 +1645,16 @@ class InsightFaceProvider(FaceProvider):
                     DetectedFace(
                         bbox=self._make_bbox(it_bboxes[i, :4], it_dx, it_dy, it_ow, it_oh),
                         det_score=float(it_bboxes[i, 4]),
-                        embedding=all_embeddings[emb_offset + i].astype(np.float32).tolist(),
+                        embedding=encoded[emb_offset + i].values,
+                        embedding_packed=encoded[emb_offset + i].packed,
+                        embedding_scale=encoded[emb_offset + i].scale,
                         age=demographics[emb_offset + i][0],
                         gender=demographics[emb_offset + i][1],
-                        landmarks=self._kps_to_landmarks(it_kpss[i] if it_kpss is not None else None, it_dx, it_dy),
+                        landmarks=(
+                            self._kps_to_landmarks(it_kpss[i], it_dx, it_dy)
+                            if want_landmarks and it_kpss is not None
+                            else None
+                        ),
                     )
                 )
             emb_offset += n
@@ -1076,6 +1662,17 @@ class InsightFaceProvider(FaceProvider):
 
         return results
 
+    @property
+    def supports_face_hints(self) -> bool:
+        return True
+
+    @property
+    def stream_chunk_size(self) -> int:
+        # The detector profile's opt batch: passes of this size run on the
+        # kernels TRT tuned for, and the first results of a streamed batch
+        # arrive after one such pass instead of the whole batch.
+        return max(1, self._det_trt_opt_batch)
+
     @property
     def provider_name(self) -> str:
         return "insightface"
@@ -0,0 +1,141 @@
+"""Re-export the 1k3d68 landmark graph with a dynamic batch dimension.
+
+The stock ``1k3d68.onnx`` (the head-pose model of ``buffalo_l`` and
+``antelopev2``) is exported with its batch fixed at 1 (``[1, 3, 192, 192]`` in,
+``[1, 3309]`` out), so every face costs one ``session.run``. Unlike SCRFD, the
+graph is a plain CNN with batch-major outputs: freeing the batch only takes
+symbolic input/output batch dims and ``Reshape`` targets that copy the batch
+dim (``0``) instead of pinning it to ``1``. Batch 1 is bit-identical to the
+stock graph, so insightface's own ``Landmark.get`` keeps working on it.
+
+Used at startup by ``InsightFaceProvider.load_model()`` when the
+``face_pose_dynamic_batch`` setting is on (the default), or as a CLI::
+
+    uv run python -m src.services.face_provider.landmark_export \\
+        ~/.insightface/models/buffalo_l/1k3d68.onnx --validate
+
+As with ``scrfd_export``, the original graph is kept as ``<name>.onnx.bak``.
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import TYPE_CHECKING, Any
+
+from src.services.face_provider.scrfd_export import (
+    _BATCH_DIM_PARAM,
+    ConvertOutcome,
+    _input_dims,
+    read_source_model,
+    replace_model,
+)
+
+if TYPE_CHECKING:
+    from onnx import ModelProto
+
+
+def _rewrite_graph(model: ModelProto) -> bool:
+    """Apply the dynamic-batch surgery in place. Returns False (graph
+    untouched) unless every input and output is batch-1 and batch-major."""
+    import onnx  # noqa: PLC0415
+    from onnx import numpy_helper  # noqa: PLC0415
+
+    graph = model.graph
+    dims = _input_dims(model)
+    if dims is None or dims[0].dim_value != 1 or not all(d.dim_value > 0 for d in dims[1:]):
+        return False
+    for out in graph.output:
+        out_dims = out.type.tensor_type.shape.dim
+        if not out_dims or out_dims[0].dim_value != 1:
+            return False
+
+    # Constant Reshape targets that pin the batch: [1, ...] -> [0, ...]. A
+    # target computed in-graph (Shape -> Gather -> Concat) already follows
+    # the batch.
+    constants: dict[str, Any] = {init.name: init for init in graph.initializer}
+    for node in graph.node:
+        if node.op_type == "Constant" and node.attribute and node.attribute[0].name == "value":
+            constants[node.output[0]] = node.attribute[0].t
+    planned: dict[str, Any] = {}
+    for node in graph.node:
+        if node.op_type != "Reshape" or node.input[1] not in constants:
+            continue
+        if any(attr.name == "allowzero" and attr.i for attr in node.attribute):
+            return False  # 0 would mean a literal zero-size dim
+        target = numpy_helper.to_array(constants[node.input[1]])
+        if target.ndim == 1 and target.shape[0] > 0 and target[0] == 1:
+            planned[node.input[1]] = target
+
+    for name, target in planned.items():
+        fixed = target.copy()
+        fixed[0] = 0
+        constants[name].CopyFrom(numpy_helper.from_array(fixed, name=constants[name].name))
+
+    for value in (graph.input[0], *graph.output):
+        batch = value.type.tensor_type.shape.dim[0]
+        batch.ClearField("dim_value")
+        batch.dim_param = _BATCH_DIM_PARAM
+
+    # Stale batch-1 intermediate shapes would trip the CUDA EP's memory
+    # pattern planner (see scrfd_export); ORT re-infers them at load.
+    graph.ClearField("value_info")
+
+    onnx.checker.check_model(model)
+    return True
+
+
+def convert_landmark_to_dynamic_batch(model_path: str) -> ConvertOutcome:
+    """Convert a landmark ONNX file to dynamic batch in place (atomic, with
+    backup); idempotent and multi-process safe like
+    ``convert_scrfd_to_dynamic_batch``."""
+    model, source_bytes = read_source_model(model_path)
+
+    dims = _input_dims(model)
+    if dims is not None and dims[0].dim_value == 0:
+        return "already_dynamic"
+
+    if not _rewrite_graph(model):
+        return "unsupported"
+    return replace_model(model_path, source_bytes, model.SerializeToString())
+
+
+def validate_dynamic_batch(original_path: str, converted_path: str, batch: int = 3, atol: float = 1e-4) -> None:
+    """Run the original model image-by-image and the converted one as a batch
+    on random inputs; raises ``AssertionError`` on any mismatch beyond ``atol``."""
+    import numpy as np  # noqa: PLC0415
+    import onnxruntime as ort  # type: ignore[import-untyped]  # noqa: PLC0415
+
+    rng = np.random.default_rng(0)
+    orig = ort.InferenceSession(original_path, providers=["CPUExecutionProvider"])
+    conv = ort.InferenceSession(converted_path, providers=["CPUExecutionProvider"])
+    input_cfg = orig.get_inputs()[0]
+    output_names = [o.name for o in orig.get_outputs()]
+
+    blob = rng.standard_normal((batch, *input_cfg.shape[1:]), dtype=np.float32)
+    batched_outs = conv.run(output_names, {conv.get_inputs()[0].name: blob})
+    for b in range(batch):
+        single_outs = orig.run(output_names, {input_cfg.name: blob[b : b + 1]})
+        for name, single, batched in zip(output_names, single_outs, batched_outs, strict=True):
+            if not np.allclose(single[0], batched[b], atol=atol):
+                max_diff = float(np.max(np.abs(single[0] - batched[b])))
+                msg = f"output {name} mismatch at image {b}: max diff {max_diff}"
+                raise AssertionError(msg)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-export a landmark ONNX graph with a dynamic batch dimension")
+    parser.add_argument("model", help="Path to the .onnx file (converted in place, original kept as .bak)")
+    parser.add_argument("--validate", action="store_true", help="Compare converted outputs against the original")
+    args = parser.parse_args()
+
+    outcome = convert_landmark_to_dynamic_batch(args.model)
+    print(f"{args.model}: {outcome}")
+    if outcome == "unsupported":
+        raise SystemExit(1)
+    if args.validate:
+        validate_dynamic_batch(args.model + ".bak", args.model)
+        print("validation passed: batched outputs match per-image originals")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Cross-request merging of model forward passes.
+
+With FACE_MAX_INFLIGHT > 1 several requests run inside the provider at once,
+but their model passes are serialized: three concurrent 4-image batches used
+to cost three under-filled detector passes and three recognition passes, one
+after the other behind a plain lock. ``PassScheduler`` replaces that lock.
+Callers queue their batch-dim inputs per stage (detector, recognition, ...);
+whichever thread gets the device next runs every queued input of its stage as
+one forward pass, up to the stage's batch bound, and routes the output rows
+back to their owners.
+
+Stages are separate ORT sessions (and on CPU separate intra-op thread pools),
+so by default each gets its own lane: request A's recognition pass no longer
+holds up request B's detector pass. ``serial`` mode keeps one lane for all
+stages — one pass at a time, as before.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from src.services.request_context import (
+    PRIORITY_RANK,
+    DeadlineExceededError,
+    check_deadline,
+    current_deadline,
+    current_priority,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Iterator, Mapping
+
+# A stage's input: a batch-dim ndarray (pre-built blobs), a list of per-item
+# arrays (crops for insightface's get_feat), or a tuple of batch-dim ndarrays
+# fed together (a blob and per-row side inputs, merged element-wise). Outputs
+# are one array or a list of arrays (session.run), each with rows
+# proportional to the input rows.
+PassInput = np.ndarray | list[np.ndarray] | tuple[np.ndarray, ...]
+PassOutput = np.ndarray | list[np.ndarray]
+
+
+@dataclass(slots=True, eq=False)
+class _Job:
+    stage: Hashable
+    inputs: PassInput
+    fn: Callable[[Any], PassOutput]
+    max_rows: int
+    rank: int
+    deadline: float | None
+    done: bool = False
+    result: PassOutput | None = None
+    error: BaseException | None = field(default=None)
+
+
+def _rows(inputs: PassInput) -> int:
+    return len(inputs[0]) if isinstance(inputs, tuple) else len(inputs)
+
+
+def _merge(inputs: list[PassInput]) -> PassInput:
+    if len(inputs) == 1:
+        return inputs[0]
+    if isinstance(inputs[0], np.ndarray):
+        return np.concatenate(inputs, axis=0)
+    if isinstance(inputs[0], tuple):
+        return tuple(np.concatenate(parts, axis=0) for parts in zip(*inputs, strict=True))
+    return [item for part in inputs for item in part]
+
+
+def _slice(output: PassOutput, total: int, start: int, rows: int) -> PassOutput:
+    """Rows [start, start+rows) of a merged pass. Outputs may carry several
+    rows per input row (SCRFD's flat (N*K, C) stride outputs), so slice by the
+    output/input row ratio."""
+    if isinstance(output, np.ndarray):
+        per = output.shape[0] // total
+        return output[start * per : (start + rows) * per]
+    return [_slice(o, total, start, rows) for o in output]  # type: ignore[misc]
+
+
+def _expired(deadline: float | None, now: float) -> bool:
+    return deadline is not None and now >= deadline
+
+
+def parse_stage_slots(spec: str) -> dict[str, int] | None:
+    """FACE_PASS_CONCURRENCY: ``serial`` -> None (one lane for every stage),
+    ``per_model`` -> {} (a lane per stage, one pass each), or per-stage slots
+    as ``det=1,rec=2`` (unlisted stages get one)."""
+    spec = spec.strip()
+    if spec == "serial":
+        return None
+    if spec == "per_model":
+        return {}
+    slots: dict[str, int] = {}
+    for part in spec.split(","):
+        stage, sep, count = part.partition("=")
+        if not sep or not count.strip().isdigit() or int(count) < 1:
+            msg = f"Invalid FACE_PASS_CONCURRENCY entry {part!r}: expected serial, per_model or stage=N,..."
+            raise ValueError(msg)
+        slots[stage.strip()] = int(count)
+    return slots
+
+
+class PassScheduler:
+    """Bounds concurrent passes per lane and merges same-stage inputs across callers.
+
+    ``run`` is for batch-dim passes that can be merged; ``exclusive`` holds a
+    lane slot for calls that can't (per-face ``model.get``, stock batch-1
+    detectors). ``stage_slots`` None is serial mode: one lane, one pass at a
+    time across all stages. Otherwise every stage is its own lane running up
+    to ``stage_slots.get(stage, 1)`` passes at once; passes of different
+    stages overlap freely.
+
+    Within a lane, slots go to the best-ranked waiter (see
+    ``current_priority``): while an interactive caller waits, bulk callers
+    don't start passes on that lane, so a bulk batch is preempted at its next
+    chunk boundary. Merged passes take interactive inputs first. Inputs whose
+    request deadline (see ``current_deadline``) has passed are dropped with
+    DeadlineExceededError instead of being run.
+    """
+
+    def __init__(self, stage_slots: Mapping[str, int] | None = None) -> None:
+        self._cond = threading.Condition()
+        self._stage_slots: dict[Hashable, int] | None = (
+            None if stage_slots is None else {stage: n for stage, n in stage_slots.items()}
+        )
+        self._active: dict[Hashable, int] = {}
+        self._queue: list[_Job] = []
+        self._exclusive_waiting: dict[Hashable, list[int]] = {}
+        self.passes = 0
+        self.merged_inputs = 0
+
+    def _lane(self, stage: Hashable) -> Hashable:
+        return None if self._stage_slots is None else stage
+
+    def _full(self, lane: Hashable) -> bool:
+        slots = 1 if self._stage_slots is None else self._stage_slots.get(lane, 1)
+        return self._active.get(lane, 0) >= slots
+
+    def _acquire(self, lane: Hashable) -> None:
+        self._active[lane] = self._active.get(lane, 0) + 1
+
+    def _release(self, lane: Hashable) -> None:
+        self._active[lane] -= 1
+        self._cond.notify_all()
+
+    def run(self, stage: Hashable, inputs: PassInput, fn: Callable[[Any], PassOutput], max_rows: int = 0) -> Any:
+        """Run ``fn`` on ``inputs``, possibly merged with other callers' queued
+        inputs for the same ``stage``. ``max_rows`` bounds a merged pass (a TRT
+        profile max); <= 0 means unbounded. Callers still chunk their own
+        inputs to ``max_rows`` — a single job is never split."""
+        check_deadline()
+        job = _Job(stage, inputs, fn, max_rows, PRIORITY_RANK[current_priority.get()], current_deadline.get())
+        lane = self._lane(stage)
+        with self._cond:
+            self._queue.append(job)
+            while not job.done:
+                if job not in self._queue:
+                    # Merged into a pass another caller is running: its
+                    # result is on the way, deadline or not.
+                    self._cond.wait()
+                    continue
+                if self._full(lane) or self._outranked(lane, job.rank):
+                    self._cond.wait(self._wait_timeout(job.deadline))
+                    if not job.done and job in self._queue and _expired(job.deadline, time.monotonic()):
+                        self._queue.remove(job)
+                        self._cond.notify_all()  # may have been outranking others
+                        raise DeadlineExceededError
+                    continue
+                batch = self._take(job)
+                if not batch:
+                    self._cond.notify_all()  # everything taken had expired, own job included
+                    continue
+                self._acquire(lane)
+                self._cond.release()
+                try:
+                    self._execute(batch)
+                finally:
+                    self._cond.acquire()
+                    self._release(lane)
+        if job.error is not None:
+            raise job.error
+        assert job.result is not None
+        return job.result
+
+    @contextmanager
+    def exclusive(self, stage: Hashable = None) -> Iterator[None]:
+        """Hold a slot of ``stage``'s lane for an unmergeable pass."""
+        check_deadline()
+        rank = PRIORITY_RANK[current_priority.get()]
+        deadline = current_deadline.get()
+        lane = self._lane(stage)
+        with self._cond:
+            waiting = self._exclusive_waiting.setdefault(lane, [0] * len(PRIORITY_RANK))
+            waiting[rank] += 1
+            try:
+                while self._full(lane) or self._outranked(lane, rank):
+                    self._cond.wait(self._wait_timeout(deadline))
+                    check_deadline()
+            except BaseException:
+                self._cond.notify_all()  # may have been outranking others
+                raise
+            finally:
+                waiting[rank] -= 1
+            self._acquire(lane)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._release(lane)
+
+    @staticmethod
+    def _wait_timeout(deadline: float | None) -> float | None:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def _outranked(self, lane: Hashable, rank: int) -> bool:
+        """True while a better-ranked caller waits for ``lane``."""
+        waiting = self._exclusive_waiting.get(lane)
+        if waiting is not None and any(waiting[:rank]):
+            return True
+        return any(j.rank < rank and self._lane(j.stage) == lane for j in self._queue)
+
+    def _take(self, job: _Job) -> list[_Job]:
+        """Queued jobs for ``job``'s stage that fit one pass, best rank first
+        and FIFO within a rank. Called with the condition held."""
+        batch: list[_Job] = []
+        expired: list[_Job] = []
+        rows = 0
+        now = time.monotonic()
+        candidates = sorted((j for j in self._queue if j.stage == job.stage), key=lambda j: j.rank)
+        for queued in candidates:
+            if _expired(queued.deadline, now):
+                queued.error, queued.done = DeadlineExceededError(), True
+                expired.append(queued)
+                continue
+            n = _rows(queued.inputs)
+            if batch and job.max_rows > 0 and rows + n > job.max_rows:
+                break
+            batch.append(queued)
+            rows += n
+        taken = {id(j) for j in (*batch, *expired)}
+        self._queue = [j for j in self._queue if id(j) not in taken]
+        return batch
+
+    def _execute(self, batch: list[_Job]) -> None:
+        self.passes += 1
+        self.merged_inputs += len(batch)
+        try:
+            output = batch[0].fn(_merge([j.inputs for j in batch]))
+        except BaseException as exc:
+            for j in batch:
+                j.error, j.done = exc, True
+            return
+        if len(batch) == 1:
+            batch[0].result, batch[0].done = output, True
+            return
+        total = sum(_rows(j.inputs) for j in batch)
+        start = 0
+        for j in batch:
+            rows = _rows(j.inputs)
+            j.result, j.done = _slice(output, total, start, rows), True
+            start += rows
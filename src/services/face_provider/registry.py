@@ -12,6 +12,7 @@ def create_provider(settings: Settings) -> FaceProvider:
 
     if name == "insightface":
         from src.services.face_provider.insightface import InsightFaceProvider
+        from src.services.face_provider.pass_scheduler import parse_stage_slots
 
         return InsightFaceProvider(
             use_gpu=settings.face_use_gpu,
@@ -27,9 +28,17 @@ def create_provider(settings: Settings) -> FaceProvider:
             det_uint8_input=settings.face_det_uint8_input,
             det_trt_max_batch=settings.face_det_trt_max_batch,
             det_trt_opt_batch=settings.face_det_trt_opt_batch,
+            det_graph_decode=settings.face_det_graph_decode,
+            det_graph_max_dets=settings.face_det_graph_max_dets,
+            pose_dynamic_batch=settings.face_pose_dynamic_batch,
             thread_workers=settings.face_thread_workers,
             pad_fallback_border_px=settings.face_pad_fallback_border_px,
             pad_fallback_fill=settings.face_pad_fallback_fill,
+            stage_cache_mb=settings.face_stage_cache_mb,
+            stage_cache_ttl_s=settings.face_stage_cache_ttl_s,
+            stage_slots=parse_stage_slots(settings.face_pass_concurrency),
+            cpu_replicas=settings.face_cpu_replicas,
+            cpu_replica_threads=settings.face_cpu_replica_threads,
         )
 
     msg = f"Unknown face provider: {name!r}"
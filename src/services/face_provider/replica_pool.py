@@ -0,0 +1,30 @@
+"""Interchangeable copies of one model for concurrent CPU passes.
+
+An ORT session runs one call at a time efficiently only if its intra-op pool
+owns the cores; two requests sharing one nproc-wide session just contend. On
+CPU nodes (FACE_CPU_REPLICAS > 1) each model instead gets K replicas with a
+small thread budget each, and a pass runs on whichever replica is free, so
+throughput scales with cores rather than with one session's parallel
+efficiency. The pass scheduler gives each model stage K slots, so ``take``
+only waits if a caller bypasses it.
+"""
+
+import queue
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class ReplicaPool[T]:
+    def __init__(self, replicas: list[T]) -> None:
+        self._free: queue.SimpleQueue[T] = queue.SimpleQueue()
+        for replica in replicas:
+            self._free.put(replica)
+        self.size = len(replicas)
+
+    @contextmanager
+    def take(self) -> Iterator[T]:
+        replica = self._free.get()
+        try:
+            yield replica
+        finally:
+            self._free.put(replica)
@@ -20,6 +20,17 @@ Used two ways:
 
 The original graph is kept next to the model as ``<name>.onnx.bak`` so the
 conversion can be redone for a different ``det_size`` or rolled back.
+
+Optionally (``face_det_graph_decode`` / ``--decode``) a second graph is derived
+from the converted one and written next to it as ``<name>.onnx.dets``: the
+same network followed by anchor decoding, score thresholding, TopK and ONNX
+``NonMaxSuppression``, with one compact ``[N, max_dets, 15]`` output (box,
+score, 5 keypoints per row, zero-padded) instead of nine flat anchor maps.
+A second input ``det_scale`` ``[N]`` carries each image's letterbox scale,
+so NMS measures overlap the way the Python decode does — after rescaling.
+It is a sidecar rather than a further in-place rewrite because insightface
+recognizes a SCRFD graph by its nine outputs — the converted ``.onnx`` has to
+keep them for ``FaceAnalysis`` to load it as the detector at all.
 """
 
 from __future__ import annotations
@@ -32,9 +43,22 @@ if TYPE_CHECKING:
     from onnx import ModelProto
 
 ConvertOutcome = Literal["converted", "already_dynamic", "unsupported"]
+DecodeOutcome = Literal["written", "unchanged", "unsupported"]
 
 _BATCH_DIM_PARAM = "batch"
 
+DECODE_SUFFIX = ".dets"
+# Second input of the decode graph: each image's letterbox scale (detector
+# input px per original px), float32 [N].
+DECODE_SCALE_INPUT = "det_scale"
+# Head layout of the 9-output SCRFD family (det_10g, det_2.5g, ...), as
+# insightface's SCRFD._init_vars assumes it: scores, boxes and keypoints for
+# three FPN strides, two anchors per cell.
+_DECODE_STRIDES = (8, 16, 32)
+_DECODE_ANCHORS = 2
+_DECODE_CHANNELS = (1, 1, 1, 4, 4, 4, 10, 10, 10)
+_DECODE_MIN_OPSET = 11  # NonMaxSuppression, TopK with a k input, CumSum, ScatterND
+
 
 def _load_model(model_path: str) -> ModelProto:
     import onnx  # noqa: PLC0415
@@ -229,23 +253,7 @@ def convert_scrfd_to_dynamic_batch(
     A corrupt/truncated ``.bak`` degrades to converting from the live model
     instead of poisoning every startup.
     """
-    import onnx  # noqa: PLC0415
-    from google.protobuf.message import DecodeError  # type: ignore[import-untyped]  # noqa: PLC0415
-
-    backup_path = model_path + ".bak"
-    source_bytes: bytes | None = None
-    model = None
-    if os.path.exists(backup_path):
-        with open(backup_path, "rb") as f:
-            source_bytes = f.read()
-        try:
-            model = onnx.load_from_string(source_bytes)
-        except DecodeError:
-            source_bytes = None  # torn/corrupt backup — fall back to the live model
-    if model is None:
-        with open(model_path, "rb") as f:
-            source_bytes = f.read()
-        model = onnx.load_from_string(source_bytes)
+    model, source_bytes = read_source_model(model_path)
 
     dims = _input_dims(model)
     if dims is not None and dims[0].dim_value == 0:
@@ -255,18 +263,44 @@ def convert_scrfd_to_dynamic_batch(
 
     if not _rewrite_graph(model, det_size, uint8_input):
         return "unsupported"
+    return replace_model(model_path, source_bytes, model.SerializeToString())
 
-    serialized = model.SerializeToString()
+
+def read_source_model(model_path: str) -> tuple[ModelProto, bytes]:
+    """The graph a conversion starts from, and its bytes: the ``.bak``
+    original when one exists and parses, else the live model."""
+    import onnx  # noqa: PLC0415
+    from google.protobuf.message import DecodeError  # noqa: PLC0415
+
+    backup_path = model_path + ".bak"
+    if os.path.exists(backup_path):
+        with open(backup_path, "rb") as f:
+            source_bytes = f.read()
+        try:
+            return onnx.load_from_string(source_bytes), source_bytes
+        except DecodeError:
+            pass  # torn/corrupt backup — fall back to the live model
+    with open(model_path, "rb") as f:
+        source_bytes = f.read()
+    return onnx.load_from_string(source_bytes), source_bytes
+
+
+def replace_model(model_path: str, source_bytes: bytes, serialized: bytes) -> ConvertOutcome:
+    """Swap the converted graph in for ``model_path``, publishing
+    ``source_bytes`` as the ``.bak`` first if there is none yet. Returns
+    "already_dynamic" without touching anything when the file already holds
+    ``serialized``."""
     with open(model_path, "rb") as f:
         if f.read() == serialized:
             return "already_dynamic"
 
+    backup_path = model_path + ".bak"
     if not os.path.exists(backup_path):
-        # Publish the pristine source bytes captured above — never a re-read of
-        # model_path, which a concurrently converting peer may have swapped
-        # already. os.link is atomic and create-only, so a peer's good backup
-        # can never be clobbered and readers never see a partial file.
-        assert source_bytes is not None
+        # Publish the pristine source bytes captured by read_source_model —
+        # never a re-read of model_path, which a concurrently converting peer
+        # may have swapped already. os.link is atomic and create-only, so a
+        # peer's good backup can never be clobbered and readers never see a
+        # partial file.
         tmp_bak = f"{backup_path}.tmp.{os.getpid()}"
         with open(tmp_bak, "wb") as f:
             f.write(source_bytes)
@@ -331,12 +365,328 @@ def validate_dynamic_batch(
                 raise AssertionError(msg)
 
 
+def _static_input_size(model: ModelProto) -> tuple[int, int] | None:
+    """(W, H) of a converted graph's input — float NCHW or uint8 NHWC — or
+    None unless it has a dynamic batch and static spatial dims."""
+    from onnx import TensorProto  # noqa: PLC0415
+
+    dims = _input_dims(model)
+    if dims is None or dims[0].dim_value != 0:
+        return None
+    if model.graph.input[0].type.tensor_type.elem_type == TensorProto.UINT8:
+        height, width = dims[1].dim_value, dims[2].dim_value
+    else:
+        height, width = dims[2].dim_value, dims[3].dim_value
+    if height <= 0 or width <= 0:
+        return None
+    return width, height
+
+
+def _append_decode(
+    model: ModelProto,
+    score_threshold: float,
+    iou_threshold: float,
+    max_dets: int,
+    pre_nms_top_k: int,
+) -> bool:
+    """Replace the nine flat head outputs of a converted graph with one
+    ``dets`` output ``[N, max_dets, 15]``. Returns False (graph untouched)
+    unless the graph is a converted 9-output SCRFD at opset >= 11.
+
+    Mirrors ``InsightFaceProvider._decode_det_output`` in detector-input
+    pixels (the caller divides by its letterbox scale): distance2bbox /
+    distance2kps with the same float32 arithmetic, ``score >= threshold``,
+    and greedy NMS with SCRFD's ``+1`` box convention. That ``+1`` is in
+    original-image pixels — the Python decode rescales before NMS — so
+    ``NonMaxSuppression`` gets boxes grown by ``det_scale`` detector pixels
+    (the new ``DECODE_SCALE_INPUT``), which gives the same IoU up to float
+    rounding; with a fixed one pixel, small faces in downscaled images would
+    overlap more in-graph and be suppressed where the Python path keeps
+    them. Rows come out by descending score; unused rows are all zero, so a
+    row is a detection iff its score is > 0. ``pre_nms_top_k`` bounds the
+    NMS input per image — the Python decode keeps every candidate, so
+    results only differ when more than that many anchors pass the threshold.
+    """
+    import numpy as np  # noqa: PLC0415
+    import onnx  # noqa: PLC0415
+    from onnx import TensorProto, helper, numpy_helper  # noqa: PLC0415
+
+    graph = model.graph
+    size = _static_input_size(model)
+    opset = max((op.version for op in model.opset_import if op.domain in ("", "ai.onnx")), default=0)
+    if size is None or opset < _DECODE_MIN_OPSET or len(graph.output) != len(_DECODE_CHANNELS):
+        return False
+    for out, chans in zip(graph.output, _DECODE_CHANNELS, strict=True):
+        out_dims = out.type.tensor_type.shape.dim
+        if len(out_dims) != 2 or out_dims[1].dim_value != chans:
+            return False
+
+    width, height = size
+    heads = [out.name for out in graph.output]
+    inits: list[Any] = []
+    nodes: list[Any] = []
+
+    def const(name: str, value: Any) -> str:
+        inits.append(numpy_helper.from_array(np.asarray(value), name=f"det_post_{name}"))
+        return f"det_post_{name}"
+
+    def node(op: str, inputs: list[str], name: str, **attrs: Any) -> str:
+        nodes.append(helper.make_node(op, inputs, [f"det_post_{name}"], name=f"det_post_{name}", **attrs))
+        return f"det_post_{name}"
+
+    sign = const("box_sign", np.array([-1, -1, 1, 1], dtype=np.float32))
+    scores_parts: list[str] = []
+    boxes_parts: list[str] = []
+    kps_parts: list[str] = []
+    for i, stride in enumerate(_DECODE_STRIDES):
+        # Anchor centers in the provider's (h, w, anchor) row order.
+        grid = np.mgrid[: height // stride, : width // stride]
+        centers = (np.stack((grid[1], grid[0]), axis=-1).astype(np.float32) * stride).reshape(-1, 2)
+        centers = np.repeat(centers, _DECODE_ANCHORS, axis=0)
+        k = centers.shape[0]
+        stride_c = const(f"stride{stride}", np.array(stride, dtype=np.float32))
+
+        scores_parts.append(node("Reshape", [heads[i], const(f"scores_shape{i}", np.array([-1, k]))], f"scores{i}"))
+        dist = node("Reshape", [heads[3 + i], const(f"box_shape{i}", np.array([-1, k, 4]))], f"box_dist{i}")
+        dist = node("Mul", [dist, stride_c], f"box_dist_px{i}")
+        signed = node("Mul", [dist, sign], f"box_signed{i}")
+        boxes_parts.append(node("Add", [const(f"box_centers{i}", np.tile(centers, 2)), signed], f"boxes{i}"))
+        kdist = node("Reshape", [heads[6 + i], const(f"kps_shape{i}", np.array([-1, k, 10]))], f"kps_dist{i}")
+        kdist = node("Mul", [kdist, stride_c], f"kps_dist_px{i}")
+        kps_parts.append(node("Add", [const(f"kps_centers{i}", np.tile(centers, 5)), kdist], f"kps{i}"))
+    total = sum((height // s) * (width // s) * _DECODE_ANCHORS for s in _DECODE_STRIDES)
+    top_k = min(pre_nms_top_k, total)
+
+    scores = node("Concat", scores_parts, "scores", axis=1)  # [N, K]
+    boxes = node("Concat", boxes_parts, "boxes", axis=1)  # [N, K, 4]
+    kps = node("Concat", kps_parts, "kps", axis=1)  # [N, K, 10]
+    score_col = node("Reshape", [scores, const("score_col_shape", np.array([-1, total, 1]))], "score_col")
+    rows = node("Concat", [boxes, score_col, kps], "rows", axis=2)  # [N, K, 15]
+    flat_rows_shape = const("flat_rows_shape", np.array([-1, 15]))
+
+    # Batch size and per-image row offsets, for gathering out of the
+    # flattened [N*K, 15] / [N*top_k, 15] tables (opset-11 Gather has no
+    # batch_dims).
+    shape = node("Shape", [scores], "shape")
+    n_scalar = node("Gather", [shape, const("zero", np.array(0))], "n", axis=0)
+    n_vec = node("Gather", [shape, const("zero_vec", np.array([0]))], "n_vec", axis=0)
+    image_ids = node("Range", [const("range_start", np.array(0)), n_scalar, const("one", np.array(1))], "image_ids")
+    col_shape = const("col_shape", np.array([-1, 1]))
+    image_col = node("Reshape", [image_ids, col_shape], "image_col")
+
+    top_scores, top_idx = "det_post_top_scores", "det_post_top_idx"
+    nodes.append(
+        helper.make_node(
+            "TopK",
+            [scores, const("top_k", np.array([top_k]))],
+            [top_scores, top_idx],
+            name="det_post_topk",
+            axis=1,
+        )
+    )
+    flat_idx = node("Add", [top_idx, node("Mul", [image_col, const("total", np.array(total))], "row_base")], "flat_idx")
+    cand = node("Gather", [node("Reshape", [rows, flat_rows_shape], "flat_rows"), flat_idx], "cand", axis=0)
+
+    nms_boxes = node(
+        "Slice",
+        [cand, const("box_start", np.array([0])), const("box_end", np.array([4])), const("last_axis", np.array([2]))],
+        "cand_boxes",
+    )
+    scale_col = node("Reshape", [DECODE_SCALE_INPUT, const("scale_shape", np.array([-1, 1, 1]))], "scale_col")
+    grow = node("Mul", [scale_col, const("plus_one", np.array([0, 0, 1, 1], dtype=np.float32))], "grow")
+    nms_boxes = node("Add", [nms_boxes, grow], "nms_boxes")
+    nms_scores = node("Reshape", [top_scores, const("nms_scores_shape", np.array([-1, 1, top_k]))], "nms_scores")
+    # score >= threshold: the largest float32 below it admits exactly the
+    # same scores whether the EP compares with > or >=.
+    admit = np.nextafter(np.float32(score_threshold), np.float32(0))
+    selected = node(
+        "NonMaxSuppression",
+        [
+            nms_boxes,
+            nms_scores,
+            const("max_dets", np.array([max_dets])),
+            const("iou", np.array([iou_threshold], dtype=np.float32)),
+            const("score", np.array([admit], dtype=np.float32)),
+        ],
+        "selected",
+    )  # [S, 3] of (image, class, candidate), by image then descending score
+
+    sel_image = node("Gather", [selected, const("image_col_idx", np.array(0))], "sel_image", axis=1)
+    sel_cand = node("Gather", [selected, const("cand_col_idx", np.array(2))], "sel_cand", axis=1)
+    sel_flat = node(
+        "Add", [node("Mul", [sel_image, const("top_k_n", np.array(top_k))], "sel_base"), sel_cand], "sel_flat"
+    )
+    kept = node("Gather", [node("Reshape", [cand, flat_rows_shape], "flat_cand"), sel_flat], "kept", axis=0)
+
+    # Slot of each kept row within its image: how many earlier rows share
+    # its image (exclusive CumSum over a one-hot of the image index).
+    sel_image_col = node("Reshape", [sel_image, col_shape], "sel_image_col")
+    onehot = node(
+        "Equal",
+        [sel_image_col, node("Reshape", [image_ids, const("row_shape", np.array([1, -1]))], "image_row")],
+        "onehot",
+    )
+    onehot = node("Cast", [onehot], "onehot_i64", to=TensorProto.INT64)
+    before = node("CumSum", [onehot, const("cumsum_axis", np.array(0))], "before", exclusive=1)
+    slot = node("GatherElements", [before, sel_image_col], "slot", axis=1)
+    scatter_idx = node("Concat", [sel_image_col, slot], "scatter_idx", axis=1)
+
+    out_shape = node("Concat", [n_vec, const("out_tail", np.array([max_dets, 15]))], "out_shape", axis=0)
+    empty = node(
+        "ConstantOfShape",
+        [out_shape],
+        "empty",
+        value=numpy_helper.from_array(np.zeros(1, dtype=np.float32)),
+    )
+    nodes.append(helper.make_node("ScatterND", [empty, scatter_idx, kept], ["dets"], name="det_post_dets"))
+
+    graph.initializer.extend(inits)
+    graph.node.extend(nodes)
+    graph.input.append(helper.make_tensor_value_info(DECODE_SCALE_INPUT, TensorProto.FLOAT, [_BATCH_DIM_PARAM]))
+    graph.ClearField("output")
+    graph.output.append(helper.make_tensor_value_info("dets", TensorProto.FLOAT, [_BATCH_DIM_PARAM, max_dets, 15]))
+    onnx.checker.check_model(model)
+    return True
+
+
+def export_decode_graph(
+    model_path: str,
+    score_threshold: float = 0.5,
+    iou_threshold: float = 0.4,
+    max_dets: int = 256,
+    pre_nms_top_k: int = 5000,
+) -> DecodeOutcome:
+    """Write ``model_path + DECODE_SUFFIX``: the converted detector at
+    ``model_path`` with decoding and NMS appended (see ``_append_decode``).
+
+    Derived from the live converted graph, so it follows every reconversion
+    (det_size, uint8 input) on the next startup. The sidecar is swapped in via
+    tmp + ``os.replace`` and left alone when it already holds the same bytes.
+    """
+    model = _load_model(model_path)
+    if max_dets <= 0 or not _append_decode(model, score_threshold, iou_threshold, max_dets, pre_nms_top_k):
+        return "unsupported"
+    serialized = model.SerializeToString()
+    decode_path = model_path + DECODE_SUFFIX
+    if os.path.exists(decode_path):
+        with open(decode_path, "rb") as f:
+            if f.read() == serialized:
+                return "unchanged"
+    tmp_path = f"{decode_path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(serialized)
+    os.replace(tmp_path, decode_path)
+    return "written"
+
+
+def _reference_decode(
+    net_outs: list[Any],
+    b: int,
+    size: tuple[int, int],
+    score_threshold: float,
+    iou_threshold: float,
+    det_scale: float = 1.0,
+) -> tuple[Any, Any]:
+    """Image ``b`` of a batched raw forward pass, decoded the way
+    ``InsightFaceProvider._decode_det_output`` does: insightface's
+    distance2bbox/distance2kps, rescaled by ``det_scale``, then SCRFD.nms —
+    so in original-image pixels."""
+    import numpy as np  # noqa: PLC0415
+    from insightface.model_zoo.scrfd import (  # type: ignore[import-untyped] # noqa: PLC0415
+        distance2bbox,
+        distance2kps,
+    )
+
+    width, height = size
+    scores_list, bboxes_list, kpss_list = [], [], []
+    for i, stride in enumerate(_DECODE_STRIDES):
+        grid = np.mgrid[: height // stride, : width // stride]
+        centers = (np.stack((grid[1], grid[0]), axis=-1).astype(np.float32) * stride).reshape(-1, 2)
+        centers = np.repeat(centers, _DECODE_ANCHORS, axis=0)
+        rows = slice(b * centers.shape[0], (b + 1) * centers.shape[0])
+        pos = np.where(net_outs[i][rows] >= score_threshold)[0]
+        scores_list.append(net_outs[i][rows][pos])
+        bboxes_list.append(distance2bbox(centers[pos], net_outs[3 + i][rows][pos] * stride))
+        kpss_list.append(distance2kps(centers[pos], net_outs[6 + i][rows][pos] * stride))
+    scores = np.vstack(scores_list)
+    order = scores.ravel().argsort()[::-1]
+    pre_det = np.hstack((np.vstack(bboxes_list) / det_scale, scores)).astype(np.float32, copy=False)[order]
+    kpss = np.vstack(kpss_list)[order] / det_scale
+
+    x1, y1, x2, y2 = pre_det[:, 0], pre_det[:, 1], pre_det[:, 2], pre_det[:, 3]
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    remaining = np.arange(pre_det.shape[0])
+    keep = []
+    while remaining.size > 0:
+        i, rest = remaining[0], remaining[1:]
+        keep.append(i)
+        w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]) + 1)
+        h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]) + 1)
+        inter = w * h
+        remaining = rest[inter / (areas[i] + areas[rest] - inter) <= iou_threshold]
+    return pre_det[keep], kpss[keep]
+
+
+def validate_decode_graph(
+    converted_path: str,
+    decode_path: str,
+    score_threshold: float = 0.5,
+    iou_threshold: float = 0.4,
+    batch: int = 3,
+    atol: float = 1e-3,
+) -> None:
+    """Check the decode graph against the Python decode of the raw graph.
+
+    Runs both graphs on the same random batch, with letterbox scales spread
+    from 1 down to 1/4, decodes each image of the raw outputs with
+    ``_reference_decode`` and compares it with that image's non-empty
+    ``dets`` rows, rescaled as the provider does; raises ``AssertionError``
+    on a different detection count or any value beyond ``atol`` (original-image
+    pixels).
+    """
+    import numpy as np  # noqa: PLC0415
+    import onnxruntime as ort  # noqa: PLC0415
+
+    rng = np.random.default_rng(0)
+    raw = ort.InferenceSession(converted_path, providers=["CPUExecutionProvider"])
+    dec = ort.InferenceSession(decode_path, providers=["CPUExecutionProvider"])
+    input_cfg = raw.get_inputs()[0]
+    size = _static_input_size(_load_model(converted_path))
+    assert size is not None, "not a converted dynamic-batch graph"
+
+    blob: Any
+    if input_cfg.type == "tensor(uint8)":
+        blob = rng.integers(0, 256, size=(batch, *input_cfg.shape[1:]), dtype=np.uint8)
+    else:
+        blob = rng.standard_normal((batch, *input_cfg.shape[1:]), dtype=np.float32)
+
+    det_scales = np.linspace(1.0, 0.25, batch, dtype=np.float32)
+    net_outs = raw.run(None, {input_cfg.name: blob})
+    (dets,) = dec.run(None, {dec.get_inputs()[0].name: blob, DECODE_SCALE_INPUT: det_scales})
+    for b in range(batch):
+        scale = det_scales[b]
+        ref_det, ref_kps = _reference_decode(net_outs, b, size, score_threshold, iou_threshold, float(scale))
+        live = dets[b][dets[b][:, 4] > 0]
+        got = np.hstack((live[:, :4] / scale, live[:, 4:5], live[:, 5:] / scale))
+        if got.shape[0] != ref_det.shape[0]:
+            msg = f"image {b}: {got.shape[0]} detections in-graph, {ref_det.shape[0]} from the Python decode"
+            raise AssertionError(msg)
+        expected = np.hstack((ref_det, ref_kps.reshape(ref_kps.shape[0], -1)))
+        if not np.allclose(got, expected, atol=atol):
+            max_diff = float(np.max(np.abs(got - expected)))
+            msg = f"image {b}: detections mismatch, max diff {max_diff}"
+            raise AssertionError(msg)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Re-export a SCRFD ONNX graph with a dynamic batch dimension")
     parser.add_argument("model", help="Path to the SCRFD .onnx file (converted in place, original kept as .bak)")
     parser.add_argument("--det-size", default="640,640", help="Static spatial size W,H to bake in (default: 640,640)")
     parser.add_argument("--validate", action="store_true", help="Compare converted outputs against the original")
     parser.add_argument("--uint8", action="store_true", help="Bake normalization into the graph (uint8 BGR input)")
+    parser.add_argument(
+        "--decode", action="store_true", help=f"Also write the in-graph decode + NMS sidecar (<model>{DECODE_SUFFIX})"
+    )
     args = parser.parse_args()
 
     width, height = (int(part.strip()) for part in args.det_size.split(","))
@@ -347,6 +697,14 @@ def main() -> None:
     if args.validate:
         validate_dynamic_batch(args.model + ".bak", args.model, det_size=(width, height))
         print("validation passed: batched outputs match per-image originals")
+    if args.decode:
+        decode_outcome = export_decode_graph(args.model)
+        print(f"{args.model}{DECODE_SUFFIX}: {decode_outcome}")
+        if decode_outcome == "unsupported":
+            raise SystemExit(1)
+        if args.validate:
+            validate_decode_graph(args.model, args.model + DECODE_SUFFIX)
+            print("validation passed: in-graph detections match the Python decode")
 
 
 if __name__ == "__main__":
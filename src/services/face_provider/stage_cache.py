@@ -0,0 +1,60 @@
+"""Short-lived cache of per-image detection output inside the provider.
+
+Clients commonly call /faces/detect and then /faces/embed or /faces/analyze
+on the same image. Each call otherwise decodes the image and runs the
+detector (plus the pad-to-square retry) again. The provider keeps the
+detection stage output — the working image, bboxes, keypoints, pad offsets —
+keyed by image digest, so the follow-up only runs recognition / genderage.
+
+Entries hold the decoded working image, so they are large (~6 MB for a
+1080p frame): the cache is bounded by an LRU byte budget and a short TTL.
+Provider calls run in worker threads, so every access takes a lock.
+Cached arrays are shared between callers and must be treated as read-only.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class StageCache[V: tuple[object, ...]]:
+    def __init__(self, max_bytes: int, *, ttl_s: float) -> None:
+        self._max_bytes = max_bytes
+        self._ttl_s = ttl_s
+        self._lock = threading.Lock()
+        # digest -> (expires_at, size, value), least recently used first.
+        self._entries: OrderedDict[bytes, tuple[float, int, V]] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: bytes) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def put(self, key: bytes, value: V) -> None:
+        """Store ``value``; its size is the sum of the numpy arrays in it."""
+        size = sum(item.nbytes for item in value if isinstance(item, np.ndarray))
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self._ttl_s, size, value)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: bytes) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
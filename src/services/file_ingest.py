@@ -0,0 +1,52 @@
+"""Server-side reads of images from a shared volume.
+
+Co-located producers that already wrote an image to disk otherwise
+base64-encode the same file into the request: a third more bytes on the
+wire, a request body held in memory, and a base64 decode before the real
+decode. With FACE_INGEST_ROOT set, JSON image items may instead name a file
+under that root (``image_path``); the service reads it with one bulk read
+and the bytes go to the provider exactly as an upload would.
+
+Paths are resolved (symlinks included) before the check, so ``..`` and links
+cannot escape the root.
+"""
+
+import os
+from pathlib import Path
+
+
+class IngestPathError(Exception):
+    pass
+
+
+class FileIngestor:
+    def __init__(self, root: str, *, max_bytes: int) -> None:
+        self._root = Path(root).expanduser().resolve()
+        self._max_bytes = max_bytes
+
+    def resolve(self, path: str) -> Path:
+        """``path`` (relative to the root, or absolute inside it) as a real path."""
+        resolved = (self._root / path).resolve()
+        if not resolved.is_relative_to(self._root):
+            msg = f"Image path is outside the ingest root: {path}"
+            raise IngestPathError(msg)
+        return resolved
+
+    def read(self, path: str) -> bytes:
+        resolved = self.resolve(path)
+        try:
+            # Unbuffered: read() sizes one buffer from fstat and fills it in a
+            # single readall, with no intermediate copy.
+            with resolved.open("rb", buffering=0) as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > self._max_bytes:
+                    msg = f"Image file exceeds {self._max_bytes} bytes: {path}"
+                    raise IngestPathError(msg)
+                data = f.read()
+        except OSError as exc:
+            msg = f"Cannot read image file {path}: {exc.strerror}"
+            raise IngestPathError(msg) from None
+        if not data:
+            msg = f"Empty image file: {path}"
+            raise IngestPathError(msg)
+        return data
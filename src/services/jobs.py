@@ -0,0 +1,334 @@
+"""Asynchronous jobs for batches too large for one request.
+
+Synchronous batches are capped at FACE_MAX_BATCH_SIZE images and hold an HTTP
+connection — and the whole payload — for their full duration. A job is
+spooled to disk on submission instead: every image is appended to one data
+file with an offset index next to it. A single background worker then feeds
+the images to the provider ``chunk_size`` at a time, at bulk priority, and
+writes each chunk's results to the spool as one NDJSON file. Neither the
+upload nor the results are ever held in memory whole. Job state lives in the
+spool too, so queued and partly processed jobs resume after a restart.
+
+Layout of ``<root>/<job_id>/``: ``images.bin`` + ``images.idx.npy`` (int64
+offsets, ``total_images + 1`` of them), ``job.json``, ``results/NNNNNN.ndjson``.
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Literal
+
+import numpy as np
+import structlog
+
+from src.services.request_context import current_priority
+
+logger = structlog.get_logger()
+
+JobStatus = Literal["queued", "running", "completed", "failed"]
+
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+_META = "job.json"
+_DATA = "images.bin"
+_INDEX = "images.idx.npy"
+_RESULTS = "results"
+# How often an idle worker looks for expired jobs to delete.
+_PRUNE_INTERVAL_S = 60.0
+# add_file copies in reads of this size, counting against the byte limits.
+_COPY_CHUNK = 1 << 20
+
+
+@dataclass(slots=True)
+class Job:
+    job_id: str
+    operation: str
+    # Operation options (pose, pose_mode, embedding_format, fields), passed back to the processor.
+    options: dict[str, Any]
+    chunk_size: int
+    total_images: int = 0
+    processed_images: int = 0
+    total_faces: int = 0
+    status: JobStatus = "queued"
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def result_chunks(self) -> int:
+        """Result files written so far; chunk ``n`` holds images
+        ``[n * chunk_size, (n + 1) * chunk_size)``."""
+        return -(-self.processed_images // self.chunk_size)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+
+class JobNotFoundError(Exception):
+    """No committed job (or result chunk) with this id."""
+
+
+class JobTooLargeError(Exception):
+    """An image, or the job as a whole, is past its byte limit. Raised while
+    the image is being written, so the writer must then be aborted."""
+
+
+class JobSpool:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _dir(self, job_id: str) -> Path:
+        if not _JOB_ID.fullmatch(job_id):
+            raise JobNotFoundError(job_id)
+        return self.root / job_id
+
+    def create(
+        self,
+        operation: str,
+        options: dict[str, Any],
+        chunk_size: int,
+        *,
+        max_image_bytes: int = 0,
+        max_bytes: int = 0,
+    ) -> "JobWriter":
+        job = Job(uuid.uuid4().hex, operation, options, max(1, chunk_size))
+        (self._dir(job.job_id) / _RESULTS).mkdir(parents=True)
+        return JobWriter(self, job, max_image_bytes=max_image_bytes, max_bytes=max_bytes)
+
+    def scratch(self) -> IO[bytes]:
+        """An anonymous temp file on the spool's disk, for upload data that
+        has to land somewhere before its job can be created."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        return tempfile.TemporaryFile(dir=self.root)
+
+    def load(self, job_id: str) -> Job:
+        try:
+            meta = json.loads((self._dir(job_id) / _META).read_bytes())
+        except FileNotFoundError:
+            raise JobNotFoundError(job_id) from None
+        return Job(**meta)
+
+    def save(self, job: Job) -> None:
+        _write_atomic(self._dir(job.job_id) / _META, json.dumps(dataclasses.asdict(job)).encode())
+
+    def job_ids(self) -> list[str]:
+        """Committed jobs, oldest first."""
+        if not self.root.is_dir():
+            return []
+        jobs = [self.load(d.name) for d in self.root.iterdir() if (d / _META).is_file()]
+        return [j.job_id for j in sorted(jobs, key=lambda j: j.created_at)]
+
+    def read_images(self, job_id: str, start: int, stop: int) -> list[bytes]:
+        job_dir = self._dir(job_id)
+        offsets = np.load(job_dir / _INDEX, mmap_mode="r")[start : stop + 1].tolist()
+        with (job_dir / _DATA).open("rb") as f:
+            f.seek(offsets[0])
+            data = f.read(offsets[-1] - offsets[0])
+        base = offsets[0]
+        return [data[a - base : b - base] for a, b in zip(offsets, offsets[1:], strict=False)]
+
+    def write_results(self, job: Job, payload: bytes) -> None:
+        """Store the results of the chunk starting at ``job.processed_images``.
+        Advancing ``processed_images`` (and saving) is the caller's move, so a
+        crash in between only means the chunk is processed again."""
+        chunk = job.processed_images // job.chunk_size
+        _write_atomic(self._dir(job.job_id) / _RESULTS / f"{chunk:06d}.ndjson", payload)
+
+    def results_path(self, job_id: str, chunk: int) -> Path:
+        path = self._dir(job_id) / _RESULTS / f"{chunk:06d}.ndjson"
+        if chunk < 0 or not path.is_file():
+            raise JobNotFoundError(job_id)
+        return path
+
+    def delete(self, job_id: str) -> None:
+        shutil.rmtree(self._dir(job_id), ignore_errors=True)
+
+    def prune(self, ttl_s: float) -> None:
+        """Delete jobs finished more than ``ttl_s`` ago, and uploads that were
+        never committed (the process died mid-submission)."""
+        if not self.root.is_dir():
+            return
+        now = time.time()
+        for job_dir in self.root.iterdir():
+            if not _JOB_ID.fullmatch(job_dir.name):
+                continue
+            try:
+                job = self.load(job_dir.name)
+            except JobNotFoundError:
+                if now - job_dir.stat().st_mtime > ttl_s:
+                    self.delete(job_dir.name)
+                continue
+            if job.finished_at is not None and now - job.finished_at > ttl_s:
+                self.delete(job.job_id)
+
+
+class JobWriter:
+    """Appends a new job's images to its spool. The job becomes visible (to
+    ``load`` and the worker) only once ``commit`` has written its metadata;
+    ``abort`` discards the upload.
+
+    Raises JobTooLargeError once an image passes ``max_image_bytes`` or the
+    images together pass ``max_bytes`` (0 = no limit) — counted as they are
+    copied, so an archive member that inflates without end stops there.
+    """
+
+    def __init__(self, spool: JobSpool, job: Job, *, max_image_bytes: int = 0, max_bytes: int = 0) -> None:
+        self.job = job
+        self.max_bytes = max_bytes
+        self._max_image_bytes = max_image_bytes
+        self._spool = spool
+        self._dir = spool.root / job.job_id
+        self._data = (self._dir / _DATA).open("wb")
+        self._offsets = [0]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def upload_path(self) -> Path:
+        """Scratch file for a raw archive body before it is unpacked."""
+        return self._dir / "upload"
+
+    def _check_size(self, image_size: int) -> None:
+        if self._max_image_bytes and image_size > self._max_image_bytes:
+            msg = f"Job image exceeds {self._max_image_bytes} bytes"
+            raise JobTooLargeError(msg)
+        if self.max_bytes and self._offsets[-1] + image_size > self.max_bytes:
+            msg = f"Job images exceed {self.max_bytes} bytes"
+            raise JobTooLargeError(msg)
+
+    def add(self, image: bytes) -> None:
+        self._check_size(len(image))
+        self._data.write(image)
+        self._offsets.append(self._offsets[-1] + len(image))
+
+    def extend(self, images: Iterable[bytes]) -> None:
+        for image in images:
+            self.add(image)
+
+    def add_file(self, src: IO[bytes]) -> None:
+        size = 0
+        while chunk := src.read(_COPY_CHUNK):
+            size += len(chunk)
+            self._check_size(size)
+            self._data.write(chunk)
+        self._offsets.append(self._offsets[-1] + size)
+
+    def commit(self) -> Job:
+        self._data.close()
+        self.upload_path.unlink(missing_ok=True)
+        np.save(self._dir / _INDEX, np.asarray(self._offsets, dtype=np.int64))
+        self.job.total_images = len(self)
+        self._spool.save(self.job)
+        return self.job
+
+    def abort(self) -> None:
+        self._data.close()
+        self._spool.delete(self.job.job_id)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+# Runs one chunk of a job: (job, images, index of the first image) ->
+# (NDJSON result lines, faces found).
+JobProcessor = Callable[[Job, list[bytes], int], Awaitable[tuple[bytes, int]]]
+
+
+class JobWorker:
+    """Runs committed jobs one at a time, in submission order.
+
+    Chunks go through ``process`` at bulk priority, so a running job yields to
+    interactive requests at admission and at every model pass. A failing chunk
+    fails its job; the worker moves on to the next one.
+    """
+
+    def __init__(self, spool: JobSpool, process: JobProcessor, *, ttl_s: float) -> None:
+        self.spool = spool
+        self._process = process
+        self._ttl_s = ttl_s
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._current: str | None = None
+        self._deleted: set[str] = set()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start the worker, re-queueing jobs left unfinished by a restart."""
+        for job_id in self.spool.job_ids():
+            if not self.spool.load(job_id).finished:
+                self._queue.put_nowait(job_id)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop after cancelling the chunk in progress. Its job stays
+        ``running`` in the spool and resumes from that chunk on restart."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def submit(self, job: Job) -> None:
+        self._queue.put_nowait(job.job_id)
+
+    async def delete(self, job_id: str) -> None:
+        """Delete a job and its results; a running job stops after its current chunk."""
+        await asyncio.to_thread(self.spool.load, job_id)
+        if job_id == self._current:
+            self._deleted.add(job_id)
+        else:
+            await asyncio.to_thread(self.spool.delete, job_id)
+
+    async def _run(self) -> None:
+        current_priority.set("bulk")
+        while True:
+            try:
+                async with asyncio.timeout(_PRUNE_INTERVAL_S):
+                    job_id = await self._queue.get()
+            except TimeoutError:
+                await asyncio.to_thread(self.spool.prune, self._ttl_s)
+                continue
+            await self._run_job(job_id)
+
+    async def _run_job(self, job_id: str) -> None:
+        try:
+            job = self.spool.load(job_id)
+        except JobNotFoundError:
+            return  # deleted while queued
+        self._current = job_id
+        try:
+            job.status = "running"
+            await asyncio.to_thread(self.spool.save, job)
+            while job.processed_images < job.total_images and job_id not in self._deleted:
+                start = job.processed_images
+                stop = min(start + job.chunk_size, job.total_images)
+                images = await asyncio.to_thread(self.spool.read_images, job_id, start, stop)
+                payload, faces = await self._process(job, images, start)
+                await asyncio.to_thread(self.spool.write_results, job, payload)
+                job.processed_images = stop
+                job.total_faces += faces
+                if stop == job.total_images:
+                    job.status, job.finished_at = "completed", time.time()
+                await asyncio.to_thread(self.spool.save, job)
+        except Exception as exc:
+            logger.exception("job_failed", job_id=job_id)
+            job.status, job.error, job.finished_at = "failed", str(exc) or type(exc).__name__, time.time()
+            await asyncio.to_thread(self.spool.save, job)
+        finally:
+            self._current = None
+            if job_id in self._deleted:
+                self._deleted.discard(job_id)
+                await asyncio.to_thread(self.spool.delete, job_id)
@@ -0,0 +1,38 @@
+"""Per-request scheduling attributes, visible from provider threads.
+
+Endpoints bind them once per request; ``asyncio.to_thread`` copies the
+current context, so the provider's pass scheduler sees the values of the
+request whose chunk it is about to run without any signature changes.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Literal
+
+# interactive: latency-sensitive lookups. bulk: throughput work (re-embedding
+# jobs) that yields to interactive work at admission and at chunk boundaries.
+Priority = Literal["interactive", "bulk"]
+
+PRIORITY_RANK: dict[Priority, int] = {"interactive": 0, "bulk": 1}
+
+current_priority: ContextVar[Priority] = ContextVar("face_request_priority", default="interactive")
+
+# Absolute time.monotonic() deadline; None = no deadline.
+current_deadline: ContextVar[float | None] = ContextVar("face_request_deadline", default=None)
+
+
+class DeadlineExceededError(Exception):
+    """The request's deadline passed before its next unit of work started."""
+
+
+def remaining_s() -> float | None:
+    deadline = current_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceededError if the current request is out of time. Called
+    before each model pass so abandoned requests stop costing GPU time."""
+    remaining = remaining_s()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceededError
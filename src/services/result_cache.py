@@ -0,0 +1,103 @@
+"""Content-addressed cache of provider results.
+
+Clients re-submit the same images — an avatar, an ID photo checked again —
+and each copy otherwise pays decode, detection and recognition in full.
+Results are keyed by a BLAKE2b digest of the encoded image bytes plus a
+caller-supplied namespace (route, options, model config), held in LRU order
+under a byte budget, and expire after ``ttl_s``. Only the event loop touches
+the cache; digests are computed wherever the bytes are (``digest`` is
+thread-safe and releases the GIL on large inputs).
+"""
+
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from prometheus_client import Counter, Gauge
+
+from src.services.face_provider.base import DetectedFace
+
+_HITS = Counter("face_result_cache_hits", "Images answered from the result cache")
+_MISSES = Counter("face_result_cache_misses", "Images the result cache had no entry for")
+_EVICTIONS = Counter("face_result_cache_evictions", "Result cache entries evicted for space")
+_BYTES = Gauge("face_result_cache_bytes", "Estimated size of the cached results")
+
+# Rough per-object sizes for the estimate below: a DetectedFace with its bbox,
+# a float in a list (object + pointer), a landmark point (tuple of two floats).
+_FACE_BYTES = 200
+_FLOAT_BYTES = 32
+_POINT_BYTES = 120
+
+
+def digest(image_bytes: bytes) -> bytes:
+    return hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+
+def _nbytes(faces: list[DetectedFace]) -> int:
+    size = sys.getsizeof(faces)
+    for face in faces:
+        size += _FACE_BYTES
+        if face.embedding is not None:
+            size += len(face.embedding) * _FLOAT_BYTES
+        if face.embedding_packed is not None:
+            size += len(face.embedding_packed)
+        if face.landmarks is not None:
+            size += len(face.landmarks) * _POINT_BYTES
+        if face.race_probs is not None:
+            size += sys.getsizeof(face.race_probs)
+    return size
+
+
+class ResultCache:
+    """LRU + TTL map from (namespace, digest) to one image's faces.
+
+    Cached face lists are shared between hits: callers must not mutate them.
+    """
+
+    def __init__(self, max_bytes: int, *, ttl_s: float) -> None:
+        self._max_bytes = max_bytes
+        self._ttl_s = ttl_s
+        # key -> (expires_at, size, faces), least recently used first.
+        self._entries: OrderedDict[tuple[Hashable, bytes], tuple[float, int, list[DetectedFace]]] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, namespace: Hashable, image_digest: bytes) -> list[DetectedFace] | None:
+        key = (namespace, image_digest)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            _MISSES.inc()
+            return None
+        self._entries.move_to_end(key)
+        _HITS.inc()
+        return entry[2]
+
+    def put(self, namespace: Hashable, image_digest: bytes, faces: list[DetectedFace]) -> None:
+        size = _nbytes(faces)
+        if size > self._max_bytes:
+            return
+        key = (namespace, image_digest)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self._ttl_s, size, faces)
+        self._bytes += size
+        while self._bytes > self._max_bytes:
+            self._remove(next(iter(self._entries)))
+            _EVICTIONS.inc()
+        _BYTES.set(self._bytes)
+
+    def _remove(self, key: tuple[Hashable, bytes]) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        _BYTES.set(self._bytes)
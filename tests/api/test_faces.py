@@ -1,6 +1,31 @@
+import asyncio
 import base64
-
+import json
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
+
+import cv2  # type: ignore[import-untyped]
+import msgpack  # type: ignore[import-untyped]
+import numpy as np
+import pyarrow as pa  # type: ignore[import-untyped]
+import pytest
+from fastapi.testclient import TestClient
 from httpx import AsyncClient
+from src.api import inference
+from src.api.endpoints import faces as faces_endpoint
+from src.config import settings
+from src.main import app
+from src.services.admission import AdmissionController
+from src.services.coalescer import BatchFn, RequestCoalescer
+from src.services.face_provider.base import DetectedFace, FaceFields, PoseMode
+from src.services.face_provider.embedding_codec import encode_embeddings
+from src.services.file_ingest import FileIngestor
+from src.services.result_cache import ResultCache
+from starlette.websockets import WebSocketDisconnect
+
+from tests.conftest import FakeFaceProvider
 
 # A valid 1x1 red PNG for testing
 _TINY_PNG = base64.b64encode(
@@ -143,3 +168,779 @@ async def test_batch_exceeds_max_size(client: AsyncClient) -> None:
     images = [{"image_b64": _TINY_PNG}] * 65  # default max is 64
     resp = await client.post("/faces/detect/batch", json={"images": images})
     assert resp.status_code == 400
+
+
+# --- Raw-body uploads ---
+
+_TINY_PNG_BYTES = base64.b64decode(_TINY_PNG)
+
+
+async def test_detect_octet_stream(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/detect",
+        content=_TINY_PNG_BYTES,
+        headers={"content-type": "application/octet-stream"},
+        params={"pose": "true"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["face_count"] == 1
+
+
+async def test_embed_octet_stream(client: AsyncClient) -> None:
+    resp = await client.post("/faces/embed", content=_TINY_PNG_BYTES, headers={"content-type": "image/png"})
+    assert resp.status_code == 200
+    assert len(resp.json()["faces"][0]["embedding"]) == 512
+
+
+async def test_octet_stream_empty_body(client: AsyncClient) -> None:
+    resp = await client.post("/faces/analyze", content=b"", headers={"content-type": "application/octet-stream"})
+    assert resp.status_code == 400
+
+
+async def test_octet_stream_invalid_query_option(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/detect",
+        content=_TINY_PNG_BYTES,
+        headers={"content-type": "application/octet-stream"},
+        params={"pose": "maybe"},
+    )
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"] == ["query", "pose"]
+
+
+async def test_detect_pose_mode_forwarded(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    provider = app.state.face_provider
+    modes: list[object] = []
+    detect = provider.detect
+
+    def _detect(*args: object, **kwargs: object) -> list[DetectedFace]:
+        modes.append(kwargs.get("pose_mode"))
+        return detect(*args, **kwargs)  # type: ignore[no-any-return]
+
+    monkeypatch.setattr(provider, "detect", _detect)
+    resp = await client.post("/faces/detect", json={"image_b64": _TINY_PNG, "pose": True, "pose_mode": "fast"})
+    assert resp.status_code == 200
+    resp = await client.post("/faces/detect", json={"image_b64": _TINY_PNG, "pose": True})
+    assert resp.status_code == 200
+    assert modes == ["fast", "model"]
+
+
+async def test_detect_invalid_pose_mode(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/detect",
+        content=_TINY_PNG_BYTES,
+        headers={"content-type": "application/octet-stream"},
+        params={"pose": "true", "pose_mode": "approximate"},
+    )
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"] == ["query", "pose_mode"]
+
+
+async def test_json_body_still_validated(client: AsyncClient) -> None:
+    resp = await client.post("/faces/detect", json={"pose": True})
+    assert resp.status_code == 422
+    # No image source: image_b64 or image_path.
+    assert resp.json()["detail"][0]["loc"] == ["body"]
+    assert "image_b64" in resp.json()["detail"][0]["msg"]
+
+
+async def test_detect_batch_multipart(client: AsyncClient) -> None:
+    files = [("images", ("a.png", _TINY_PNG_BYTES, "image/png")), ("images", ("b.png", _TINY_PNG_BYTES, "image/png"))]
+    resp = await client.post("/faces/detect/batch", files=files, data={"pose": "true"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total_faces"] == 2
+    assert [item["index"] for item in data["results"]] == [0, 1]
+
+
+async def test_embed_batch_multipart_empty_part(client: AsyncClient) -> None:
+    files = [("images", ("a.png", _TINY_PNG_BYTES, "image/png")), ("images", ("b.png", b"", "image/png"))]
+    resp = await client.post("/faces/embed/batch", files=files)
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert results[0]["error"] is None
+    assert results[1]["error"] is not None
+
+
+async def test_batch_multipart_exceeds_max_size(client: AsyncClient) -> None:
+    files = [("images", (f"{i}.png", _TINY_PNG_BYTES, "image/png")) for i in range(65)]
+    resp = await client.post("/faces/analyze/batch", files=files)
+    assert resp.status_code == 400
+
+
+# --- Embedding formats ---
+
+
+async def test_embed_float_list_has_no_scale(client: AsyncClient) -> None:
+    resp = await client.post("/faces/embed", json={"image_b64": _TINY_PNG})
+    face = resp.json()["faces"][0]
+    assert "embedding_scale" not in face
+
+
+async def test_embed_f32_b64(client: AsyncClient) -> None:
+    resp = await client.post("/faces/embed", json={"image_b64": _TINY_PNG, "embedding_format": "f32_b64"})
+    assert resp.status_code == 200
+    face = resp.json()["faces"][0]
+    vec = np.frombuffer(base64.b64decode(face["embedding"]), dtype="<f4")
+    assert vec.shape == (512,)
+    np.testing.assert_allclose(vec, 0.1, rtol=1e-6)
+
+
+async def test_embed_batch_int8_b64(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/embed/batch",
+        json={"images": [{"image_b64": _TINY_PNG}], "embedding_format": "int8_b64"},
+    )
+    face = resp.json()["results"][0]["faces"][0]
+    q = np.frombuffer(base64.b64decode(face["embedding"]), dtype=np.int8)
+    np.testing.assert_allclose(q * face["embedding_scale"], 0.1, rtol=1e-6)
+
+
+async def test_analyze_f16_b64_octet_stream(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/analyze",
+        content=_TINY_PNG_BYTES,
+        headers={"content-type": "application/octet-stream"},
+        params={"embedding_format": "f16_b64"},
+    )
+    face = resp.json()["faces"][0]
+    assert len(base64.b64decode(face["embedding"])) == 1024
+    assert face["gender"] == "male"
+
+
+async def test_embed_unknown_format_rejected(client: AsyncClient) -> None:
+    resp = await client.post("/faces/embed", json={"image_b64": _TINY_PNG, "embedding_format": "f64"})
+    assert resp.status_code == 422
+
+
+# --- Response formats (Accept) ---
+
+
+async def test_embed_msgpack(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/embed",
+        json={"image_b64": _TINY_PNG, "embedding_format": "f32_b64"},
+        headers={"accept": "application/msgpack"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(resp.content)
+    assert data["face_count"] == 1
+    face = data["faces"][0]
+    assert face["bbox"] == {"x": 10.0, "y": 20.0, "width": 100.0, "height": 120.0}
+    np.testing.assert_allclose(np.frombuffer(face["embedding"], dtype="<f4"), 0.1, rtol=1e-6)
+
+
+async def test_detect_batch_msgpack_with_error(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/detect/batch",
+        json={"images": [{"image_b64": _TINY_PNG}, {"image_b64": _INVALID_B64}]},
+        headers={"accept": "application/x-msgpack"},
+    )
+    data = msgpack.unpackb(resp.content)
+    assert data["total_faces"] == 1
+    assert data["results"][0]["face_count"] == 1
+    assert data["results"][1]["error"] is not None
+
+
+async def test_embed_batch_arrow(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/embed/batch",
+        json={"images": [{"image_b64": _TINY_PNG}, {"image_b64": _INVALID_B64}, {"image_b64": _TINY_PNG}]},
+        headers={"accept": "application/vnd.apache.arrow.stream"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(resp.content).read_all()
+    assert table.num_rows == 3
+    assert table.column("face_count").to_pylist() == [1, 0, 1]
+    assert table.column("error").to_pylist()[1] is not None
+    embeddings = table.column("embedding").combine_chunks()
+    assert embeddings.type.value_type == pa.list_(pa.float32(), 512)
+    assert embeddings.offsets.to_pylist() == [0, 1, 1, 2]
+    matrix = embeddings.flatten().flatten().to_numpy().reshape(-1, 512)
+    np.testing.assert_allclose(matrix, 0.1, rtol=1e-6)
+
+
+async def test_analyze_arrow_int8(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/analyze",
+        json={"image_b64": _TINY_PNG, "embedding_format": "int8_b64"},
+        headers={"accept": "application/vnd.apache.arrow.stream"},
+    )
+    row = pa.ipc.open_stream(resp.content).read_all().to_pylist()[0]
+    assert row["gender"] == ["male"]
+    q = np.asarray(row["embedding"][0], dtype=np.int8)
+    np.testing.assert_allclose(q * row["embedding_scale"][0], 0.1, rtol=1e-6)
+
+
+async def test_accept_prefers_highest_quality(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/detect",
+        json={"image_b64": _TINY_PNG},
+        headers={"accept": "application/msgpack;q=0.5, application/json"},
+    )
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.json()["face_count"] == 1
+
+
+async def test_accept_q_zero_is_refused(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/detect", json={"image_b64": _TINY_PNG}, headers={"accept": "application/msgpack;q=0"}
+    )
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.json()["face_count"] == 1
+
+
+async def test_arrow_without_pyarrow_refused_before_inference(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.api.encoders._arrow_available", lambda: False)
+    provider = app.state.face_provider
+
+    def _never_run(*args: object, **kwargs: object) -> None:
+        raise AssertionError("provider ran for an unservable Accept")
+
+    monkeypatch.setattr(provider, "embed", _never_run)
+    monkeypatch.setattr(provider, "embed_batch", _never_run)
+    resp = await client.post(
+        "/faces/embed", json={"image_b64": _TINY_PNG}, headers={"accept": "application/vnd.apache.arrow.stream"}
+    )
+    assert resp.status_code == 406
+
+
+# --- Field projection (fields=) ---
+
+
+async def test_embed_fields_projection(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/embed", json={"image_b64": _TINY_PNG, "embedding_format": "int8_b64", "fields": "bbox,embedding"}
+    )
+    assert resp.status_code == 200
+    face = resp.json()["faces"][0]
+    assert set(face) == {"bbox", "embedding", "embedding_scale"}
+
+
+async def test_analyze_batch_fields_projection_query(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/analyze/batch",
+        files=[("images", ("a.png", _TINY_PNG_BYTES, "image/png"))],
+        params={"fields": "bbox,age,gender"},
+    )
+    data = resp.json()
+    assert data["total_faces"] == 1
+    assert data["results"][0]["faces"][0] == {
+        "bbox": {"x": 10.0, "y": 20.0, "width": 100.0, "height": 120.0},
+        "age": 25.0,
+        "gender": "male",
+    }
+
+
+async def test_fields_projection_msgpack_and_arrow(client: AsyncClient) -> None:
+    body = {"images": [{"image_b64": _TINY_PNG}], "fields": ["det_score"]}
+    resp = await client.post("/faces/analyze/batch", json=body, headers={"accept": "application/msgpack"})
+    assert msgpack.unpackb(resp.content)["results"][0]["faces"] == [{"det_score": pytest.approx(0.99)}]
+    resp = await client.post(
+        "/faces/analyze/batch", json=body, headers={"accept": "application/vnd.apache.arrow.stream"}
+    )
+    table = pa.ipc.open_stream(resp.content).read_all()
+    assert table.column_names == ["index", "face_count", "error", "det_score"]
+
+
+async def test_fields_projection_stream(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/embed/batch", json={"images": [{"image_b64": _TINY_PNG}], "stream": True, "fields": ["bbox"]}
+    )
+    (line,) = [json.loads(line) for line in resp.text.splitlines()]
+    assert set(line["faces"][0]) == {"bbox"}
+
+
+async def test_unknown_field_rejected(client: AsyncClient) -> None:
+    resp = await client.post("/faces/detect", json={"image_b64": _TINY_PNG, "fields": "bbox,nose"})
+    assert resp.status_code == 422
+
+
+# --- Streaming (stream=true) ---
+
+
+async def test_embed_batch_stream_ndjson(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/embed/batch",
+        json={
+            "images": [{"image_b64": _TINY_PNG}, {"image_b64": _INVALID_B64}, {"image_b64": _TINY_PNG}],
+            "stream": True,
+        },
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert lines[0]["face_count"] == 1
+    assert len(lines[0]["faces"][0]["embedding"]) == 512
+    assert lines[1]["error"] is not None
+
+
+async def test_detect_batch_stream_multipart(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/detect/batch",
+        files=[("images", ("a.png", _TINY_PNG_BYTES, "image/png"))] * 2,
+        params={"stream": "true"},
+        headers={"accept": "application/msgpack"},
+    )
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["face_count"] for line in lines] == [1, 1]
+
+
+async def test_batch_stream_exceeds_max_size(client: AsyncClient) -> None:
+    images = [{"image_b64": _TINY_PNG}] * 65
+    resp = await client.post("/faces/detect/batch", json={"images": images, "stream": True})
+    assert resp.status_code == 400
+
+
+# --- Micro-batching (FACE_COALESCE_WINDOW_MS) ---
+
+
+async def test_single_image_requests_coalesced(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    batch_sizes: list[int] = []
+
+    async def _run(batch_fn: BatchFn, images: list[bytes]) -> list[list[DetectedFace]]:
+        batch_sizes.append(len(images))
+        return await inference._run_batch(batch_fn, images)
+
+    monkeypatch.setattr(inference, "_coalescer", RequestCoalescer(_run, window_s=0.02, max_images=8))
+    responses = await asyncio.gather(
+        *(client.post("/faces/embed", json={"image_b64": _TINY_PNG, "embedding_format": "f16_b64"}) for _ in range(3))
+    )
+
+    assert batch_sizes == [3]
+    for resp in responses:
+        assert resp.status_code == 200
+        assert len(base64.b64decode(resp.json()["faces"][0]["embedding"])) == 1024
+
+
+# --- Streamed JSON batch bodies ---
+
+
+async def test_json_batch_streamed_per_image_errors(client: AsyncClient) -> None:
+    images = [{"image_b64": _TINY_PNG}, {"image_b64": "not base64!"}]
+    # '\/' is a valid JSON escape that some encoders emit.
+    body = json.dumps({"images": images}).replace("/", "\\/")
+    resp = await client.post("/faces/detect/batch", content=body)
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert results[0]["face_count"] == 1
+    assert results[1]["error"] == "Invalid base64-encoded image"
+
+
+async def test_json_batch_over_byte_budget(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(faces_endpoint, "_BATCH_MAX_BYTES", 100)
+    images = [{"image_b64": _TINY_PNG}] * 2
+    resp = await client.post("/faces/embed/batch", json={"images": images})
+    assert resp.status_code == 413
+    files = [("images", ("a.png", _TINY_PNG_BYTES, "image/png"))] * 2
+    resp = await client.post("/faces/embed/batch", files=files)
+    assert resp.status_code == 413
+
+
+async def test_multipart_batch_refused_by_content_length(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(faces_endpoint, "_BATCH_MAX_BYTES", 100)
+    monkeypatch.setattr("src.api.multipart._FRAMING_SLACK", 0)
+
+    def _never_parsed(*args: object, **kwargs: object) -> None:
+        raise AssertionError("body parsed despite its Content-Length")
+
+    monkeypatch.setattr("src.api.multipart.MultiPartParser", _never_parsed)
+    files = [("images", ("a.png", _TINY_PNG_BYTES, "image/png"))]
+    resp = await client.post("/faces/embed/batch", files=files)
+    assert resp.status_code == 413
+
+
+async def test_chunked_multipart_batch_refused_while_read(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(faces_endpoint, "_BATCH_MAX_BYTES", 1000)
+    monkeypatch.setattr("src.api.multipart._FRAMING_SLACK", 0)
+    sent: list[int] = []
+
+    async def _body() -> AsyncIterator[bytes]:
+        yield b'--b\r\nContent-Disposition: form-data; name="images"; filename="a.png"\r\n\r\n'
+        for _ in range(100):
+            sent.append(1)
+            yield bytes(500)
+        yield b"\r\n--b--\r\n"
+
+    resp = await client.post(
+        "/faces/embed/batch", content=_body(), headers={"content-type": "multipart/form-data; boundary=b"}
+    )
+    assert resp.status_code == 413
+    assert len(sent) < 100
+
+
+# --- Megapixel budgets (FACE_MAX_IMAGE_MEGAPIXELS, FACE_BATCH_MAX_MEGAPIXELS) ---
+
+
+def _png(width: int, height: int) -> str:
+    _, buf = cv2.imencode(".png", np.zeros((height, width, 3), dtype=np.uint8))
+    return base64.b64encode(buf.tobytes()).decode()
+
+
+async def test_batch_split_by_megapixels(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "face_batch_max_megapixels", 0.025)
+    provider = app.state.face_provider
+    calls: list[int] = []
+    original = provider.detect_batch
+
+    def _detect_batch(images: list[bytes], *args: object, **kwargs: object) -> object:
+        calls.append(len(images))
+        return original(images, *args, **kwargs)
+
+    monkeypatch.setattr(provider, "detect_batch", _detect_batch)
+    # 0.01 MP each: at most two per provider call.
+    images = [{"image_b64": _png(100, 100)}] * 5
+    resp = await client.post("/faces/detect/batch", json={"images": images})
+    assert resp.status_code == 200
+    assert resp.json()["total_faces"] == 5
+    assert calls == [2, 2, 1]
+
+
+async def test_oversized_image_refused_before_decode(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "face_max_image_megapixels", 0.005)
+    images = [{"image_b64": _png(100, 100)}, {"image_b64": _TINY_PNG}]
+    resp = await client.post("/faces/detect/batch", json={"images": images})
+    results = resp.json()["results"]
+    assert "megapixels" in results[0]["error"]
+    assert results[1]["face_count"] == 1
+    resp = await client.post("/faces/detect", json={"image_b64": _png(100, 100)})
+    assert resp.status_code == 400
+
+
+# --- Server-side files (FACE_INGEST_ROOT) ---
+
+
+async def test_image_path_read_from_ingest_root(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    (tmp_path / "face.png").write_bytes(base64.b64decode(_TINY_PNG))
+    monkeypatch.setattr(inference, "_ingestor", FileIngestor(str(tmp_path), max_bytes=2**20))
+    provider = app.state.face_provider
+    seen: list[bytes] = []
+    original = provider.detect_batch
+
+    def _detect_batch(images: list[bytes], *args: object, **kwargs: object) -> object:
+        seen.extend(images)
+        return original(images, *args, **kwargs)
+
+    monkeypatch.setattr(provider, "detect_batch", _detect_batch)
+    resp = await client.post("/faces/detect", json={"image_path": "face.png"})
+    assert resp.status_code == 200
+    images = [{"image_path": "face.png"}, {"image_path": "../etc/passwd"}, {"image_b64": _TINY_PNG}]
+    resp = await client.post("/faces/detect/batch", json={"images": images})
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert results[0]["face_count"] == 1
+    assert "outside the ingest root" in results[1]["error"]
+    assert seen[-2:] == [base64.b64decode(_TINY_PNG)] * 2
+
+
+async def test_image_path_disabled_without_ingest_root(client: AsyncClient) -> None:
+    resp = await client.post("/faces/detect", json={"image_path": "face.png"})
+    assert resp.status_code == 400
+
+
+async def test_image_b64_and_image_path_exclusive(client: AsyncClient) -> None:
+    resp = await client.post("/faces/detect", json={"image_b64": _TINY_PNG, "image_path": "face.png"})
+    assert resp.status_code == 422
+
+
+# --- Result cache (FACE_RESULT_CACHE_MB) ---
+
+
+async def test_repeated_image_served_from_cache(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(inference, "_result_cache", ResultCache(2**20, ttl_s=60))
+    provider = app.state.face_provider
+    calls: list[int] = []
+    embed = provider.embed
+
+    def _embed(*args: object, **kwargs: object) -> list[DetectedFace]:
+        calls.append(1)
+        return embed(*args, **kwargs)  # type: ignore[no-any-return]
+
+    monkeypatch.setattr(provider, "embed", _embed)
+    first = await client.post("/faces/embed", json={"image_b64": _TINY_PNG})
+    second = await client.post("/faces/embed", json={"image_b64": _TINY_PNG})
+    assert first.json() == second.json()
+    assert len(calls) == 1
+    # Different options are a different entry.
+    await client.post("/faces/embed", json={"image_b64": _TINY_PNG, "embedding_format": "f16_b64"})
+    assert len(calls) == 2
+
+
+async def test_batch_sends_only_cache_misses(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(inference, "_result_cache", ResultCache(2**20, ttl_s=60))
+    provider = app.state.face_provider
+    batch_sizes: list[int] = []
+    detect_batch = provider.detect_batch
+
+    def _detect_batch(images: list[bytes], *args: object, **kwargs: object) -> list[list[DetectedFace]]:
+        batch_sizes.append(len(images))
+        return detect_batch(images, *args, **kwargs)  # type: ignore[no-any-return]
+
+    monkeypatch.setattr(provider, "detect_batch", _detect_batch)
+    await client.post("/faces/detect", json={"image_b64": _TINY_PNG})
+    other = base64.b64encode(_TINY_PNG_BYTES + b"\0").decode()
+    images = [{"image_b64": b64} for b64 in (_TINY_PNG, other, _INVALID_B64, other)]
+    resp = await client.post("/faces/detect/batch", json={"images": images})
+    data = resp.json()
+    assert [r["face_count"] for r in data["results"]] == [1, 1, 0, 1]
+    assert data["results"][2]["error"] is not None
+    assert batch_sizes == [1]
+
+
+# --- Client-supplied faces ---
+
+_FACE_HINT = {"landmarks": [{"x": 40.0 + i, "y": 50.0 + i} for i in range(5)]}
+
+
+async def test_embed_with_supplied_faces(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    provider = app.state.face_provider
+    seen: list[object] = []
+
+    def _embed_batch(images: list[bytes], *args: object, hints: object = None, **kwargs: object) -> object:
+        seen.append(hints)
+        return [[] for _ in images]
+
+    monkeypatch.setattr(provider, "embed_batch", _embed_batch)
+    monkeypatch.setattr(type(provider), "supports_face_hints", True)
+    resp = await client.post("/faces/embed", json={"image_b64": _TINY_PNG, "faces": [_FACE_HINT]})
+    assert resp.status_code == 200
+    ((hints,),) = seen
+    assert hints[0].landmarks[0] == (40.0, 50.0)
+    assert hints[0].bbox is None
+
+
+async def test_batch_supplied_faces_per_image(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    provider = app.state.face_provider
+    seen: list[object] = []
+
+    def _analyze_batch(images: list[bytes], *args: object, hints: object = None, **kwargs: object) -> object:
+        seen.append(hints)
+        return [[] for _ in images]
+
+    monkeypatch.setattr(provider, "analyze_batch", _analyze_batch)
+    monkeypatch.setattr(type(provider), "supports_face_hints", True)
+    images = [{"image_b64": _TINY_PNG, "faces": []}, {"image_b64": _TINY_PNG}]
+    resp = await client.post("/faces/analyze/batch", json={"images": images})
+    assert resp.status_code == 200
+    assert seen == [[[], None]]
+
+
+async def test_supplied_faces_unsupported_by_provider(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    provider = app.state.face_provider
+    seen: list[object] = []
+
+    def _embed_batch(images: list[bytes], *args: object, hints: object = None, **kwargs: object) -> object:
+        seen.append(hints)
+        return [[] for _ in images]
+
+    monkeypatch.setattr(provider, "embed_batch", _embed_batch)
+    resp = await client.post("/faces/embed", json={"image_b64": _TINY_PNG, "faces": [_FACE_HINT]})
+    assert resp.status_code == 400
+    assert seen == []
+    # Only the image with supplied faces fails; the rest of the batch still runs.
+    images = [{"image_b64": _TINY_PNG, "faces": [_FACE_HINT]}, {"image_b64": _TINY_PNG}]
+    resp = await client.post("/faces/embed/batch", json={"images": images})
+    first, second = resp.json()["results"]
+    assert first["error"] is not None
+    assert second["error"] is None
+    assert seen == [None]
+
+
+async def test_supplied_faces_need_five_landmarks(client: AsyncClient) -> None:
+    hint = {"landmarks": _FACE_HINT["landmarks"][:4]}
+    resp = await client.post("/faces/embed", json={"image_b64": _TINY_PNG, "faces": [hint]})
+    assert resp.status_code == 422
+
+
+# --- Pre-aligned crops (/faces/embed/aligned) ---
+
+
+def _record_aligned(monkeypatch: pytest.MonkeyPatch) -> list[object]:
+    provider = app.state.face_provider
+    seen: list[object] = []
+
+    def _embed_aligned(crops: object, embedding_format: str = "float_list") -> object:
+        seen.append(crops)
+        return encode_embeddings(np.ones((len(crops), 4), dtype=np.float32), embedding_format)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(provider, "embed_aligned", _embed_aligned)
+    return seen
+
+
+async def test_embed_aligned_tensor(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    seen = _record_aligned(monkeypatch)
+    tensor = np.zeros((3, 112, 112, 3), dtype=np.uint8)
+    tensor[..., 2] = 255
+    resp = await client.post(
+        "/faces/embed/aligned?channel_order=rgb",
+        content=tensor.tobytes(),
+        headers={"content-type": "application/octet-stream"},
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["count"] == 3
+    assert [e["index"] for e in body["embeddings"]] == [0, 1, 2]
+    (crops,) = seen
+    assert crops.shape == (3, 112, 112, 3)  # type: ignore[attr-defined]
+    # RGB input is handed to the provider as BGR.
+    assert crops[0, 0, 0].tolist() == [255, 0, 0]  # type: ignore[index]
+
+
+async def test_embed_aligned_tensor_size_mismatch(client: AsyncClient) -> None:
+    resp = await client.post(
+        "/faces/embed/aligned", content=b"\x00" * 1000, headers={"content-type": "application/octet-stream"}
+    )
+    assert resp.status_code == 400
+
+
+async def test_embed_aligned_encoded_crops(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    seen = _record_aligned(monkeypatch)
+    png = base64.b64decode(_TINY_PNG)
+    resp = await client.post("/faces/embed/aligned", files=[("images", png), ("images", png)])
+    assert resp.status_code == 200
+    resp = await client.post(
+        "/faces/embed/aligned", json={"images": [{"image_b64": _TINY_PNG}], "embedding_format": "int8_b64"}
+    )
+    assert resp.status_code == 200
+    assert isinstance(resp.json()["embeddings"][0]["embedding"], str)
+    assert seen == [[png, png], [png]]
+
+
+async def test_embed_aligned_unsupported_by_provider(client: AsyncClient) -> None:
+    resp = await client.post("/faces/embed/aligned", json={"images": [{"image_b64": _TINY_PNG}]})
+    assert resp.status_code == 400
+
+
+# --- Priority classes (X-Priority) ---
+
+
+async def test_bulk_priority_accepted(client: AsyncClient) -> None:
+    resp = await client.post("/faces/detect", json={"image_b64": _TINY_PNG}, headers={"x-priority": "bulk"})
+    assert resp.status_code == 200
+
+
+async def test_unknown_priority_rejected(client: AsyncClient) -> None:
+    resp = await client.post("/faces/detect", json={"image_b64": _TINY_PNG}, headers={"x-priority": "urgent"})
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"] == ["header", "x-priority"]
+
+
+# --- Deadlines and load shedding ---
+
+
+async def test_deadline_exceeded_while_queued(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    admission = AdmissionController(1)
+    monkeypatch.setattr(inference, "_admission", admission)
+    async with admission.slot():
+        resp = await client.post(
+            "/faces/detect", json={"image_b64": _TINY_PNG}, headers={"x-request-deadline-ms": "10"}
+        )
+    assert resp.status_code == 503
+    assert admission.inflight == 0
+
+
+async def test_full_admission_queue_rejected(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    admission = AdmissionController(1, max_queue=1)
+    monkeypatch.setattr(inference, "_admission", admission)
+    async with admission.slot():
+        queued = asyncio.create_task(client.post("/faces/detect", json={"image_b64": _TINY_PNG}))
+        while admission.queued < 1:
+            await asyncio.sleep(0.001)
+        resp = await client.post("/faces/detect", json={"image_b64": _TINY_PNG})
+        assert resp.status_code == 429
+    assert (await queued).status_code == 200
+
+
+async def test_stream_reports_shed_chunks_as_errors(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    admission = AdmissionController(1)
+    monkeypatch.setattr(inference, "_admission", admission)
+    async with admission.slot():
+        resp = await client.post(
+            "/faces/detect/batch",
+            json={"images": [{"image_b64": _TINY_PNG}] * 2, "stream": True},
+            headers={"x-request-deadline-ms": "10"},
+        )
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["error"] for line in lines] == ["Request deadline exceeded"] * 2
+
+
+async def test_non_positive_deadline_rejected(client: AsyncClient) -> None:
+    resp = await client.post("/faces/detect", json={"image_b64": _TINY_PNG}, headers={"x-request-deadline-ms": "0"})
+    assert resp.status_code == 422
+
+
+# --- WebSocket frame stream (/faces/stream) ---
+
+
+@pytest.fixture
+def ws_client() -> Iterator[TestClient]:
+    provider = FakeFaceProvider()
+    provider.load_model()
+    app.state.face_provider = provider
+    yield TestClient(app)
+    app.state.face_provider = None
+
+
+def test_stream_frames(ws_client: TestClient) -> None:
+    png = base64.b64decode(_TINY_PNG)
+    with ws_client.websocket_connect("/faces/stream?operation=embed&embedding_format=f16_b64") as ws:
+        for _ in range(3):
+            ws.send_bytes(png)
+        replies = [json.loads(ws.receive_text()) for _ in range(3)]
+
+    assert [r["index"] for r in replies] == [0, 1, 2]
+    assert len(base64.b64decode(replies[0]["faces"][0]["embedding"])) == 1024
+
+
+def test_stream_drops_oldest_frames_when_behind(ws_client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    provider = app.state.face_provider
+    release = threading.Event()
+    batches: list[int] = []
+
+    def _detect_batch(
+        images: list[bytes],
+        include_pose: bool = False,
+        fields: FaceFields | None = None,
+        pose_mode: PoseMode = "model",
+    ) -> list[list[DetectedFace]]:
+        batches.append(len(images))
+        release.wait(timeout=2.0)
+        return [provider.detect(img) for img in images]
+
+    monkeypatch.setattr(provider, "detect_batch", _detect_batch)
+    png = base64.b64decode(_TINY_PNG)
+    with ws_client.websocket_connect("/faces/stream?max_pending=2") as ws:
+        ws.send_bytes(png)
+        while not batches:
+            time.sleep(0.001)
+        for _ in range(4):
+            ws.send_bytes(png)
+        time.sleep(0.1)
+        release.set()
+        replies = [json.loads(ws.receive_text()) for _ in range(3)]
+
+    assert [r["index"] for r in replies] == [0, 3, 4]
+    assert batches == [1, 2]
+
+
+def test_stream_rejects_text_frames(ws_client: TestClient) -> None:
+    with ws_client.websocket_connect("/faces/stream") as ws:
+        ws.send_text("hello")
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+    assert exc_info.value.code == 1003
+
+
+def test_stream_rejects_invalid_options(ws_client: TestClient) -> None:
+    with pytest.raises(WebSocketDisconnect) as exc_info, ws_client.websocket_connect("/faces/stream?operation=x"):
+        pass
+    assert exc_info.value.code == 1008
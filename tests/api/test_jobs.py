@@ -0,0 +1,234 @@
+import asyncio
+import base64
+import functools
+import io
+import json
+import threading
+import zipfile
+from collections.abc import AsyncIterator, Iterable
+from pathlib import Path
+from typing import Any
+
+import pytest
+from httpx import AsyncClient
+from src.api import inference
+from src.api.endpoints.jobs import _ThreadedWriter, run_job_chunk
+from src.main import app
+from src.services.file_ingest import FileIngestor
+from src.services.jobs import JobSpool, JobWorker
+from src.services.result_cache import ResultCache
+
+from tests.api.test_faces import _TINY_PNG
+
+
+@pytest.fixture
+async def job_worker(client: AsyncClient, tmp_path: Path) -> AsyncIterator[JobWorker]:
+    worker = JobWorker(JobSpool(tmp_path), functools.partial(run_job_chunk, app.state.face_provider), ttl_s=3600)
+    worker.start()
+    app.state.job_worker = worker
+    yield worker
+    await worker.stop()
+    app.state.job_worker = None
+
+
+async def _wait_finished(client: AsyncClient, job_id: str) -> dict[str, Any]:
+    for _ in range(200):
+        job: dict[str, Any] = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job never finished")
+
+
+async def test_json_job_runs_in_chunks(
+    client: AsyncClient, job_worker: JobWorker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.api.endpoints.jobs.settings.face_job_chunk_size", 2)
+    images = [{"image_b64": _TINY_PNG}] * 3 + [{"image_b64": base64.b64encode(b"").decode()}]
+    resp = await client.post("/jobs", json={"images": images, "embedding_format": "f16_b64"})
+    assert resp.status_code == 202
+    assert resp.json()["total_images"] == 4
+    job_id = resp.json()["job_id"]
+    assert resp.headers["location"] == f"/jobs/{job_id}"
+
+    job = await _wait_finished(client, job_id)
+    assert job["status"] == "completed"
+    assert (job["processed_images"], job["total_faces"], job["result_chunks"]) == (4, 3, 2)
+
+    lines = []
+    for chunk in range(job["result_chunks"]):
+        resp = await client.get(f"/jobs/{job_id}/results/{chunk}")
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        lines += [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert lines[3]["error"] == "Empty image"
+    assert len(base64.b64decode(lines[0]["faces"][0]["embedding"])) == 1024
+
+
+async def test_job_reads_result_cache_without_filling_it(
+    client: AsyncClient, job_worker: JobWorker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache = ResultCache(2**20, ttl_s=60)
+    monkeypatch.setattr(inference, "_result_cache", cache)
+    provider = app.state.face_provider
+    calls: list[int] = []
+    embed_batch = provider.embed_batch
+
+    def _embed_batch(images: list[bytes], *args: object, **kwargs: object) -> object:
+        calls.append(len(images))
+        return embed_batch(images, *args, **kwargs)
+
+    monkeypatch.setattr(provider, "embed_batch", _embed_batch)
+    resp = await client.post("/jobs", json={"images": [{"image_b64": _TINY_PNG}]})
+    assert (await _wait_finished(client, resp.json()["job_id"]))["total_faces"] == 1
+    assert (len(calls), len(cache)) == (1, 0)
+
+    await client.post("/faces/embed/batch", json={"images": [{"image_b64": _TINY_PNG}]})
+    assert (len(calls), len(cache)) == (2, 1)
+    resp = await client.post("/jobs", json={"images": [{"image_b64": _TINY_PNG}]})
+    assert (await _wait_finished(client, resp.json()["job_id"]))["total_faces"] == 1
+    assert len(calls) == 2
+
+
+async def test_json_job_keeps_inline_and_path_images_in_order(
+    client: AsyncClient, job_worker: JobWorker, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    ingest = tmp_path / "ingest"
+    ingest.mkdir()
+    (ingest / "b.bin").write_bytes(b"path-b")
+    monkeypatch.setattr(inference, "_ingestor", FileIngestor(str(ingest), max_bytes=2**20))
+    images = [
+        {"image_b64": base64.b64encode(b"inline-a").decode()},
+        {"image_path": "b.bin"},
+        {"image_b64": base64.b64encode(b"inline-c").decode()},
+    ]
+    resp = await client.post("/jobs", json={"images": images})
+    assert resp.status_code == 202
+
+    job_id = resp.json()["job_id"]
+    assert job_worker.spool.read_images(job_id, 0, 3) == [b"inline-a", b"path-b", b"inline-c"]
+
+
+async def test_json_job_image_over_budget_rejected(
+    client: AsyncClient, job_worker: JobWorker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.api.endpoints.jobs.settings.face_job_max_image_mb", 1)
+    images = [{"image_b64": _TINY_PNG}, {"image_b64": base64.b64encode(bytes(2 << 20)).decode()}]
+    resp = await client.post("/jobs", json={"images": images})
+    assert resp.status_code == 413
+    # Neither a job nor the scratch file is left behind.
+    assert list(job_worker.spool.root.iterdir()) == []
+
+
+async def test_upload_writes_leave_the_event_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("src.api.endpoints.jobs._WRITE_BUFFER", 4)
+    writes: list[tuple[int, bytes]] = []
+
+    class _File(io.BytesIO):
+        def writelines(self, lines: Iterable[bytes]) -> None:  # type: ignore[override]
+            writes.append((threading.get_ident(), b"".join(lines)))
+
+    out = _ThreadedWriter(_File())
+    out.write(b"ab")
+    await out.flush()
+    assert writes == []  # under the buffer size: kept for the next write
+    out.write(b"cd")
+    await out.flush()
+    out.write(b"e")
+    await out.flush(force=True)
+
+    assert [data for _, data in writes] == [b"abcd", b"e"]
+    assert threading.get_ident() not in {thread for thread, _ in writes}
+
+
+async def test_zip_job(client: AsyncClient, job_worker: JobWorker) -> None:
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for i in range(3):
+            zf.writestr(f"img/{i}.png", base64.b64decode(_TINY_PNG))
+    resp = await client.post(
+        "/jobs?operation=detect", content=archive.getvalue(), headers={"content-type": "application/zip"}
+    )
+    assert resp.status_code == 202
+
+    job = await _wait_finished(client, resp.json()["job_id"])
+    assert (job["operation"], job["status"], job["total_faces"]) == ("detect", "completed", 3)
+
+
+async def test_multipart_job(client: AsyncClient, job_worker: JobWorker) -> None:
+    png = base64.b64decode(_TINY_PNG)
+    files = [("images", (f"{i}.png", png, "image/png")) for i in range(2)]
+    resp = await client.post("/jobs", files=files, data={"operation": "analyze"})
+    assert resp.status_code == 202
+
+    job = await _wait_finished(client, resp.json()["job_id"])
+    assert (job["operation"], job["total_images"], job["status"]) == ("analyze", 2, "completed")
+
+
+async def test_zip_bomb_member_rejected(
+    client: AsyncClient, job_worker: JobWorker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.api.endpoints.jobs.settings.face_job_max_image_mb", 1)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("bomb.png", bytes(16 << 20))
+    resp = await client.post("/jobs", content=archive.getvalue(), headers={"content-type": "application/zip"})
+    assert resp.status_code == 413
+    assert job_worker.spool.job_ids() == []
+    assert list(job_worker.spool.root.iterdir()) == []
+
+
+async def test_job_over_byte_budget_rejected(
+    client: AsyncClient, job_worker: JobWorker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.api.endpoints.jobs.settings.face_job_max_mb", 1)
+    files = [("images", (f"{i}.png", bytes(600 << 10), "image/png")) for i in range(2)]
+    resp = await client.post("/jobs", files=files)
+    assert resp.status_code == 413
+    assert job_worker.spool.job_ids() == []
+
+
+async def test_multipart_job_refused_while_read(
+    client: AsyncClient, job_worker: JobWorker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.api.endpoints.jobs.settings.face_job_max_mb", 1)
+    sent: list[int] = []
+
+    async def _body() -> AsyncIterator[bytes]:
+        yield b'--b\r\nContent-Disposition: form-data; name="images"; filename="a.png"\r\n\r\n'
+        for _ in range(100):
+            sent.append(1)
+            yield bytes(64 << 10)
+        yield b"\r\n--b--\r\n"
+
+    # Chunked, so only counting the body as it is read can stop it.
+    resp = await client.post("/jobs", content=_body(), headers={"content-type": "multipart/form-data; boundary=b"})
+    assert resp.status_code == 413
+    assert len(sent) < 100
+    assert job_worker.spool.job_ids() == []
+
+
+async def test_invalid_archive_rejected(client: AsyncClient, job_worker: JobWorker) -> None:
+    resp = await client.post("/jobs", content=b"not a zip", headers={"content-type": "application/zip"})
+    assert resp.status_code == 400
+    assert job_worker.spool.job_ids() == []
+
+
+async def test_empty_job_rejected(client: AsyncClient, job_worker: JobWorker) -> None:
+    resp = await client.post("/jobs", json={"images": []})
+    assert resp.status_code == 400
+
+
+async def test_delete_job(client: AsyncClient, job_worker: JobWorker) -> None:
+    resp = await client.post("/jobs", json={"images": [{"image_b64": _TINY_PNG}]})
+    job_id = resp.json()["job_id"]
+    await _wait_finished(client, job_id)
+
+    assert (await client.delete(f"/jobs/{job_id}")).status_code == 204
+    assert (await client.get(f"/jobs/{job_id}")).status_code == 404
+    assert (await client.get(f"/jobs/{job_id}/results/0")).status_code == 404
+
+
+async def test_unknown_job(client: AsyncClient, job_worker: JobWorker) -> None:
+    assert (await client.get(f"/jobs/{'0' * 32}")).status_code == 404
+    assert (await client.get("/jobs/../etc")).status_code == 404
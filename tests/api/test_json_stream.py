@@ -0,0 +1,67 @@
+import base64
+import json
+
+import pytest
+from src.api.json_stream import INVALID_IMAGE, Base64Extractor, BatchBudgetError
+
+_IMAGES = [bytes(range(256)) * 40, b"\xff\xd8jpeg", b""]
+_BODY = (
+    json.dumps(
+        {
+            "images": [
+                {"image_b64": base64.b64encode(_IMAGES[0]).decode(), "faces": [{"landmarks": [{"x": 1, "y": 2}]}]},
+                {"faces": None, "image_b64": base64.b64encode(_IMAGES[1]).decode()},
+                {"image_b64": ""},
+                {"image_path": "image_b64", "note": '"image_b64"'},
+            ],
+            "embedding_format": "f16_b64",
+        },
+        indent=1,
+    )
+    .replace("/", "\\/")
+    .encode()
+)  # '\/' is a valid JSON escape that some encoders emit
+
+
+def _extract(body: bytes, chunk_size: int, max_bytes: int = 2**20) -> tuple[dict[str, object], list[bytes | None]]:
+    extractor = Base64Extractor(max_bytes)
+    for i in range(0, len(body), chunk_size):
+        extractor.feed(body[i : i + chunk_size])
+    skeleton, images = extractor.finish()
+    return json.loads(skeleton), images
+
+
+class TestBase64Extractor:
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, len(_BODY)])
+    def test_images_decoded_and_emptied_at_any_chunking(self, chunk_size: int) -> None:
+        skeleton, images = _extract(_BODY, chunk_size)
+        assert images == _IMAGES
+        expected = json.loads(_BODY)
+        for item in expected["images"]:
+            if "image_b64" in item:
+                item["image_b64"] = ""
+        assert skeleton == expected
+
+    def test_invalid_base64_marked(self) -> None:
+        skeleton, images = _extract(b'{"images": [{"image_b64": "not base64!"}, {"image_b64": "AAAA"}]}', 5)
+        assert images == [None, b"\x00\x00\x00"]
+        assert skeleton == {"images": [{"image_b64": INVALID_IMAGE}, {"image_b64": ""}]}
+
+    def test_budget_exceeded_while_streaming(self) -> None:
+        with pytest.raises(BatchBudgetError):
+            _extract(_BODY, 64, max_bytes=len(_IMAGES[0]) - 1)
+
+    def test_sink_receives_images_as_they_close(self) -> None:
+        received: list[bytes | None] = []
+        extractor = Base64Extractor(2**20, sink=received.append)
+        head, _, tail = _BODY.partition(b'"faces": null')
+        extractor.feed(head)
+        assert received == [_IMAGES[0]]
+        extractor.feed(b'"faces": null' + tail)
+        assert received == _IMAGES
+        assert extractor.finish()[1] == []
+
+    def test_image_budget_exceeded_while_streaming(self) -> None:
+        extractor = Base64Extractor(2**20, max_image_bytes=len(_IMAGES[0]) - 1)
+        with pytest.raises(BatchBudgetError, match="Image exceeds"):
+            extractor.feed(_BODY)
@@ -1,9 +1,18 @@
 from collections.abc import AsyncIterator
 
+import numpy as np
 import pytest
 from httpx import ASGITransport, AsyncClient
 from src.main import app
-from src.services.face_provider.base import BoundingBox, DetectedFace, FaceProvider
+from src.services.face_provider.base import (
+    BoundingBox,
+    DetectedFace,
+    EmbeddingFormat,
+    FaceFields,
+    FaceProvider,
+    PoseMode,
+)
+from src.services.face_provider.embedding_codec import encode_embeddings
 
 
 class FakeFaceProvider(FaceProvider):
@@ -22,14 +31,47 @@ class FakeFaceProvider(FaceProvider):
     def load_model(self) -> None:
         self._loaded = True
 
-    def detect(self, image_bytes: bytes, include_pose: bool = False) -> list[DetectedFace]:
+    def detect(
+        self,
+        image_bytes: bytes,
+        include_pose: bool = False,
+        fields: FaceFields | None = None,
+        pose_mode: PoseMode = "model",
+    ) -> list[DetectedFace]:
         return [DetectedFace(bbox=self._FACE.bbox, det_score=self._FACE.det_score)]
 
-    def embed(self, image_bytes: bytes) -> list[DetectedFace]:
-        return [DetectedFace(bbox=self._FACE.bbox, det_score=self._FACE.det_score, embedding=self._FACE.embedding)]
+    def embed(
+        self, image_bytes: bytes, embedding_format: EmbeddingFormat = "float_list", fields: FaceFields | None = None
+    ) -> list[DetectedFace]:
+        (encoded,) = encode_embeddings(np.array([self._FACE.embedding]), embedding_format)
+        return [
+            DetectedFace(
+                bbox=self._FACE.bbox,
+                det_score=self._FACE.det_score,
+                embedding=encoded.values,
+                embedding_packed=encoded.packed,
+                embedding_scale=encoded.scale,
+            )
+        ]
 
-    def analyze(self, image_bytes: bytes) -> list[DetectedFace]:
-        return [self._FACE]
+    def analyze(
+        self, image_bytes: bytes, embedding_format: EmbeddingFormat = "float_list", fields: FaceFields | None = None
+    ) -> list[DetectedFace]:
+        if embedding_format == "float_list":
+            return [self._FACE]
+        (embedded,) = self.embed(image_bytes, embedding_format)
+        return [
+            DetectedFace(
+                bbox=embedded.bbox,
+                det_score=embedded.det_score,
+                embedding_packed=embedded.embedding_packed,
+                embedding_scale=embedded.embedding_scale,
+                age=self._FACE.age,
+                gender=self._FACE.gender,
+                race=self._FACE.race,
+                race_probs=self._FACE.race_probs,
+            )
+        ]
 
     @property
     def provider_name(self) -> str:
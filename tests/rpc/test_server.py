@@ -0,0 +1,104 @@
+import asyncio
+import base64
+from collections.abc import AsyncIterator
+
+import grpc
+import pytest
+from src.config import settings
+from src.rpc import face_pb2, face_pb2_grpc
+from src.rpc.server import start_grpc_server
+from src.services.face_provider.base import DetectedFace
+
+from tests.api.test_faces import _TINY_PNG
+from tests.conftest import FakeFaceProvider
+
+_PNG = base64.b64decode(_TINY_PNG)
+
+
+@pytest.fixture
+async def stub() -> AsyncIterator[face_pb2_grpc.FaceServiceStub]:
+    provider = FakeFaceProvider()
+    provider.load_model()
+    server, port = await start_grpc_server(provider, 0)
+    async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+        yield face_pb2_grpc.FaceServiceStub(channel)  # type: ignore[no-untyped-call]
+    await server.stop(grace=None)
+
+
+async def test_detect(stub: face_pb2_grpc.FaceServiceStub) -> None:
+    resp = await stub.Detect(face_pb2.DetectRequest(image=_PNG))
+    assert len(resp.faces) == 1
+    assert resp.faces[0].bbox.width == pytest.approx(100.0)
+    assert not resp.faces[0].embedding
+
+
+async def test_detect_pose_mode(monkeypatch: pytest.MonkeyPatch) -> None:
+    provider = FakeFaceProvider()
+    provider.load_model()
+    modes: list[object] = []
+    detect = provider.detect
+
+    def _detect(*args: object, **kwargs: object) -> list[DetectedFace]:
+        modes.append(kwargs.get("pose_mode"))
+        return detect(*args, **kwargs)  # type: ignore[no-any-return]
+
+    monkeypatch.setattr(provider, "detect", _detect)
+    server, port = await start_grpc_server(provider, 0)
+    async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+        stub = face_pb2_grpc.FaceServiceStub(channel)  # type: ignore[no-untyped-call]
+        await stub.Detect(face_pb2.DetectRequest(image=_PNG, pose=True, pose_mode=face_pb2.POSE_MODE_FAST))
+        await stub.Detect(face_pb2.DetectRequest(image=_PNG, pose=True))
+    await server.stop(grace=None)
+
+    assert modes == ["fast", "model"]
+
+
+async def test_embed_packed_floats(stub: face_pb2_grpc.FaceServiceStub) -> None:
+    resp = await stub.Embed(face_pb2.ImageRequest(image=_PNG))
+    assert len(resp.faces[0].embedding) == 512
+    assert resp.faces[0].embedding[0] == pytest.approx(0.1)
+    assert not resp.faces[0].HasField("age")
+
+
+async def test_analyze(stub: face_pb2_grpc.FaceServiceStub) -> None:
+    resp = await stub.Analyze(face_pb2.ImageRequest(image=_PNG))
+    face = resp.faces[0]
+    assert (face.gender, face.race) == ("male", "white")
+    assert face.race_probs["white"] == pytest.approx(0.8)
+
+
+async def test_empty_image_rejected(stub: face_pb2_grpc.FaceServiceStub) -> None:
+    with pytest.raises(grpc.aio.AioRpcError) as exc_info:
+        await stub.Detect(face_pb2.DetectRequest(image=b""))
+    assert exc_info.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+async def test_stream_mixed_operations(stub: face_pb2_grpc.FaceServiceStub) -> None:
+    ops = [face_pb2.OPERATION_DETECT, face_pb2.OPERATION_DETECT, face_pb2.OPERATION_EMBED, face_pb2.OPERATION_DETECT]
+    requests = [face_pb2.StreamRequest(id=i, image=_PNG, operation=op) for i, op in enumerate(ops)]
+    requests.append(face_pb2.StreamRequest(id=len(ops), image=b""))
+
+    responses = [r async for r in stub.Stream(iter(requests))]
+
+    assert [r.id for r in responses] == [0, 1, 2, 3, 4]
+    assert [len(r.faces) for r in responses] == [1, 1, 1, 1, 0]
+    assert len(responses[2].faces[0].embedding) == 512
+    assert not responses[0].faces[0].embedding
+    assert responses[4].error == "Empty image"
+
+
+async def test_stream_default_deadline_applies_per_batch(
+    stub: face_pb2_grpc.FaceServiceStub, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # A long-lived stream outlives FACE_DEFAULT_DEADLINE_MS; later batches
+    # must still get a budget of their own.
+    monkeypatch.setattr(settings, "face_default_deadline_ms", 100)
+
+    async def _requests() -> AsyncIterator[face_pb2.StreamRequest]:
+        for i in range(2):
+            yield face_pb2.StreamRequest(id=i, image=_PNG)
+            await asyncio.sleep(0.3)
+
+    responses = [r async for r in stub.Stream(_requests())]
+
+    assert [(r.id, r.error, len(r.faces)) for r in responses] == [(0, "", 1), (1, "", 1)]
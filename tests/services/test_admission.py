@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+from src.services.admission import AdmissionController, AdmissionRejectedError
+from src.services.request_context import DeadlineExceededError, Priority, current_deadline, current_priority
+
+
+async def _hold(admission: AdmissionController, priority: Priority, order: list[str], release: asyncio.Event) -> None:
+    current_priority.set(priority)
+    async with admission.slot():
+        order.append(priority)
+        await release.wait()
+
+
+class TestAdmissionController:
+    async def test_interactive_admitted_before_queued_bulk(self) -> None:
+        admission = AdmissionController(1)
+        order: list[str] = []
+        release = asyncio.Event()
+
+        current_priority.set("bulk")
+        async with admission.slot():
+            bulk = asyncio.create_task(_hold(admission, "bulk", order, release))
+            await asyncio.sleep(0)
+            interactive = asyncio.create_task(_hold(admission, "interactive", order, release))
+            await asyncio.sleep(0)
+            assert order == []
+        release.set()
+        await asyncio.gather(bulk, interactive)
+
+        assert order == ["interactive", "bulk"]
+
+    async def test_interactive_reserve_bypasses_full_bulk_house(self) -> None:
+        admission = AdmissionController(1, interactive_reserve=1)
+        order: list[str] = []
+        release = asyncio.Event()
+
+        current_priority.set("bulk")
+        async with admission.slot():
+            interactive = asyncio.create_task(_hold(admission, "interactive", order, release))
+            await asyncio.sleep(0)
+            assert order == ["interactive"]
+            assert admission.inflight == 2
+            release.set()
+            await interactive
+        assert admission.inflight == 0
+
+    async def test_cancelled_waiter_frees_its_place(self) -> None:
+        admission = AdmissionController(1)
+        order: list[str] = []
+        release = asyncio.Event()
+
+        async with admission.slot():
+            waiter = asyncio.create_task(_hold(admission, "interactive", order, release))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+        assert admission.inflight == 0
+        async with admission.slot():
+            assert admission.inflight == 1
+
+    async def test_full_queue_rejects(self) -> None:
+        admission = AdmissionController(1, max_queue=1)
+        order: list[str] = []
+        release = asyncio.Event()
+
+        async with admission.slot():
+            waiter = asyncio.create_task(_hold(admission, "interactive", order, release))
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejectedError):
+                async with admission.slot():
+                    pass
+            release.set()
+        await waiter
+        assert order == ["interactive"]
+
+    async def test_waiter_gives_up_at_deadline(self) -> None:
+        admission = AdmissionController(1)
+
+        async with admission.slot():
+            current_deadline.set(time.monotonic() + 0.01)
+            with pytest.raises(DeadlineExceededError):
+                async with admission.slot():
+                    pass
+            assert admission.queued == 0
+        assert admission.inflight == 0
+
+    async def test_expired_request_not_admitted(self) -> None:
+        admission = AdmissionController(1)
+        current_deadline.set(time.monotonic() - 1)
+        with pytest.raises(DeadlineExceededError):
+            async with admission.slot():
+                pass
+        assert admission.inflight == 0
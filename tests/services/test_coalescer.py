@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import pytest
+from src.services.coalescer import BatchFn, RequestCoalescer
+from src.services.face_provider.base import BoundingBox, DetectedFace
+from src.services.request_context import DeadlineExceededError, current_deadline
+
+
+def _face(tag: bytes) -> DetectedFace:
+    return DetectedFace(bbox=BoundingBox(x=float(len(tag)), y=0.0, width=1.0, height=1.0), det_score=0.9)
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.batches: list[list[bytes]] = []
+
+    async def run(self, batch_fn: BatchFn, images: list[bytes]) -> list[list[DetectedFace]]:
+        self.batches.append(images)
+        return batch_fn(images)
+
+
+def _per_image(images: list[bytes]) -> list[list[DetectedFace]]:
+    return [[_face(img)] for img in images]
+
+
+class TestRequestCoalescer:
+    async def test_concurrent_submits_share_one_batch(self) -> None:
+        recorder = _Recorder()
+        coalescer = RequestCoalescer(recorder.run, window_s=0.01, max_images=16)
+
+        results = await asyncio.gather(*(coalescer.submit("embed", _per_image, b"x" * n) for n in (1, 2, 3)))
+
+        assert recorder.batches == [[b"x", b"xx", b"xxx"]]
+        assert [faces[0].bbox.x for faces in results] == [1.0, 2.0, 3.0]
+
+    async def test_max_images_flushes_early(self) -> None:
+        recorder = _Recorder()
+        coalescer = RequestCoalescer(recorder.run, window_s=10.0, max_images=2)
+
+        await asyncio.wait_for(asyncio.gather(*(coalescer.submit("k", _per_image, b"a") for _ in range(4))), 1.0)
+
+        assert [len(b) for b in recorder.batches] == [2, 2]
+
+    async def test_keys_are_batched_separately(self) -> None:
+        recorder = _Recorder()
+        coalescer = RequestCoalescer(recorder.run, window_s=0.01, max_images=16)
+
+        await asyncio.gather(
+            coalescer.submit(("embed", "f32_b64"), _per_image, b"a"), coalescer.submit("detect", _per_image, b"b")
+        )
+
+        assert sorted(recorder.batches) == [[b"a"], [b"b"]]
+
+    async def test_batch_error_reaches_every_caller(self) -> None:
+        def _boom(images: list[bytes]) -> list[list[DetectedFace]]:
+            raise RuntimeError("inference failed")
+
+        coalescer = RequestCoalescer(_Recorder().run, window_s=0.01, max_images=16)
+
+        results = await asyncio.gather(
+            coalescer.submit("k", _boom, b"a"), coalescer.submit("k", _boom, b"b"), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def test_cancelled_caller_is_dropped_from_batch(self) -> None:
+        recorder = _Recorder()
+        coalescer = RequestCoalescer(recorder.run, window_s=0.01, max_images=16)
+
+        gone = asyncio.ensure_future(coalescer.submit("k", _per_image, b"gone"))
+        kept = asyncio.ensure_future(coalescer.submit("k", _per_image, b"kept"))
+        await asyncio.sleep(0)
+        gone.cancel()
+
+        assert len(await kept) == 1
+        with pytest.raises(asyncio.CancelledError):
+            await gone
+        assert recorder.batches == [[b"kept"]]
+
+
+class TestCoalescerDeadlines:
+    @staticmethod
+    async def _submit(coalescer: RequestCoalescer, image: bytes, deadline_s: float | None) -> list[DetectedFace]:
+        current_deadline.set(None if deadline_s is None else time.monotonic() + deadline_s)
+        return await coalescer.submit("k", _per_image, image)
+
+    @staticmethod
+    def _slow_runner(seen: list[float | None]) -> object:
+        async def _run(batch_fn: BatchFn, images: list[bytes]) -> list[list[DetectedFace]]:
+            seen.append(current_deadline.get())
+            await asyncio.sleep(0.2)
+            return batch_fn(images)
+
+        return _run
+
+    async def test_each_caller_keeps_its_own_deadline(self) -> None:
+        seen: list[float | None] = []
+        coalescer = RequestCoalescer(self._slow_runner(seen), window_s=0.01, max_images=16)  # type: ignore[arg-type]
+        start = time.monotonic()
+
+        short, long = await asyncio.gather(
+            self._submit(coalescer, b"short", 0.05), self._submit(coalescer, b"long", 5.0), return_exceptions=True
+        )
+
+        # The short caller gives up on its own; the batch runs on the later
+        # deadline, so the long caller still gets its faces.
+        assert isinstance(short, DeadlineExceededError)
+        assert isinstance(long, list) and long[0].bbox.x == 4.0
+        assert len(seen) == 1 and seen[0] is not None and seen[0] >= start + 5.0
+
+    async def test_caller_without_deadline_unbounds_the_batch(self) -> None:
+        seen: list[float | None] = []
+        coalescer = RequestCoalescer(self._slow_runner(seen), window_s=0.01, max_images=16)  # type: ignore[arg-type]
+
+        results = await asyncio.gather(self._submit(coalescer, b"a", 5.0), self._submit(coalescer, b"b", None))
+
+        assert [faces[0].bbox.x for faces in results] == [1.0, 1.0]
+        assert seen == [None]
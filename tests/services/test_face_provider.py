@@ -1,9 +1,13 @@
 import os
+import threading
 from unittest.mock import MagicMock, patch
 
 import numpy as np
 import pytest
+from src.services.face_provider.base import BoundingBox, FaceHint
 from src.services.face_provider.insightface import InsightFaceProvider
+from src.services.face_provider.pass_scheduler import PassScheduler
+from src.services.face_provider.replica_pool import ReplicaPool
 
 
 def _make_det_output(
@@ -197,6 +201,225 @@ class TestInsightFaceProviderAnalyze:
         assert faces[0].gender == "male"
 
 
+class TestFieldProjection:
+    def test_embed_without_embedding_skips_recognition(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+
+        faces = provider.embed(_fake_image_bytes(), fields=frozenset({"bbox"}))
+
+        assert faces[0].bbox.x == 10.0
+        assert faces[0].embedding is None
+        assert faces[0].landmarks is None
+        mock_app.models["recognition"].get_feat.assert_not_called()
+
+    def test_analyze_without_demographics_skips_genderage(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+        mock_ga = MagicMock()
+        mock_app.models["genderage"] = mock_ga
+
+        faces = provider.analyze(_fake_image_bytes(), fields=frozenset({"bbox", "embedding"}))
+
+        assert faces[0].embedding is not None
+        assert faces[0].age is None
+        mock_ga.get.assert_not_called()
+
+    def test_analyze_batch_demographics_only(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+        mock_ga = MagicMock()
+
+        def fake_ga_get(img: object, face: object) -> tuple[int, int]:
+            face["gender"] = 1  # type: ignore[index]
+            face["age"] = 40
+            return 1, 40
+
+        mock_ga.get.side_effect = fake_ga_get
+        mock_app.models["genderage"] = mock_ga
+
+        (faces,) = provider.analyze_batch([_fake_image_bytes()], fields=frozenset({"age", "gender"}))
+
+        assert faces[0].age == 40.0
+        assert faces[0].embedding is None
+        assert faces[0].embedding_packed is None
+        mock_app.models["recognition"].get_feat.assert_not_called()
+
+    def test_detect_batch_without_landmarks_or_pose(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+        mock_pose = MagicMock()
+        mock_app.models["landmark_3d_68"] = mock_pose
+
+        (faces,) = provider.detect_batch([_fake_image_bytes()], include_pose=True, fields=frozenset({"bbox"}))
+
+        assert faces[0].landmarks is None
+        assert faces[0].pose is None
+        mock_pose.get.assert_not_called()
+
+
+class TestStageCacheReuse:
+    def _provider(self) -> tuple[InsightFaceProvider, MagicMock]:
+        provider, mock_app = _create_provider_with_mock()
+        provider._stage_cache = InsightFaceProvider(stage_cache_mb=16)._stage_cache
+        return provider, mock_app
+
+    def test_embed_after_detect_skips_detection(self) -> None:
+        provider, mock_app = self._provider()
+        img = _fake_image_bytes()
+
+        detected = provider.detect(img)
+        embedded = provider.embed(img)
+
+        assert mock_app.det_model.detect.call_count == 1
+        assert embedded[0].bbox == detected[0].bbox
+        assert embedded[0].embedding is not None
+
+    def test_batch_detects_only_uncached_images(self) -> None:
+        provider, mock_app = self._provider()
+        cached = _fake_image_bytes()
+        provider.detect(cached)
+        other = cached + b"\0"
+        mock_app.models["recognition"].get_feat.return_value = np.random.randn(2, 512).astype(np.float32)
+
+        results = provider.analyze_batch([cached, other])
+
+        assert mock_app.det_model.detect.call_count == 2
+        assert [len(faces) for faces in results] == [1, 1]
+
+    def test_disabled_by_default(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+        img = _fake_image_bytes()
+
+        provider.detect(img)
+        provider.embed(img)
+
+        assert mock_app.det_model.detect.call_count == 2
+
+
+_HINT_LANDMARKS = [(40.0, 50.0), (60.0, 50.0), (50.0, 60.0), (42.0, 70.0), (58.0, 70.0)]
+
+
+class TestSuppliedFaces:
+    def test_embed_batch_with_hints_skips_detection(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+
+        (faces,) = provider.embed_batch([_fake_image_bytes()], hints=[[FaceHint(landmarks=_HINT_LANDMARKS)]])
+
+        mock_app.det_model.detect.assert_not_called()
+        mock_app.models["recognition"].get_feat.assert_called_once()
+        assert faces[0].landmarks == _HINT_LANDMARKS
+        assert faces[0].det_score == 1.0
+        # Estimated box: landmark extent (20 x 20) scaled 2.5x around its center.
+        assert faces[0].bbox == BoundingBox(x=25.0, y=35.0, width=50.0, height=50.0)
+
+    def test_supplied_bbox_used_as_is(self) -> None:
+        provider, _mock_app = _create_provider_with_mock()
+        bbox = BoundingBox(x=30.0, y=30.0, width=40.0, height=50.0)
+
+        (faces,) = provider.embed_batch([_fake_image_bytes()], hints=[[FaceHint(landmarks=_HINT_LANDMARKS, bbox=bbox)]])
+
+        assert faces[0].bbox == bbox
+
+    def test_mixed_batch_detects_only_unhinted_images(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+        mock_app.models["recognition"].get_feat.return_value = np.random.randn(2, 512).astype(np.float32)
+        mock_ga = MagicMock()
+
+        def fake_ga_get(img: object, face: object) -> tuple[int, int]:
+            face["gender"] = 0  # type: ignore[index]
+            face["age"] = 33
+            return 0, 33
+
+        mock_ga.get.side_effect = fake_ga_get
+        mock_app.models["genderage"] = mock_ga
+
+        results = provider.analyze_batch(
+            [_fake_image_bytes(), _fake_image_bytes(), _fake_image_bytes()],
+            hints=[[FaceHint(landmarks=_HINT_LANDMARKS)], None, []],
+        )
+
+        assert mock_app.det_model.detect.call_count == 1
+        assert [len(faces) for faces in results] == [1, 1, 0]
+        assert results[0][0].age == 33.0
+        assert results[1][0].bbox.x == 10.0
+
+
+class TestEmbedAligned:
+    def test_tensor_runs_recognition_only(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+        mock_app.models["recognition"].get_feat.return_value = np.random.randn(3, 512).astype(np.float32)
+
+        encoded = provider.embed_aligned(np.zeros((3, 112, 112, 3), dtype=np.uint8))
+
+        mock_app.det_model.detect.assert_not_called()
+        (crops,), _ = mock_app.models["recognition"].get_feat.call_args
+        assert len(crops) == 3
+        assert len(encoded) == 3
+        assert np.linalg.norm(encoded[0].values) == pytest.approx(1.0, abs=1e-5)
+
+    def test_encoded_crops_decoded(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+        import cv2  # type: ignore[import-untyped]
+
+        _, buf = cv2.imencode(".png", np.zeros((112, 112, 3), dtype=np.uint8))
+
+        (encoded,) = provider.embed_aligned([buf.tobytes()], "f16_b64")
+
+        mock_app.det_model.detect.assert_not_called()
+        assert encoded.packed is not None
+
+    def test_wrong_crop_size_rejected(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+
+        with pytest.raises(ValueError, match="112"):
+            provider.embed_aligned(np.zeros((1, 96, 96, 3), dtype=np.uint8))
+        with pytest.raises(ValueError, match="expected 112x112"):
+            provider.embed_aligned([_fake_image_bytes()])
+        mock_app.models["recognition"].get_feat.assert_not_called()
+
+
+class TestCpuReplicas:
+    def test_replicas_give_each_stage_k_slots(self) -> None:
+        provider = InsightFaceProvider(use_gpu=False, cpu_replicas=4, stage_slots={"rec": 2})
+        assert provider._passes._stage_slots == {"det": 4, "rec": 2, "genderage": 4, "landmark_3d_68": 4}
+        assert InsightFaceProvider(use_gpu=True, cpu_replicas=4)._cpu_replicas == 1
+
+    @patch("insightface.app.FaceAnalysis", autospec=False)
+    def test_load_model_builds_replica_sessions(self, mock_fa_cls: MagicMock) -> None:
+        from insightface.model_zoo.model_zoo import PickableInferenceSession  # type: ignore[import-untyped]
+
+        rec = MagicMock(model_file="/models/rec.onnx")
+        mock_fa_cls.return_value.models = {"recognition": rec}
+        sessions: list[tuple[str, object]] = []
+
+        def _fake_init(self_sess: object, model_path: str, **kwargs: object) -> None:
+            sessions.append((model_path, kwargs["sess_options"]))
+
+        provider = InsightFaceProvider(use_gpu=False, det_dynamic_batch=False, cpu_replicas=3, cpu_replica_threads=2)
+        with patch.object(PickableInferenceSession, "__init__", _fake_init):
+            provider.load_model()
+
+        assert [path for path, _ in sessions] == ["/models/rec.onnx"] * 2
+        assert sessions[0][1].intra_op_num_threads == 2  # type: ignore[attr-defined]
+        assert provider._replica_pools[id(rec)].size == 3
+
+    def test_concurrent_passes_run_on_separate_replicas(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+        both_inside = threading.Barrier(2, timeout=2.0)
+        replicas = [MagicMock(), MagicMock()]
+        for replica in replicas:
+            replica.get_feat.side_effect = lambda crops: (both_inside.wait(), np.ones((len(crops), 512)))[1]
+        provider._replica_pools = {id(mock_app.models["recognition"]): ReplicaPool(replicas)}
+        provider._passes = PassScheduler({"rec": 2})
+
+        threads = [threading.Thread(target=provider.embed, args=(_fake_image_bytes(),)) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5.0)
+
+        assert not both_inside.broken
+        assert [r.get_feat.call_count for r in replicas] == [1, 1]
+        mock_app.models["recognition"].get_feat.assert_not_called()
+
+
 class TestInsightFaceProviderLoadModel:
     @patch("insightface.app.FaceAnalysis", autospec=False)
     def test_load_model(self, mock_fa_cls: MagicMock) -> None:
@@ -251,13 +474,35 @@ class TestInsightFaceProviderLoadModel:
                 return_value="converted",
             ) as mock_convert,
         ):
-            provider = InsightFaceProvider(use_gpu=False, det_size=(640, 640), model_name="buffalo_l")
+            provider = InsightFaceProvider(
+                use_gpu=False, det_size=(640, 640), model_name="buffalo_l", pose_dynamic_batch=False
+            )
             provider.load_model()
 
         mock_ensure.assert_called_once_with("models", "buffalo_l", root=os.path.expanduser("~/.insightface"))
-        mock_glob.assert_called_once_with("/fake/pack/det_*.onnx")
+        mock_glob.assert_any_call("/fake/pack/det_*.onnx")
         mock_convert.assert_called_once_with("/fake/pack/det_10g.onnx", det_size=(640, 640), uint8_input=True)
 
+    @patch("insightface.app.FaceAnalysis", autospec=False)
+    def test_load_model_converts_landmark_graph_to_dynamic_batch(self, mock_fa_cls: MagicMock) -> None:
+        mock_fa_cls.return_value = MagicMock()
+
+        def fake_glob(pattern: str) -> list[str]:
+            return ["/fake/pack/1k3d68.onnx"] if pattern == "/fake/pack/1k3d68*.onnx" else []
+
+        with (
+            patch("insightface.utils.ensure_available", return_value="/fake/pack"),
+            patch("glob.glob", side_effect=fake_glob),
+            patch(
+                "src.services.face_provider.landmark_export.convert_landmark_to_dynamic_batch",
+                return_value="converted",
+            ) as mock_convert,
+        ):
+            provider = InsightFaceProvider(use_gpu=False)
+            provider.load_model()
+
+        mock_convert.assert_called_once_with("/fake/pack/1k3d68.onnx")
+
     @patch("insightface.app.FaceAnalysis", autospec=False)
     def test_load_model_skips_conversion_when_disabled(self, mock_fa_cls: MagicMock) -> None:
         mock_fa_cls.return_value = MagicMock()
@@ -741,6 +986,193 @@ class TestBatchedDetection:
         assert provider._det_batch_capable() is False
 
 
+class TestBatchedDecode:
+    """The whole-batch decode + NMS must match the per-image decode exactly."""
+
+    @staticmethod
+    def _random_net_outs(n: int, seed: int, candidates: int = 150) -> list[np.ndarray]:
+        rng = np.random.default_rng(seed)
+        scores, bboxes, kpss = [], [], []
+        for stride in _DET_STRIDES:
+            k = _stride_anchor_count(stride)
+            s = (rng.random((n, k), dtype=np.float32) * 0.5).astype(np.float32)
+            for b in range(n):
+                hot = rng.choice(k, size=max(1, candidates * 8 // stride), replace=False)
+                s[b, hot] = 0.5 + rng.random(hot.size, dtype=np.float32) * 0.5
+            scores.append(s.reshape(-1, 1))
+            bboxes.append(rng.uniform(0.5, 6.0, (n * k, 4)).astype(np.float32))
+            kpss.append(rng.uniform(-3.0, 3.0, (n * k, 10)).astype(np.float32))
+        return [*scores, *bboxes, *kpss]
+
+    @staticmethod
+    def _assert_same(
+        ours: list[tuple[np.ndarray, np.ndarray | None]], reference: list[tuple[np.ndarray, np.ndarray | None]]
+    ) -> None:
+        for (det, kpss), (ref_det, ref_kpss) in zip(ours, reference, strict=True):
+            assert det.dtype == ref_det.dtype
+            np.testing.assert_array_equal(det, ref_det)
+            assert kpss is not None and ref_kpss is not None
+            assert kpss.dtype == ref_kpss.dtype
+            np.testing.assert_array_equal(kpss, ref_kpss)
+
+    def test_matches_per_image_decode(self) -> None:
+        provider, _ = _create_batched_provider([])
+        net_outs = self._random_net_outs(6, seed=11)
+        scales = [0.37, 1.0, 0.5, 2.25, 0.8125, 1.6]
+
+        with patch.object(provider, "_decode_det_output", wraps=provider._decode_det_output) as per_image:
+            ours = provider._decode_det_outputs(net_outs, scales)
+            assert per_image.call_count == 0  # no score ties: fully vectorized
+        reference = [provider._decode_det_output(net_outs, b, scales[b]) for b in range(6)]
+
+        assert sum(det.shape[0] for det, _ in reference) > 50
+        self._assert_same(ours, reference)
+
+    def test_tied_scores_take_per_image_path(self) -> None:
+        provider, _ = _create_batched_provider([])
+        net_outs = self._random_net_outs(3, seed=12)
+        k = _stride_anchor_count(8)
+        hot = np.flatnonzero(net_outs[0][k : 2 * k, 0] >= 0.5)
+        net_outs[0][k + hot[1], 0] = net_outs[0][k + hot[0], 0]  # image 1: two candidates tie
+        scales = [1.0, 0.5, 0.75]
+
+        with patch.object(provider, "_decode_det_output", wraps=provider._decode_det_output) as per_image:
+            ours = provider._decode_det_outputs(net_outs, scales)
+            assert [c.args[1] for c in per_image.call_args_list] == [1]
+        reference = [provider._decode_det_output(net_outs, b, scales[b]) for b in range(3)]
+
+        self._assert_same(ours, reference)
+
+    def test_images_without_candidates(self) -> None:
+        provider, _ = _create_batched_provider([])
+        net_outs = _craft_scrfd_net_outs([[], [((64.0, 128.0, 384.0, 448.0), 0.9)], []])
+
+        ours = provider._decode_det_outputs(net_outs, [1.0, 1.0, 1.0])
+
+        assert [det.shape for det, _ in ours] == [(0, 5), (1, 5), (0, 5)]
+        assert ours[0][1] is not None and ours[0][1].shape == (0, 5, 2)
+
+
+class _FakeDecodeSession:
+    """Stands in for an ORT session over the decode sidecar graph: returns
+    the crafted [N, max_dets, 15] detections for whatever batch it is fed."""
+
+    def __init__(self, dets: np.ndarray) -> None:
+        self._dets = dets
+        self.run_batch_sizes: list[int] = []
+        self.det_scales: list[np.ndarray] = []
+
+    def run(self, output_names: list[str], feed: dict[str, np.ndarray]) -> list[np.ndarray]:
+        assert output_names == ["dets"]
+        assert set(feed) == {"input.1", "det_scale"}
+        n = feed["input.1"].shape[0]
+        assert feed["det_scale"].shape == (n,)
+        self.run_batch_sizes.append(n)
+        self.det_scales.append(feed["det_scale"])
+        return [self._dets[:n]]
+
+
+def _graph_det_row(bbox: tuple[float, float, float, float], score: float) -> np.ndarray:
+    """One decode-graph output row: box, score, and all five keypoints at the
+    box center (detector-input pixels)."""
+    cx, cy = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+    return np.array([*bbox, score, *([cx, cy] * 5)], dtype=np.float32)
+
+
+class TestGraphDecode:
+    def test_batched_detection_runs_decode_graph(self) -> None:
+        provider, mock_app = _create_batched_provider([])
+        dets = np.zeros((2, 8, 15), dtype=np.float32)
+        dets[0, 0] = _graph_det_row((64.0, 128.0, 384.0, 448.0), 0.9)
+        dets[1, 0] = _graph_det_row((128.0, 192.0, 256.0, 320.0), 0.8)
+        dets[1, 1] = _graph_det_row((384.0, 384.0, 448.0, 448.0), 0.6)
+        decode_session = _FakeDecodeSession(dets)
+        provider._det_decode_model = MagicMock(
+            session=decode_session, output_names=["dets"], input_name="input.1", input_names=["input.1", "det_scale"]
+        )
+
+        results = provider.detect_batch([_fake_image_bytes(), _fake_image_bytes()])
+
+        assert decode_session.run_batch_sizes == [2]
+        np.testing.assert_allclose(decode_session.det_scales[0], [6.4, 6.4])  # 100x100 letterboxed to 640
+        assert mock_app.det_model.session.run_batch_sizes == []  # raw anchor maps never fetched
+        assert [len(faces) for faces in results] == [1, 2]
+        f0 = results[0][0]
+        assert f0.bbox.x == pytest.approx(10.0, abs=0.05)
+        assert f0.bbox.y == pytest.approx(20.0, abs=0.05)
+        assert f0.bbox.width == pytest.approx(50.0, abs=0.1)
+        assert f0.det_score == pytest.approx(0.9, rel=1e-3)
+        assert f0.landmarks is not None
+        assert f0.landmarks[0] == pytest.approx((35.0, 45.0), abs=0.05)
+        assert [f.det_score for f in results[1]] == pytest.approx([0.8, 0.6], rel=1e-3)
+
+    def test_graph_dets_drops_padding_and_rescales(self) -> None:
+        dets = np.zeros((3, 4, 15), dtype=np.float32)
+        dets[0, 0] = _graph_det_row((10.0, 20.0, 30.0, 40.0), 0.7)
+        dets[2, :2] = [_graph_det_row((0.0, 0.0, 8.0, 8.0), 0.9), _graph_det_row((16.0, 16.0, 32.0, 32.0), 0.5)]
+
+        out = InsightFaceProvider._graph_dets(dets, [0.5, 1.0, 2.0], use_kps=True)
+
+        assert [det.shape for det, _ in out] == [(1, 5), (0, 5), (2, 5)]
+        det, kpss = out[0]
+        assert det.dtype == np.float32
+        np.testing.assert_array_equal(det, np.array([[20.0, 40.0, 60.0, 80.0, 0.7]], dtype=np.float32))
+        assert kpss is not None and kpss.shape == (1, 5, 2)
+        np.testing.assert_array_equal(kpss[0, 0], [40.0, 60.0])
+        np.testing.assert_array_equal(out[2][0][:, :4], [[0.0, 0.0, 4.0, 4.0], [8.0, 8.0, 16.0, 16.0]])
+
+    def test_graph_dets_without_keypoints(self) -> None:
+        dets = np.zeros((1, 2, 15), dtype=np.float32)
+        dets[0, 0] = _graph_det_row((10.0, 20.0, 30.0, 40.0), 0.7)
+
+        ((det, kpss),) = InsightFaceProvider._graph_dets(dets, [1.0], use_kps=False)
+
+        assert det.shape == (1, 5)
+        assert kpss is None
+
+    def test_load_decode_model_bakes_detector_thresholds(self) -> None:
+        from types import SimpleNamespace
+
+        from insightface.model_zoo.model_zoo import PickableInferenceSession
+        from src.services.face_provider.scrfd_export import DECODE_SUFFIX
+
+        provider, mock_app = _create_batched_provider([], det_graph_decode=True, det_graph_max_dets=64)
+        mock_app.det_model.model_file = "/fake/pack/det_10g.onnx"
+        mock_app.det_model.det_thresh = 0.6
+        opened: list[str] = []
+
+        def _fake_init(self_sess: object, model_path: str, **kwargs: object) -> None:
+            opened.append(model_path)
+
+        with (
+            patch("src.services.face_provider.scrfd_export.export_decode_graph", return_value="written") as mock_export,
+            patch.object(PickableInferenceSession, "__init__", _fake_init),
+            patch.object(
+                PickableInferenceSession,
+                "get_inputs",
+                return_value=[SimpleNamespace(name="input.1"), SimpleNamespace(name="det_scale")],
+            ),
+            patch.object(PickableInferenceSession, "get_outputs", return_value=[SimpleNamespace(name="dets")]),
+        ):
+            decode_model = provider._load_det_decode_model(["CPUExecutionProvider"], [{}], MagicMock())
+
+        mock_export.assert_called_once_with(
+            "/fake/pack/det_10g.onnx", score_threshold=0.6, iou_threshold=0.4, max_dets=64
+        )
+        assert opened == ["/fake/pack/det_10g.onnx" + DECODE_SUFFIX]
+        assert decode_model.input_names == ["input.1", "det_scale"]
+        assert decode_model.output_names == ["dets"]
+        assert decode_model.input_name == "input.1"
+        assert mock_app.det_model.output_names == [f"out_{i}" for i in range(9)]  # detector itself untouched
+
+    def test_unsupported_detector_keeps_python_decode(self) -> None:
+        provider, _ = _create_batched_provider([], det_graph_decode=True)
+        provider._app.det_model.model_file = "/fake/pack/det_500m.onnx"
+
+        with patch("src.services.face_provider.scrfd_export.export_decode_graph", return_value="unsupported"):
+            assert provider._load_det_decode_model(["CPUExecutionProvider"], [{}], MagicMock()) is None
+
+
 class TestUint8DetectorInput:
     def test_uint8_graph_gets_raw_uint8_canvases(self) -> None:
         responses = [_craft_scrfd_net_outs([[((64.0, 128.0, 384.0, 448.0), 0.9)]])]
@@ -885,6 +1317,140 @@ class TestBatchedGenderage:
         np.testing.assert_allclose(ours.astype(np.int16), theirs.astype(np.int16), atol=1)
 
 
+def _make_pose_model(path: str) -> None:
+    """Batch-1 graph with the 1k3d68 interface ([1, 3, 192, 192] -> [1, 3309]):
+    the last 68 points are the mean shape plus a crop-dependent offset, so
+    each face gets a different, plausible pose."""
+    import onnx
+    from insightface.data import get_object
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(7)
+    bias = np.zeros((1103, 3), dtype=np.float32)
+    bias[-68:] = get_object("meanshape_68.pkl") * np.array([0.6, -0.6, 0.6], dtype=np.float32)
+    inits = [
+        numpy_helper.from_array(np.array([1, -1], dtype=np.int64), name="flat_shape"),
+        numpy_helper.from_array(rng.normal(0, 0.2, (3, 3309)).astype(np.float32), name="fc_w"),
+        numpy_helper.from_array(bias.reshape(-1), name="fc_b"),
+    ]
+    nodes = [
+        helper.make_node("GlobalAveragePool", ["data"], ["pooled"]),
+        helper.make_node("Reshape", ["pooled", "flat_shape"], ["flat"]),
+        helper.make_node("Gemm", ["flat", "fc_w", "fc_b"], ["fc1"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "pose_like",
+        [helper.make_tensor_value_info("data", TensorProto.FLOAT, [1, 3, 192, 192])],
+        [helper.make_tensor_value_info("fc1", TensorProto.FLOAT, [1, 3309])],
+        initializer=inits,
+    )
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)]), path)
+
+
+class TestBatchedPose:
+    @pytest.fixture
+    def pose_models(self, tmp_path: object) -> tuple[object, object]:
+        """(stock batch-1 Landmark, Landmark over the dynamic-batch export)."""
+        import pathlib
+
+        from insightface.model_zoo.landmark import Landmark
+        from src.services.face_provider.landmark_export import convert_landmark_to_dynamic_batch
+
+        path = str(pathlib.Path(str(tmp_path)) / "1k3d68.onnx")
+        _make_pose_model(path)
+        assert convert_landmark_to_dynamic_batch(path) == "converted"
+        return Landmark(model_file=path + ".bak"), Landmark(model_file=path)
+
+    def test_batched_pose_matches_landmark_get(self, pose_models: tuple[object, object]) -> None:
+        stock, converted = pose_models
+        rng = np.random.default_rng(2)
+        img = rng.integers(0, 255, size=(300, 400, 3), dtype=np.uint8)
+        bboxes = np.array(
+            [[20, 30, 120, 160, 0.9], [200, 40, 260, 110, 0.9], [150, 150, 390, 290, 0.9], [0, 0, 50, 40, 0.9]],
+            dtype=np.float32,
+        )
+        provider, mock_app = _create_provider_with_mock()
+
+        mock_app.models["landmark_3d_68"] = stock
+        reference = provider._estimate_poses(img, bboxes, None)  # per-face Landmark.get
+        mock_app.models["landmark_3d_68"] = converted
+        with patch.object(provider, "_session_run", wraps=provider._session_run) as session_run:
+            batched = provider._estimate_poses(img, bboxes, None)
+
+        assert session_run.call_count == 1
+        assert session_run.call_args.args[1].shape == (4, 3, 192, 192)
+        for ours, theirs in zip(batched, reference, strict=True):
+            assert ours is not None and theirs is not None
+            assert ours.pitch == pytest.approx(theirs.pitch, abs=1e-3)
+            assert ours.yaw == pytest.approx(theirs.yaw, abs=1e-3)
+            assert ours.roll == pytest.approx(theirs.roll, abs=1e-3)
+
+    def test_detect_batch_runs_one_pose_pass_for_all_images(self, pose_models: tuple[object, object]) -> None:
+        responses = [
+            _craft_scrfd_net_outs(
+                [
+                    [((64.0, 128.0, 384.0, 448.0), 0.9)],
+                    [((128.0, 192.0, 256.0, 320.0), 0.8)],
+                ]
+            )
+        ]
+        provider, mock_app = _create_batched_provider(responses)
+        mock_app.models["landmark_3d_68"] = pose_models[1]
+
+        with patch.object(provider, "_session_run", wraps=provider._session_run) as session_run:
+            results = provider.detect_batch([_fake_image_bytes(), _fake_image_bytes()], include_pose=True)
+
+        pose_runs = [c.args[1] for c in session_run.call_args_list if c.args[0] is pose_models[1]]
+        assert [blob.shape[0] for blob in pose_runs] == [2]
+        assert results[0][0].pose is not None
+        assert results[1][0].pose is not None
+
+
+class TestFastPose:
+    @staticmethod
+    def _rotation(pitch: float, yaw: float, roll: float) -> np.ndarray:
+        x, y, z = np.radians([pitch, yaw, roll])
+        rx = np.array([[1, 0, 0], [0, np.cos(x), -np.sin(x)], [0, np.sin(x), np.cos(x)]])
+        ry = np.array([[np.cos(y), 0, np.sin(y)], [0, 1, 0], [-np.sin(y), 0, np.cos(y)]])
+        rz = np.array([[np.cos(z), -np.sin(z), 0], [np.sin(z), np.cos(z), 0], [0, 0, 1]])
+        return rz @ ry @ rx  # type: ignore[no-any-return]
+
+    def test_recovers_projected_pose_in_insightface_convention(self) -> None:
+        from insightface.utils import transform
+        from src.services.face_provider.insightface import _POSE_REF_5PT, _poses_from_keypoints
+
+        angles = [(0.0, 0.0, 0.0), (10.0, -25.0, 5.0), (-20.0, 40.0, -12.0), (30.0, 10.0, 20.0)]
+        rotations = [self._rotation(*a) for a in angles]
+        # Weak-perspective projections at different scales and offsets.
+        kpss = np.stack(
+            [(150.0 + 20 * i) * (_POSE_REF_5PT @ r.T)[:, :2] + (300 + 40 * i) for i, r in enumerate(rotations)]
+        ).astype(np.float32)
+
+        poses = _poses_from_keypoints(kpss)
+
+        for pose, r in zip(poses, rotations, strict=True):
+            np.testing.assert_allclose(pose, transform.matrix2angle(r), atol=0.05)
+
+    def test_detect_fast_pose_runs_no_pose_model(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+        mock_pose = MagicMock()
+        mock_app.models["landmark_3d_68"] = mock_pose
+
+        faces = provider.detect(_fake_image_bytes(), include_pose=True, pose_mode="fast")
+        (batched,) = provider.detect_batch([_fake_image_bytes()], include_pose=True, pose_mode="fast")
+
+        assert faces[0].pose is not None
+        assert batched[0].pose == faces[0].pose
+        mock_pose.get.assert_not_called()
+
+    def test_fast_pose_without_landmark_model(self) -> None:
+        provider, _ = _create_provider_with_mock()
+        faces = provider.detect(_fake_image_bytes(), include_pose=True, pose_mode="fast")
+        assert faces[0].pose is not None
+        assert abs(faces[0].pose.roll) < 1.0  # the fake keypoints are level
+
+
 class _FakeComputeSession:
     """Thread-safe fake detector session: derives the response from the fed
     blob's batch size instead of a pre-queued list, so concurrent requests can
@@ -943,7 +1509,7 @@ def _create_concurrent_provider() -> tuple[InsightFaceProvider, MagicMock]:
 
 class TestConcurrentInference:
     """FACE_MAX_INFLIGHT > 1 lets several requests run provider methods from
-    different threads; the internal GPU lock must keep results correct."""
+    different threads; the pass scheduler must keep results correct."""
 
     def test_concurrent_detect_batch_threads(self) -> None:
         from concurrent.futures import ThreadPoolExecutor as TestPool
@@ -954,7 +1520,8 @@ class TestConcurrentInference:
         with TestPool(max_workers=3) as pool:
             all_results = list(pool.map(lambda _: provider.detect_batch(payload), range(3)))
 
-        assert mock_app.det_model.session.run_count == 3  # one batched pass per request
+        # One batched pass per request at most — concurrent passes may merge.
+        assert 1 <= mock_app.det_model.session.run_count <= 3
         for results in all_results:
             assert len(results) == 2
             for faces in results:
@@ -1000,6 +1567,24 @@ class TestDynamicBatchRollback:
         assert det_path.read_bytes() == b"stock-graph"
         assert not (pack_dir / "det_10g.onnx.bak").exists()
 
+    @patch("insightface.app.FaceAnalysis", autospec=False)
+    def test_disabling_pose_flag_restores_stock_landmark_graph(self, mock_fa_cls: MagicMock, tmp_path: object) -> None:
+        import pathlib
+
+        mock_fa_cls.return_value = MagicMock()
+        pack_dir = pathlib.Path(str(tmp_path)) / "models" / "buffalo_l"
+        pack_dir.mkdir(parents=True)
+        (pack_dir / "1k3d68.onnx").write_bytes(b"converted-graph")
+        (pack_dir / "1k3d68.onnx.bak").write_bytes(b"stock-graph")
+
+        provider = InsightFaceProvider(
+            use_gpu=False, model_dir=str(tmp_path), det_dynamic_batch=False, pose_dynamic_batch=False
+        )
+        provider.load_model()
+
+        assert (pack_dir / "1k3d68.onnx").read_bytes() == b"stock-graph"
+        assert not (pack_dir / "1k3d68.onnx.bak").exists()
+
     @patch("insightface.app.FaceAnalysis", autospec=False)
     def test_disabling_flag_is_noop_without_bak(self, mock_fa_cls: MagicMock, tmp_path: object) -> None:
         import pathlib
@@ -1071,3 +1656,38 @@ class TestVectorizedNormEstimation:
         for i in range(lmks.shape[0]):
             single = _estimate_norm(lmks[i], 112)
             np.testing.assert_allclose(batched[i], single, atol=1e-8)
+
+
+class TestEmbeddingFormats:
+    def test_embed_packed_f16_matches_float_list(self) -> None:
+        provider, mock_app = _create_provider_with_mock()
+        mock_app.models["recognition"].get_feat.return_value = np.random.randn(1, 512).astype(np.float32)
+
+        (as_list,) = provider.embed(_fake_image_bytes())
+        (packed,) = provider.embed(_fake_image_bytes(), embedding_format="f16_b64")
+
+        assert packed.embedding is None
+        assert packed.embedding_packed is not None
+        vec = np.frombuffer(packed.embedding_packed, dtype="<f2").astype(np.float32)
+        np.testing.assert_allclose(vec, as_list.embedding, atol=1e-3)
+
+    def test_int8_quantization_preserves_cosine(self) -> None:
+        from src.services.face_provider.embedding_codec import encode_embeddings
+
+        rng = np.random.default_rng(7)
+        emb = rng.standard_normal((4, 512)).astype(np.float32)
+        emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+
+        encoded = encode_embeddings(emb, "int8_b64")
+
+        for row, enc in zip(emb, encoded, strict=True):
+            assert enc.packed is not None
+            assert enc.scale is not None
+            restored = np.frombuffer(enc.packed, dtype=np.int8) * enc.scale
+            cos = float(np.dot(row, restored) / np.linalg.norm(restored))
+            assert cos > 0.9999
+
+    def test_empty_matrix(self) -> None:
+        from src.services.face_provider.embedding_codec import encode_embeddings
+
+        assert encode_embeddings(np.zeros((0, 512), dtype=np.float32), "int8_b64") == []
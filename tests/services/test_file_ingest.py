@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+from src.services.file_ingest import FileIngestor, IngestPathError
+
+
+class TestFileIngestor:
+    def test_reads_relative_and_absolute_paths(self, tmp_path: Path) -> None:
+        (tmp_path / "a").mkdir()
+        (tmp_path / "a" / "img.jpg").write_bytes(b"jpeg")
+        ingestor = FileIngestor(str(tmp_path), max_bytes=1024)
+        assert ingestor.read("a/img.jpg") == b"jpeg"
+        assert ingestor.read(str(tmp_path / "a" / "img.jpg")) == b"jpeg"
+
+    def test_rejects_paths_outside_root(self, tmp_path: Path) -> None:
+        root = tmp_path / "root"
+        root.mkdir()
+        (tmp_path / "secret").write_bytes(b"x")
+        (root / "link").symlink_to(tmp_path / "secret")
+        ingestor = FileIngestor(str(root), max_bytes=1024)
+        for path in ("../secret", str(tmp_path / "secret"), "link"):
+            with pytest.raises(IngestPathError, match="outside"):
+                ingestor.read(path)
+
+    def test_rejects_missing_empty_and_oversized_files(self, tmp_path: Path) -> None:
+        (tmp_path / "empty").write_bytes(b"")
+        (tmp_path / "big").write_bytes(b"x" * 11)
+        ingestor = FileIngestor(str(tmp_path), max_bytes=10)
+        with pytest.raises(IngestPathError, match="Cannot read"):
+            ingestor.read("missing.jpg")
+        with pytest.raises(IngestPathError, match="Empty"):
+            ingestor.read("empty")
+        with pytest.raises(IngestPathError, match="exceeds"):
+            ingestor.read("big")
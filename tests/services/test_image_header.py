@@ -0,0 +1,34 @@
+import cv2  # type: ignore[import-untyped]
+import numpy as np
+import pytest
+from src.services.image_header import image_size, megapixels
+
+_IMG = np.zeros((37, 53, 3), dtype=np.uint8)
+
+
+class TestImageSize:
+    @pytest.mark.parametrize(
+        ("ext", "params"),
+        [
+            (".jpg", []),
+            (".jpg", [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]),
+            (".png", []),
+            (".webp", []),
+            (".webp", [cv2.IMWRITE_WEBP_QUALITY, 101]),  # lossless (VP8L)
+            (".bmp", []),
+        ],
+    )
+    def test_reads_size_from_header(self, ext: str, params: list[int]) -> None:
+        _, buf = cv2.imencode(ext, _IMG, params)
+        assert image_size(buf.tobytes()) == (53, 37)
+
+    def test_gif(self) -> None:
+        assert image_size(b"GIF89a\x35\x00\x25\x00") == (53, 37)
+
+    def test_header_only_is_enough(self) -> None:
+        _, buf = cv2.imencode(".jpg", np.zeros((2000, 3000, 3), dtype=np.uint8))
+        assert megapixels(buf.tobytes()[:1024]) == pytest.approx(6.0)
+
+    @pytest.mark.parametrize("data", [b"", b"not an image", b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff\xe0\x00"])
+    def test_unknown_or_truncated(self, data: bytes) -> None:
+        assert image_size(data) is None
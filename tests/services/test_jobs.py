@@ -0,0 +1,119 @@
+import asyncio
+import io
+from pathlib import Path
+
+import pytest
+from src.services.jobs import Job, JobSpool, JobTooLargeError, JobWorker
+
+
+async def _echo(job: Job, images: list[bytes], start: int) -> tuple[bytes, int]:
+    return b"".join(b"%d:%s\n" % (i, img) for i, img in enumerate(images, start)), len(images)
+
+
+async def _wait_finished(spool: JobSpool, job_id: str) -> Job:
+    for _ in range(200):
+        job = spool.load(job_id)
+        if job.finished:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job never finished")
+
+
+def _submit(spool: JobSpool, images: list[bytes], chunk_size: int) -> Job:
+    writer = spool.create("embed", {}, chunk_size)
+    writer.extend(images)
+    return writer.commit()
+
+
+class TestJobSpool:
+    def test_reads_back_image_ranges(self, tmp_path: Path) -> None:
+        spool = JobSpool(tmp_path)
+        job = _submit(spool, [b"a", b"", b"ccc", b"dd"], chunk_size=2)
+
+        assert spool.read_images(job.job_id, 1, 4) == [b"", b"ccc", b"dd"]
+        assert spool.job_ids() == [job.job_id]
+
+    def test_uncommitted_upload_invisible(self, tmp_path: Path) -> None:
+        spool = JobSpool(tmp_path)
+        writer = spool.create("embed", {}, 2)
+        writer.add(b"a")
+
+        assert spool.job_ids() == []
+        spool.prune(ttl_s=-1)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_file_copy_stops_at_image_limit(self, tmp_path: Path) -> None:
+        spool = JobSpool(tmp_path)
+        writer = spool.create("embed", {}, 2, max_image_bytes=2 << 20)
+        writer.add_file(io.BytesIO(b"a" * (2 << 20)))
+
+        with pytest.raises(JobTooLargeError, match="image exceeds"):
+            writer.add_file(io.BytesIO(b"b" * (8 << 20)))
+        # Cut off within the limit, not after the whole source was copied.
+        assert (tmp_path / writer.job.job_id / "images.bin").stat().st_size <= 4 << 20
+        writer.abort()
+
+    def test_job_byte_limit_counts_all_images(self, tmp_path: Path) -> None:
+        spool = JobSpool(tmp_path)
+        writer = spool.create("embed", {}, 2, max_bytes=5)
+        writer.extend([b"ab", b"cd"])
+
+        with pytest.raises(JobTooLargeError, match="images exceed 5 bytes"):
+            writer.add_file(io.BytesIO(b"ef"))
+        writer.abort()
+
+
+class TestJobWorker:
+    async def test_runs_job_in_chunks(self, tmp_path: Path) -> None:
+        spool = JobSpool(tmp_path)
+        worker = JobWorker(spool, _echo, ttl_s=3600)
+        worker.start()
+        job = _submit(spool, [b"a", b"b", b"c"], chunk_size=2)
+        worker.submit(job)
+        try:
+            job = await _wait_finished(spool, job.job_id)
+        finally:
+            await worker.stop()
+
+        assert (job.status, job.processed_images, job.total_faces, job.result_chunks) == ("completed", 3, 3, 2)
+        assert spool.results_path(job.job_id, 1).read_bytes() == b"2:c\n"
+
+    async def test_resumes_unfinished_job_on_start(self, tmp_path: Path) -> None:
+        spool = JobSpool(tmp_path)
+        job = _submit(spool, [b"a", b"b", b"c"], chunk_size=2)
+        # As left by a restart after the first chunk.
+        spool.write_results(job, b"0:a\n1:b\n")
+        job.status, job.processed_images = "running", 2
+        spool.save(job)
+        calls: list[int] = []
+
+        async def _process(job: Job, images: list[bytes], start: int) -> tuple[bytes, int]:
+            calls.append(start)
+            return await _echo(job, images, start)
+
+        worker = JobWorker(spool, _process, ttl_s=3600)
+        worker.start()
+        try:
+            job = await _wait_finished(spool, job.job_id)
+        finally:
+            await worker.stop()
+
+        assert calls == [2]
+        assert job.status == "completed"
+
+    async def test_failing_chunk_fails_job(self, tmp_path: Path) -> None:
+        spool = JobSpool(tmp_path)
+
+        async def _fail(job: Job, images: list[bytes], start: int) -> tuple[bytes, int]:
+            raise RuntimeError("boom")
+
+        worker = JobWorker(spool, _fail, ttl_s=3600)
+        worker.start()
+        job = _submit(spool, [b"a"], chunk_size=2)
+        worker.submit(job)
+        try:
+            job = await _wait_finished(spool, job.job_id)
+        finally:
+            await worker.stop()
+
+        assert (job.status, job.error) == ("failed", "boom")
@@ -0,0 +1,71 @@
+import os
+from pathlib import Path
+
+import numpy as np
+from src.services.face_provider.landmark_export import (
+    convert_landmark_to_dynamic_batch,
+    validate_dynamic_batch,
+)
+
+
+def _make_landmark_like_model(path: str, spatial: object = 16) -> None:
+    """Batch-1 CNN shaped like 1k3d68: input [1, 3, S, S], a Reshape pinned
+    to [1, -1] before the fully connected head, output [1, K]."""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(0)
+    inp = helper.make_tensor_value_info("data", TensorProto.FLOAT, [1, 3, spatial, spatial])
+    inits = [
+        numpy_helper.from_array(rng.standard_normal((4, 3, 3, 3), dtype=np.float32), name="conv_w"),
+        numpy_helper.from_array(np.array([1, -1], dtype=np.int64), name="flat_shape"),
+        numpy_helper.from_array(rng.standard_normal((4, 9), dtype=np.float32), name="fc_w"),
+    ]
+    nodes = [
+        helper.make_node("Conv", ["data", "conv_w"], ["conv"], strides=[4, 4]),
+        helper.make_node("GlobalAveragePool", ["conv"], ["pooled"]),
+        helper.make_node("Reshape", ["pooled", "flat_shape"], ["flat"]),
+        helper.make_node("MatMul", ["flat", "fc_w"], ["fc1"]),
+    ]
+    out = helper.make_tensor_value_info("fc1", TensorProto.FLOAT, [1, 9])
+    graph = helper.make_graph(nodes, "landmark_like", [inp], [out], initializer=inits)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)])
+    onnx.checker.check_model(model)
+    onnx.save(model, path)
+
+
+class TestConvertLandmarkToDynamicBatch:
+    def test_converts_and_batch_matches_per_image(self, tmp_path: Path) -> None:
+        import onnxruntime as ort
+
+        model_path = str(tmp_path / "1k3d68.onnx")
+        _make_landmark_like_model(model_path)
+
+        assert convert_landmark_to_dynamic_batch(model_path) == "converted"
+        assert os.path.exists(model_path + ".bak")
+
+        sess = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        assert sess.get_inputs()[0].shape == ["batch", 3, 16, 16]
+        blob = np.random.default_rng(1).standard_normal((3, 3, 16, 16), dtype=np.float32)
+        (batched,) = sess.run(None, {"data": blob})
+        assert batched.shape == (3, 9)
+
+        validate_dynamic_batch(model_path + ".bak", model_path)
+
+    def test_idempotent(self, tmp_path: Path) -> None:
+        model_path = str(tmp_path / "1k3d68.onnx")
+        _make_landmark_like_model(model_path)
+
+        assert convert_landmark_to_dynamic_batch(model_path) == "converted"
+        converted = Path(model_path).read_bytes()
+        assert convert_landmark_to_dynamic_batch(model_path) == "already_dynamic"
+        assert Path(model_path).read_bytes() == converted
+
+    def test_dynamic_spatial_graph_left_untouched(self, tmp_path: Path) -> None:
+        model_path = str(tmp_path / "1k3d68.onnx")
+        _make_landmark_like_model(model_path, spatial="?")
+        original = Path(model_path).read_bytes()
+
+        assert convert_landmark_to_dynamic_batch(model_path) == "unsupported"
+        assert Path(model_path).read_bytes() == original
+        assert not os.path.exists(model_path + ".bak")
@@ -0,0 +1,336 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+from src.services.face_provider.pass_scheduler import PassInput, PassScheduler, parse_stage_slots
+from src.services.request_context import (
+    PRIORITY_RANK,
+    DeadlineExceededError,
+    Priority,
+    current_deadline,
+    current_priority,
+)
+
+
+def _wait_for_queue(scheduler: PassScheduler, n: int) -> None:
+    deadline = time.monotonic() + 2.0
+    while len(scheduler._queue) < n:
+        assert time.monotonic() < deadline, "callers never queued"
+        time.sleep(0.001)
+
+
+def _run_concurrently(
+    scheduler: PassScheduler, calls: list[tuple[str, PassInput]], fn: object, max_rows: int = 0
+) -> list[object]:
+    results: list[object] = [None] * len(calls)
+
+    def _call(i: int) -> None:
+        stage, inputs = calls[i]
+        try:
+            results[i] = scheduler.run(stage, inputs, fn, max_rows)  # type: ignore[arg-type]
+        except Exception as exc:  # noqa: BLE001
+            results[i] = exc
+
+    # Hold the device so every caller queues before the first pass runs.
+    with scheduler.exclusive():
+        threads = [threading.Thread(target=_call, args=(i,)) for i in range(len(calls))]
+        for t in threads:
+            t.start()
+        _wait_for_queue(scheduler, len(calls))
+    for t in threads:
+        t.join(timeout=2.0)
+    return results
+
+
+class TestPassScheduler:
+    def test_single_caller_passes_output_through(self) -> None:
+        scheduler = PassScheduler()
+        out = scheduler.run("rec", np.ones((2, 3)), lambda b: b * 2)
+        np.testing.assert_array_equal(out, np.full((2, 3), 2.0))
+        assert scheduler.passes == 1
+
+    def test_queued_inputs_merge_into_one_pass(self) -> None:
+        scheduler = PassScheduler()
+        seen: list[int] = []
+
+        def _double(blob: np.ndarray) -> np.ndarray:
+            seen.append(blob.shape[0])
+            return blob * 2
+
+        calls = [("det", np.full((n, 2), float(n))) for n in (1, 2, 3)]
+        results = _run_concurrently(scheduler, calls, _double)
+
+        assert seen == [6]
+        for (_, inputs), out in zip(calls, results, strict=True):
+            np.testing.assert_array_equal(out, inputs * 2)
+
+    def test_multi_row_outputs_are_routed_by_ratio(self) -> None:
+        scheduler = PassScheduler()
+
+        def _flat(blob: np.ndarray) -> list[np.ndarray]:
+            # SCRFD-style: K rows per image, flattened over the batch.
+            return [np.repeat(blob[:, 0], 4)]
+
+        calls = [("det", np.array([[1.0]])), ("det", np.array([[2.0], [3.0]]))]
+        results = _run_concurrently(scheduler, calls, _flat)
+
+        np.testing.assert_array_equal(results[0][0], [1.0] * 4)  # type: ignore[index]
+        np.testing.assert_array_equal(results[1][0], [2.0] * 4 + [3.0] * 4)  # type: ignore[index]
+
+    def test_tuple_inputs_merge_element_wise(self) -> None:
+        scheduler = PassScheduler()
+        seen: list[tuple[int, ...]] = []
+
+        def _scaled(inputs: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+            blob, scales = inputs
+            seen.append((blob.shape[0], scales.shape[0]))
+            return blob * scales[:, None]
+
+        calls: list[tuple[str, PassInput]] = [
+            ("det", (np.ones((1, 2)), np.array([2.0]))),
+            ("det", (np.ones((2, 2)), np.array([3.0, 4.0]))),
+        ]
+        results = _run_concurrently(scheduler, calls, _scaled, max_rows=3)
+
+        assert seen == [(3, 3)]
+        np.testing.assert_array_equal(results[0], [[2.0, 2.0]])
+        np.testing.assert_array_equal(results[1], [[3.0, 3.0], [4.0, 4.0]])
+
+    def test_max_rows_bounds_merged_pass(self) -> None:
+        scheduler = PassScheduler()
+        seen: list[int] = []
+
+        def _identity(blob: np.ndarray) -> np.ndarray:
+            seen.append(blob.shape[0])
+            return blob
+
+        _run_concurrently(scheduler, [("rec", np.zeros((2, 1))) for _ in range(3)], _identity, max_rows=4)
+
+        assert sorted(seen) == [2, 4]
+
+    def test_stages_are_not_merged(self) -> None:
+        scheduler = PassScheduler()
+        _run_concurrently(scheduler, [("det", np.zeros((1, 1))), ("rec", np.zeros((1, 1)))], lambda b: b)
+        assert scheduler.passes == 2
+
+    def test_pass_error_reaches_every_merged_caller(self) -> None:
+        scheduler = PassScheduler()
+
+        def _boom(blob: np.ndarray) -> np.ndarray:
+            raise RuntimeError("session failed")
+
+        results = _run_concurrently(scheduler, [("det", np.zeros((1, 1))) for _ in range(2)], _boom)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        with pytest.raises(RuntimeError):
+            scheduler.run("det", np.zeros((1, 1)), _boom)
+
+
+class TestPassLanes:
+    def test_other_stages_run_while_one_is_held(self) -> None:
+        scheduler = PassScheduler({})
+        with scheduler.exclusive("det"):
+            out = scheduler.run("rec", np.ones((1, 2)), lambda b: b + 1)
+        np.testing.assert_array_equal(out, np.full((1, 2), 2.0))
+
+    def test_serial_mode_holds_every_stage(self) -> None:
+        scheduler = PassScheduler(None)
+        ran = threading.Event()
+
+        def _call() -> None:
+            scheduler.run("rec", np.ones((1, 1)), lambda b: ran.set() or b)
+
+        with scheduler.exclusive("det"):
+            thread = threading.Thread(target=_call)
+            thread.start()
+            _wait_for_queue(scheduler, 1)
+            assert not ran.wait(0.05)
+        thread.join(timeout=2.0)
+        assert ran.is_set()
+
+    def test_stage_slots_bound_concurrent_passes(self) -> None:
+        scheduler = PassScheduler({"rec": 2})
+        inside = threading.Barrier(2, timeout=2.0)
+
+        def _call() -> None:
+            # Both callers must be inside the pass at once to pass the barrier.
+            scheduler.run("rec", np.ones((1, 1)), lambda b: (inside.wait(), b)[1])
+
+        with scheduler.exclusive("det"):
+            threads = [threading.Thread(target=_call) for _ in range(2)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(timeout=2.0)
+        assert not inside.broken
+
+    def test_parse_stage_slots(self) -> None:
+        assert parse_stage_slots("serial") is None
+        assert parse_stage_slots("per_model") == {}
+        assert parse_stage_slots("det=1, rec=2") == {"det": 1, "rec": 2}
+        with pytest.raises(ValueError, match="FACE_PASS_CONCURRENCY"):
+            parse_stage_slots("rec=0")
+
+
+class TestPassPriority:
+    def test_interactive_chunk_runs_before_queued_bulk(self) -> None:
+        scheduler = PassScheduler()
+        order: list[str] = []
+
+        def _call(priority: Priority, stage: str) -> None:
+            current_priority.set(priority)
+            scheduler.run(stage, np.zeros((1, 1)), lambda b: order.append(priority) or b)
+
+        with scheduler.exclusive():
+            bulk = threading.Thread(target=_call, args=("bulk", "det"))
+            bulk.start()
+            _wait_for_queue(scheduler, 1)
+            interactive = threading.Thread(target=_call, args=("interactive", "rec"))
+            interactive.start()
+            _wait_for_queue(scheduler, 2)
+        bulk.join(timeout=2.0)
+        interactive.join(timeout=2.0)
+
+        assert order == ["interactive", "bulk"]
+
+    def test_merged_pass_takes_interactive_inputs_first(self) -> None:
+        scheduler = PassScheduler()
+        seen: list[float] = []
+
+        def _call(priority: Priority, value: float) -> None:
+            current_priority.set(priority)
+            scheduler.run("rec", np.full((2, 1), value), lambda b: seen.extend(b[:, 0]) or b, max_rows=2)
+
+        with scheduler.exclusive():
+            threads = [threading.Thread(target=_call, args=("bulk", 1.0))]
+            threads[0].start()
+            _wait_for_queue(scheduler, 1)
+            threads.append(threading.Thread(target=_call, args=("interactive", 2.0)))
+            threads[1].start()
+            _wait_for_queue(scheduler, 2)
+        for t in threads:
+            t.join(timeout=2.0)
+
+        assert seen == [2.0, 2.0, 1.0, 1.0]
+
+
+class TestPassDeadline:
+    def test_expired_caller_never_runs(self) -> None:
+        scheduler = PassScheduler()
+        current_deadline.set(time.monotonic() - 1)
+        try:
+            with pytest.raises(DeadlineExceededError):
+                scheduler.run("det", np.zeros((1, 1)), lambda b: pytest.fail("expired input ran"))
+        finally:
+            current_deadline.set(None)
+        assert scheduler.passes == 0
+
+    def test_queued_caller_dropped_at_deadline(self) -> None:
+        scheduler = PassScheduler()
+        results: list[object] = []
+
+        def _call() -> None:
+            current_deadline.set(time.monotonic() + 0.01)
+            try:
+                results.append(scheduler.run("det", np.zeros((1, 1)), lambda b: b))
+            except DeadlineExceededError as exc:
+                results.append(exc)
+
+        with scheduler.exclusive():
+            thread = threading.Thread(target=_call)
+            thread.start()
+            thread.join(timeout=2.0)
+        assert isinstance(results[0], DeadlineExceededError)
+        assert scheduler._queue == []
+        assert scheduler.passes == 0
+
+    def test_caller_merged_into_running_pass_outlives_its_deadline(self) -> None:
+        # The bulk caller is merged into the interactive caller's pass, which
+        # is still running when the bulk deadline passes: it gets its rows,
+        # not a DeadlineExceededError (nor a failed queue removal).
+        scheduler = PassScheduler()
+        results: dict[str, object] = {}
+
+        def _slow_pass(blob: np.ndarray) -> np.ndarray:
+            time.sleep(0.2)
+            return blob * 2
+
+        def _call(priority: Priority, value: float, deadline_s: float | None) -> None:
+            current_priority.set(priority)
+            current_deadline.set(None if deadline_s is None else time.monotonic() + deadline_s)
+            try:
+                results[priority] = scheduler.run("det", np.full((1, 1), value), _slow_pass)
+            except Exception as exc:  # noqa: BLE001
+                results[priority] = exc
+
+        with scheduler.exclusive():
+            threads = [threading.Thread(target=_call, args=("bulk", 1.0, 0.1))]
+            threads[0].start()
+            _wait_for_queue(scheduler, 1)
+            threads.append(threading.Thread(target=_call, args=("interactive", 2.0, None)))
+            threads[1].start()
+            _wait_for_queue(scheduler, 2)
+        for t in threads:
+            t.join(timeout=2.0)
+
+        assert scheduler.passes == 1
+        np.testing.assert_array_equal(results["bulk"], [[2.0]])  # type: ignore[arg-type]
+        np.testing.assert_array_equal(results["interactive"], [[4.0]])  # type: ignore[arg-type]
+
+    def test_expiring_exclusive_waiter_wakes_outranked_waiters(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        # Both waiters wake when the lane frees; the bulk one (notified first)
+        # still sees the interactive one waiting and parks again, then the
+        # interactive one leaves at its deadline. The bulk caller has no
+        # deadline, so only that departure can wake it into the idle lane.
+        scheduler = PassScheduler()
+        checks: dict[int, int] = {}
+        bulk_rechecked = threading.Event()
+
+        def _check_deadline() -> None:
+            # Called with the condition held, after the entry check and after
+            # every wake. The interactive waiter expires on its first wake,
+            # but only once the bulk waiter has re-checked — and so parked
+            # again, still outranked — whichever of them woke first.
+            thread = threading.get_ident()
+            checks[thread] = checks.get(thread, 0) + 1
+            if checks[thread] == 1:
+                return
+            if current_priority.get() == "bulk":
+                bulk_rechecked.set()
+                return
+            while not bulk_rechecked.is_set():
+                scheduler._cond.wait(0.01)
+            raise DeadlineExceededError
+
+        monkeypatch.setattr("src.services.face_provider.pass_scheduler.check_deadline", _check_deadline)
+        results: dict[str, object] = {}
+
+        def _call(priority: Priority) -> None:
+            current_priority.set(priority)
+            try:
+                with scheduler.exclusive():
+                    results[priority] = "ran"
+            except DeadlineExceededError as exc:
+                results[priority] = exc
+
+        def _wait_for_waiter(priority: Priority) -> None:
+            deadline = time.monotonic() + 2.0
+            while not scheduler._exclusive_waiting.get(scheduler._lane(None), [0, 0])[PRIORITY_RANK[priority]]:
+                assert time.monotonic() < deadline, "waiter never parked"
+                time.sleep(0.001)
+
+        with scheduler.exclusive():
+            # Daemons: without the wake-up the bulk waiter never returns.
+            threads = [
+                threading.Thread(target=_call, args=(priority,), daemon=True) for priority in ("bulk", "interactive")
+            ]
+            threads[0].start()
+            _wait_for_waiter("bulk")
+            threads[1].start()
+            _wait_for_waiter("interactive")
+        for t in threads:
+            t.join(timeout=2.0)
+
+        assert isinstance(results["interactive"], DeadlineExceededError)
+        assert results["bulk"] == "ran"
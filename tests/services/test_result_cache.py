@@ -0,0 +1,45 @@
+import time
+
+import pytest
+from src.services.face_provider.base import BoundingBox, DetectedFace
+from src.services.result_cache import ResultCache, digest
+
+_FACE = DetectedFace(bbox=BoundingBox(x=1.0, y=2.0, width=3.0, height=4.0), det_score=0.9, embedding=[0.1] * 512)
+
+
+class TestResultCache:
+    def test_hit_after_put(self) -> None:
+        cache = ResultCache(2**20, ttl_s=60)
+        key = digest(b"image")
+        assert cache.get("detect", key) is None
+        cache.put("detect", key, [_FACE])
+        assert cache.get("detect", key) == [_FACE]
+        assert cache.get("embed", key) is None
+        assert cache.get("detect", digest(b"other")) is None
+
+    def test_evicts_least_recently_used_over_budget(self) -> None:
+        cache = ResultCache(2**20, ttl_s=60)
+        cache.put("embed", b"a", [_FACE])
+        per_entry = cache.nbytes
+        cache = ResultCache(2 * per_entry, ttl_s=60)
+        cache.put("embed", b"a", [_FACE])
+        cache.put("embed", b"b", [_FACE])
+        assert cache.get("embed", b"a") is not None
+        cache.put("embed", b"c", [_FACE])
+        assert len(cache) == 2
+        assert cache.get("embed", b"b") is None
+        assert cache.get("embed", b"a") is not None
+        assert cache.nbytes == 2 * per_entry
+
+    def test_entry_larger_than_budget_not_stored(self) -> None:
+        cache = ResultCache(100, ttl_s=60)
+        cache.put("embed", b"a", [_FACE])
+        assert len(cache) == 0
+
+    def test_expired_entry_is_a_miss(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        cache = ResultCache(2**20, ttl_s=10)
+        cache.put("detect", b"a", [])
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+        assert cache.get("detect", b"a") is None
+        assert cache.nbytes == 0
@@ -5,7 +5,12 @@ from pathlib import Path
 import numpy as np
 import pytest
 from src.services.face_provider.scrfd_export import (
+    DECODE_SCALE_INPUT,
+    DECODE_SUFFIX,
+    _reference_decode,
     convert_scrfd_to_dynamic_batch,
+    export_decode_graph,
+    validate_decode_graph,
     validate_dynamic_batch,
 )
 
@@ -30,6 +35,79 @@ def _make_scrfd_like_model(path: str) -> None:
     onnx.save(model, path)
 
 
+def _make_scrfd_heads_model(path: str, size: int = 64) -> None:
+    """Batch-1 graph with det_10g's nine heads (scores, boxes, keypoints for
+    strides 8/16/32, two anchors per cell) behind the stock head tail: a
+    pooled 1x1 conv per head, so the outputs follow the input. Biases keep
+    enough anchors over threshold, with overlapping boxes, for NMS to act."""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(0)
+    inp = helper.make_tensor_value_info("input.1", TensorProto.FLOAT, [1, 3, "?", "?"])
+    inits = [numpy_helper.from_array(np.array([-1, c], dtype=np.int64), name=f"flat_{c}") for c in (1, 4, 10)]
+    nodes = []
+    outputs = []
+    for head, chans in (("score", 1), ("bbox", 4), ("kps", 10)):
+        for stride in (8, 16, 32):
+            name = f"{head}_{stride}"
+            weight = rng.standard_normal((2 * chans, 3, 1, 1)).astype(np.float32) * (4.0 if head == "score" else 0.5)
+            bias = np.full(2 * chans, 0.0 if head == "score" else 1.5, dtype=np.float32)
+            inits += [
+                numpy_helper.from_array(weight, name=f"{name}_w"),
+                numpy_helper.from_array(bias, name=f"{name}_b"),
+            ]
+            nodes += [
+                helper.make_node(
+                    "AveragePool", ["input.1"], [f"{name}_pool"], kernel_shape=[stride] * 2, strides=[stride] * 2
+                ),
+                helper.make_node("Conv", [f"{name}_pool", f"{name}_w", f"{name}_b"], [f"{name}_conv"]),
+                # Box distances are non-negative, like a trained head's.
+                helper.make_node("Abs" if head == "bbox" else "Identity", [f"{name}_conv"], [f"{name}_head"]),
+                helper.make_node("Transpose", [f"{name}_head"], [f"{name}_t"], perm=[2, 3, 0, 1]),
+                helper.make_node("Reshape", [f"{name}_t", f"flat_{chans}"], [f"{name}_flat"]),
+                helper.make_node("Sigmoid" if head == "score" else "Identity", [f"{name}_flat"], [name]),
+            ]
+            rows = 2 * (size // stride) ** 2
+            outputs.append(helper.make_tensor_value_info(name, TensorProto.FLOAT, [rows, chans]))
+    graph = helper.make_graph(nodes, "scrfd_heads", [inp], outputs, initializer=inits)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)])
+    onnx.checker.check_model(model)
+    onnx.save(model, path)
+
+
+def _make_converted_constant_heads_model(path: str, heads: list[np.ndarray], size: int = 64) -> None:
+    """A converted-style graph (dynamic batch, static ``size`` input) whose
+    nine flat head outputs are ``heads`` — per image ``[K, C]`` — for every
+    image of the batch, whatever the pixels."""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    inp = helper.make_tensor_value_info("input.1", TensorProto.FLOAT, ["batch", 3, size, size])
+    inits = [numpy_helper.from_array(np.zeros((), dtype=np.float32), name="zero")]
+    nodes = [
+        helper.make_node("ReduceMean", ["input.1"], ["pooled"], axes=[1, 2, 3], keepdims=1),
+        helper.make_node("Mul", ["pooled", "zero"], ["batch_zero"]),  # [N, 1, 1, 1] of zeros
+        helper.make_node("Squeeze", ["batch_zero"], ["batch_col"], axes=[3]),  # [N, 1, 1]
+    ]
+    outputs = []
+    for i, head in enumerate(heads):
+        name = f"head_{i}"
+        inits += [
+            numpy_helper.from_array(head[None].astype(np.float32), name=f"{name}_value"),
+            numpy_helper.from_array(np.array([-1, head.shape[1]], dtype=np.int64), name=f"{name}_shape"),
+        ]
+        nodes += [
+            helper.make_node("Add", ["batch_col", f"{name}_value"], [f"{name}_batched"]),
+            helper.make_node("Reshape", [f"{name}_batched", f"{name}_shape"], [name]),
+        ]
+        outputs.append(helper.make_tensor_value_info(name, TensorProto.FLOAT, [None, head.shape[1]]))
+    graph = helper.make_graph(nodes, "constant_heads", [inp], outputs, initializer=inits)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)])
+    onnx.checker.check_model(model)
+    onnx.save(model, path)
+
+
 class TestConvertScrfdToDynamicBatch:
     def test_converts_and_batches_fold_correctly(self, tmp_path: Path) -> None:
         import onnxruntime as ort
@@ -155,6 +233,114 @@ class TestRealDetectorConversion:
         # Batched outputs must match the original graph run image-by-image.
         validate_dynamic_batch(model_path + ".bak", model_path, det_size=(640, 640), batch=2)
 
+        assert export_decode_graph(model_path) == "written"
+        validate_decode_graph(model_path, model_path + DECODE_SUFFIX, batch=2)
+
+
+class TestDecodeGraph:
+    @pytest.mark.parametrize("uint8_input", [False, True])
+    def test_matches_python_decode(self, tmp_path: Path, uint8_input: bool) -> None:
+        model_path = str(tmp_path / "det_heads.onnx")
+        _make_scrfd_heads_model(model_path)
+        assert convert_scrfd_to_dynamic_batch(model_path, det_size=(64, 64), uint8_input=uint8_input) == "converted"
+
+        assert export_decode_graph(model_path) == "written"
+        validate_decode_graph(model_path, model_path + DECODE_SUFFIX, batch=4)
+
+    def test_compact_output_is_exact_and_zero_padded(self, tmp_path: Path) -> None:
+        import onnxruntime as ort
+
+        model_path = str(tmp_path / "det_heads.onnx")
+        _make_scrfd_heads_model(model_path)
+        convert_scrfd_to_dynamic_batch(model_path, det_size=(64, 64), uint8_input=False)
+        export_decode_graph(model_path, max_dets=40)
+
+        raw = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        dec = ort.InferenceSession(model_path + DECODE_SUFFIX, providers=["CPUExecutionProvider"])
+        blob = np.random.default_rng(5).standard_normal((3, 3, 64, 64), dtype=np.float32)
+        net_outs = raw.run(None, {"input.1": blob})
+        (dets,) = dec.run(None, {"input.1": blob, DECODE_SCALE_INPUT: np.ones(3, dtype=np.float32)})
+
+        assert dets.shape == (3, 40, 15)
+        for b in range(3):
+            ref_det, ref_kps = _reference_decode(net_outs, b, (64, 64), 0.5, 0.4)
+            n = ref_det.shape[0]
+            assert 0 < n < 40
+            # NMS actually suppressed something, and kept rows are bit-exact.
+            assert n < sum(int((scores.reshape(3, -1)[b] >= 0.5).sum()) for scores in net_outs[:3])
+            np.testing.assert_array_equal(dets[b, :n], np.hstack((ref_det, ref_kps.reshape(n, -1))))
+            assert not dets[b, n:].any()
+
+    def test_small_adjacent_faces_in_downscaled_image(self, tmp_path: Path) -> None:
+        """Two 4 px faces overlapping by half, in an image shrunk 4x to the
+        detector input. SCRFD's +1 makes their IoU 0.43 in detector pixels
+        but 0.36 in original pixels, where the Python decode measures it: at
+        nms_thresh 0.4 both faces survive there, and must in-graph too."""
+        import onnxruntime as ort
+
+        # Stride-8 anchors (8x8 cells, 2 anchors each) hold the two faces;
+        # every other anchor scores 0.
+        heads = [np.zeros((2 * (64 // s) ** 2, 1), dtype=np.float32) for s in (8, 16, 32)]
+        heads += [np.zeros((2 * (64 // s) ** 2, 4), dtype=np.float32) for s in (8, 16, 32)]
+        heads += [np.zeros((2 * (64 // s) ** 2, 10), dtype=np.float32) for s in (8, 16, 32)]
+        # Row (y * 8 + x) * 2: face A [10, 10, 14, 14] off the anchor at
+        # (8, 8), face B [12, 10, 16, 14] off (16, 8); distances / stride.
+        face_a, face_b = 18, 20
+        heads[0][[face_a, face_b], 0] = [0.9, 0.8]
+        heads[3][face_a] = [-0.25, -0.25, 0.75, 0.75]
+        heads[3][face_b] = [0.5, -0.25, 0.0, 0.75]
+        model_path = str(tmp_path / "det_const.onnx")
+        _make_converted_constant_heads_model(model_path, heads)
+        assert export_decode_graph(model_path, score_threshold=0.5, iou_threshold=0.4) == "written"
+
+        dec = ort.InferenceSession(model_path + DECODE_SUFFIX, providers=["CPUExecutionProvider"])
+        raw = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        blob = np.zeros((2, 3, 64, 64), dtype=np.float32)
+        det_scales = np.array([0.25, 1.0], dtype=np.float32)
+        net_outs = raw.run(None, {"input.1": blob})
+        (dets,) = dec.run(None, {"input.1": blob, DECODE_SCALE_INPUT: det_scales})
+
+        ref_det, _ = _reference_decode(net_outs, 0, (64, 64), 0.5, 0.4, det_scale=0.25)
+        assert ref_det.shape[0] == 2
+        kept = dets[0][dets[0][:, 4] > 0]
+        np.testing.assert_array_equal(kept[:, :4] / np.float32(0.25), ref_det[:, :4])
+        np.testing.assert_array_equal(kept[:, 4], ref_det[:, 4])
+        # Unscaled, the same pair overlaps past the threshold: one survives.
+        assert _reference_decode(net_outs, 1, (64, 64), 0.5, 0.4)[0].shape[0] == 1
+        assert int((dets[1][:, 4] > 0).sum()) == 1
+
+    def test_idempotent_and_follows_reconversion(self, tmp_path: Path) -> None:
+        import onnxruntime as ort
+
+        model_path = str(tmp_path / "det_heads.onnx")
+        _make_scrfd_heads_model(model_path)
+        convert_scrfd_to_dynamic_batch(model_path, det_size=(64, 64), uint8_input=False)
+
+        assert export_decode_graph(model_path) == "written"
+        assert export_decode_graph(model_path) == "unchanged"
+        assert export_decode_graph(model_path, max_dets=8) == "written"
+
+        convert_scrfd_to_dynamic_batch(model_path, det_size=(64, 64), uint8_input=True)
+        assert export_decode_graph(model_path, max_dets=8) == "written"
+        sess = ort.InferenceSession(model_path + DECODE_SUFFIX, providers=["CPUExecutionProvider"])
+        assert sess.get_inputs()[0].type == "tensor(uint8)"
+        assert sess.get_outputs()[0].shape == ["batch", 8, 15]
+        assert [p.name for p in tmp_path.iterdir() if ".tmp." in p.name] == []
+
+    def test_unsupported_graphs(self, tmp_path: Path) -> None:
+        # One-output graph (not the 9-head layout), and a 9-head graph that
+        # was never converted to dynamic batch.
+        single = str(tmp_path / "det_like.onnx")
+        _make_scrfd_like_model(single)
+        convert_scrfd_to_dynamic_batch(single, det_size=(8, 8))
+        unconverted = str(tmp_path / "det_heads.onnx")
+        _make_scrfd_heads_model(unconverted)
+
+        assert export_decode_graph(single) == "unsupported"
+        assert export_decode_graph(unconverted) == "unsupported"
+        assert not os.path.exists(single + DECODE_SUFFIX)
+        assert not os.path.exists(unconverted + DECODE_SUFFIX)
+
 
 class TestConcurrentSafety:
     def test_backup_is_never_overwritten(self, tmp_path: Path) -> None:
@@ -0,0 +1,41 @@
+import time
+
+import numpy as np
+import pytest
+from src.services.face_provider.stage_cache import StageCache
+
+
+def _entry(nbytes: int) -> tuple[np.ndarray, int]:
+    return np.zeros(nbytes, dtype=np.uint8), 0
+
+
+class TestStageCache:
+    def test_hit_after_put(self) -> None:
+        cache: StageCache[tuple[np.ndarray, int]] = StageCache(1024, ttl_s=60)
+        entry = _entry(100)
+        cache.put(b"a", entry)
+        assert cache.get(b"a") is entry
+        assert cache.get(b"b") is None
+
+    def test_evicts_least_recently_used_by_array_bytes(self) -> None:
+        cache: StageCache[tuple[np.ndarray, int]] = StageCache(250, ttl_s=60)
+        cache.put(b"a", _entry(100))
+        cache.put(b"b", _entry(100))
+        assert cache.get(b"a") is not None
+        cache.put(b"c", _entry(100))
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") is not None
+        assert len(cache) == 2
+
+    def test_oversized_entry_not_stored(self) -> None:
+        cache: StageCache[tuple[np.ndarray, int]] = StageCache(50, ttl_s=60)
+        cache.put(b"a", _entry(100))
+        assert len(cache) == 0
+
+    def test_expired_entry_is_a_miss(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        cache: StageCache[tuple[np.ndarray, int]] = StageCache(1024, ttl_s=5)
+        cache.put(b"a", _entry(10))
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+        assert cache.get(b"a") is None
+        assert len(cache) == 0